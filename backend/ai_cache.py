@@ -0,0 +1,168 @@
+"""
+Response cache for AI symptom analysis.
+
+Keys are built from the NORMALISED symptom text plus language and model, so
+"fever and cold" and "Fever & cold " share one entry. Two tiers:
+
+  * memory – per-worker LRU with TTL (OrderedDict, bounded by ``maxsize``)
+  * disk   – optional SQLite file shared by every gunicorn worker on the host;
+             survives restarts. Disabled unless a path is configured.
+
+A memory miss that hits disk is promoted into memory. Hit/miss counters are
+exposed through ``stats()``.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# \w alone misses Devanagari vowel signs and the virama (दिल/दाल would both
+# become "द ल"), so the Devanagari block is kept whole, less the dandas
+_PUNCT_RE = re.compile(r"[^\w\u0900-\u0963\u0966-\u097f]+")
+
+
+def normalize_symptoms(text: str) -> str:
+    """Canonical form for cache keys: lower-case, '&'/'+' → 'and',
+    punctuation dropped, whitespace collapsed. Devanagari is kept."""
+    text = text.lower().replace("&", " and ").replace("+", " and ")
+    return " ".join(_PUNCT_RE.sub(" ", text).split())
+
+
+def make_key(symptoms: str, lang: str, model: str) -> str:
+    raw = f"{model}\x1f{lang}\x1f{normalize_symptoms(symptoms)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier LRU+TTL cache of AI triage results (dicts of strings)."""
+
+    PRUNE_EVERY = 256   # disk writes between expired/overflow sweeps
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 6 * 3600,
+                 db_path: str = None, db_max_rows: int = 50000):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.db_path = db_path or None
+        self.db_max_rows = db_max_rows
+        self._mem = OrderedDict()          # key → (expires_at, value)
+        self._lock = threading.Lock()
+        self._local = threading.local()    # one sqlite connection per thread
+        self._writes = 0
+        self.hits = self.disk_hits = self.misses = 0
+        self.evictions = self.expirations = 0
+
+        if self.db_path:
+            db_dir = os.path.dirname(os.path.abspath(self.db_path))
+            os.makedirs(db_dir, exist_ok=True)
+            with self._db() as db:
+                db.execute("CREATE TABLE IF NOT EXISTS ai_cache ("
+                           "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)")
+                db.execute("CREATE INDEX IF NOT EXISTS ai_cache_expires ON ai_cache(expires)")
+
+    # ── public API ────────────────────────────────────────────────
+    def get(self, key: str):
+        """Return a copy of the cached value, or None on miss/expiry."""
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    return dict(entry[1])
+                del self._mem[key]
+                self.expirations += 1
+
+        row = self._disk_get(key, now)
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            value, expires = row
+            self.disk_hits += 1
+            self._mem_put(key, value, expires)   # keep the row's expiry, don't extend it
+        return dict(value)
+
+    def set(self, key: str, value: dict):
+        expires = time.time() + self.ttl
+        value = dict(value)
+        with self._lock:
+            self._mem_put(key, value, expires)
+        self._disk_set(key, value, expires)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._mem),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "disk": bool(self.db_path),
+                "hits": self.hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hitRate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def after_fork(self):
+        """Drop SQLite connections inherited from the parent process (a
+        connection must not be used across ``fork()``); new ones open lazily."""
+        self._local = threading.local()
+
+    # ── memory tier ───────────────────────────────────────────────
+    def _mem_put(self, key, value, expires):
+        self._mem[key] = (expires, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.maxsize:
+            self._mem.popitem(last=False)
+            self.evictions += 1
+
+    # ── disk tier ─────────────────────────────────────────────────
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _disk_get(self, key, now):
+        """``(value, expires)`` for a live row, or None."""
+        if not self.db_path:
+            return None
+        try:
+            row = self._db().execute(
+                "SELECT value, expires FROM ai_cache WHERE key = ? AND expires > ?", (key, now)
+            ).fetchone()
+        except sqlite3.Error as exc:
+            logger.warning(f"[Cache] disk read failed: {exc}")
+            return None
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def _disk_set(self, key, value, expires):
+        if not self.db_path:
+            return
+        try:
+            db = self._db()
+            db.execute("INSERT OR REPLACE INTO ai_cache (key, value, expires) VALUES (?, ?, ?)",
+                       (key, json.dumps(value, ensure_ascii=False), expires))
+            with self._lock:
+                self._writes += 1
+                prune = self._writes % self.PRUNE_EVERY == 0
+            if prune:
+                db.execute("DELETE FROM ai_cache WHERE expires <= ?", (time.time(),))
+                db.execute("DELETE FROM ai_cache WHERE key IN (SELECT key FROM ai_cache "
+                           "ORDER BY expires DESC LIMIT -1 OFFSET ?)", (self.db_max_rows,))
+        except sqlite3.Error as exc:
+            logger.warning(f"[Cache] disk write failed: {exc}")
@@ -1,20 +1,127 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import os
 import re
 import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
+from functools import lru_cache
 from dotenv import load_dotenv
-import requests
+
+import ai_cache
+import knowledge_base
+import metrics
+from circuit_breaker import AdaptiveTimeout, CircuitBreaker, CircuitOpenError
+from hedging import PendingRefinements
+from metrics import FALLBACKS, JSON_PARSE_FAILURES, STAGE_SECONDS, TRIAGE_PATH
+from model_router import MODEL_TIER, ModelRouter, Tier
+from singleflight import SingleFlight
+from tfidf_index import TfidfIndex
+from openrouter_client import PooledClient
+from report_stream import ReportFieldParser
+from rule_responses import RuleResponses, dumps
 
 load_dotenv()
 
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 CORS(app)
 
 # ── OpenRouter config ──────────────────────────────────────────────
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 OPENROUTER_MODEL   = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3.3-70b-instruct:free")
-OPENROUTER_URL     = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_URL     = os.getenv("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
+
+# keep-alive connection pool per worker; separate connect/read timeouts
+OPENROUTER = PooledClient(
+    OPENROUTER_URL,
+    pool_size=int(os.getenv("OPENROUTER_POOL_SIZE", "16")),
+    connect_timeout=float(os.getenv("OPENROUTER_CONNECT_TIMEOUT", "5")),
+    read_timeout=float(os.getenv("OPENROUTER_READ_TIMEOUT", "30")),
+)
+# connections each worker opens when it starts (see init_worker)
+OPENROUTER_WARM_CONNECTIONS = int(os.getenv("OPENROUTER_WARM_CONNECTIONS", "2"))
+
+# fail fast while OpenRouter is degraded: breaker + latency-derived read timeout
+BREAKER = CircuitBreaker(
+    failure_rate=float(os.getenv("BREAKER_FAILURE_RATE", "0.5")),
+    min_calls=int(os.getenv("BREAKER_MIN_CALLS", "5")),
+    window=int(os.getenv("BREAKER_WINDOW", "20")),
+    open_seconds=float(os.getenv("BREAKER_OPEN_SECONDS", "30")),
+    half_open_probes=int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1")),
+)
+OPENROUTER_TIMEOUT = AdaptiveTimeout(
+    floor=float(os.getenv("OPENROUTER_MIN_READ_TIMEOUT", "8")),
+    ceiling=OPENROUTER.read_timeout,
+)
+
+# AI response cache: in-memory LRU+TTL per worker, optional shared SQLite tier
+AI_CACHE = ai_cache.ResponseCache(
+    maxsize=int(os.getenv("AI_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("AI_CACHE_TTL", str(6 * 3600))),
+    db_path=os.getenv("AI_CACHE_DB") or None,
+)
+
+# coalesce concurrent identical AI calls; AI_SINGLEFLIGHT_DIR (a lock-file
+# directory, used together with AI_CACHE_DB) extends this across workers
+AI_FLIGHTS = SingleFlight(
+    lock_dir=os.getenv("AI_SINGLEFLIGHT_DIR") or None,
+    lock_timeout=OPENROUTER.connect_timeout + OPENROUTER.read_timeout,
+)
+
+# deadline mode: answer from rules if the AI misses the budget (seconds, 0 = off)
+AI_LATENCY_BUDGET = float(os.getenv("AI_LATENCY_BUDGET", "0"))
+AI_HEDGE_WORKERS  = int(os.getenv("AI_HEDGE_WORKERS", "16"))
+REFINEMENTS = PendingRefinements(ttl=float(os.getenv("AI_REFINEMENT_TTL", "300")))
+
+# rule scorer: "keyword" (phrase automaton + word index, rule_index.py) or
+# "tfidf" (character n-gram TF-IDF over keywords and condition texts,
+# tfidf_index.py). TF-IDF scores run 0–100 and matches below TFIDF_MIN_SCORE
+# are dropped; set RULES_FIRST_MIN_SCORE / ROUTE_RULES_MIN_SCORE on that scale
+RULE_SCORER = os.getenv("RULE_SCORER", "keyword")
+if RULE_SCORER not in ("keyword", "tfidf"):
+    raise ValueError(f"RULE_SCORER must be 'keyword' or 'tfidf', not {RULE_SCORER!r}")
+TFIDF_MIN_SCORE = int(os.getenv("TFIDF_MIN_SCORE", "20"))
+
+# languages answered by the offline rule engine whenever it recognises the
+# symptoms (top score ≥ RULES_FIRST_MIN_SCORE, i.e. at least one keyword hit);
+# only unrecognised inputs go on to OpenRouter
+RULES_FIRST_LANGUAGES = frozenset(
+    l.strip() for l in os.getenv("RULES_FIRST_LANGUAGES", "hi,mr").split(",") if l.strip())
+RULES_FIRST_MIN_SCORE = int(os.getenv("RULES_FIRST_MIN_SCORE", "3"))
+
+# tiered model routing (see model_router.py): no model, a small fast model
+# (OPENROUTER_SMALL_MODEL, off when unset) or OPENROUTER_MODEL, each with its
+# own token budget; prices are USD per 1M tokens, for the cost metrics only
+ROUTER = ModelRouter(
+    large=Tier("large", OPENROUTER_MODEL,
+               max_tokens=int(os.getenv("OPENROUTER_MAX_TOKENS", "1200")),
+               price_in=float(os.getenv("OPENROUTER_PRICE_IN", "0")),
+               price_out=float(os.getenv("OPENROUTER_PRICE_OUT", "0"))),
+    small=Tier("small", os.getenv("OPENROUTER_SMALL_MODEL") or None,
+               max_tokens=int(os.getenv("OPENROUTER_SMALL_MAX_TOKENS", "600")),
+               price_in=float(os.getenv("OPENROUTER_SMALL_PRICE_IN", "0")),
+               price_out=float(os.getenv("OPENROUTER_SMALL_PRICE_OUT", "0"))),
+    rules_languages=RULES_FIRST_LANGUAGES,
+    rules_languages_min_score=RULES_FIRST_MIN_SCORE,
+    rules_min_score=int(os.getenv("ROUTE_RULES_MIN_SCORE", "0")),
+    rules_margin=float(os.getenv("ROUTE_RULES_MARGIN", "2")),
+    rules_max_words=int(os.getenv("ROUTE_RULES_MAX_WORDS", "8")),
+    small_max_words=int(os.getenv("ROUTE_SMALL_MAX_WORDS", "20")),
+    small_languages=[l.strip() for l in os.getenv("ROUTE_SMALL_LANGUAGES", "en").split(",")
+                     if l.strip()],
+)
+
+# red-flag inputs get the precomposed emergency answer (call 108, CPR) at once;
+# with EMERGENCY_AI_ENRICH=1 the AI report follows through a refinementToken
+EMERGENCY_AI_ENRICH = os.getenv("EMERGENCY_AI_ENRICH", "0").lower() in ("1", "true", "yes")
+
+# batch triage: cap on records per request and on concurrent OpenRouter calls
+BATCH_MAX_RECORDS    = int(os.getenv("BATCH_MAX_RECORDS", "100"))
+BATCH_AI_CONCURRENCY = int(os.getenv("BATCH_AI_CONCURRENCY", "4"))
 
 URGENCY_COLORS = {"low": "#10b981", "medium": "#f59e0b", "high": "#ef4444"}
 DISCLAIMER     = ("This is AI-based guidance, not a medical diagnosis. "
@@ -28,35 +135,261 @@ def home():
 
 @app.route("/api/health")
 def health_check():
-    return jsonify({"status": "healthy"})
+    kb = KB.current()
+    return jsonify({
+        "status": "healthy",
+        "knowledgeBase": {"version": kb.version, "conditions": len(kb.conditions),
+                          "scorer": RULE_SCORER},
+        "aiCache": AI_CACHE.stats(),
+        "aiSingleFlight": AI_FLIGHTS.stats(),
+        "openrouter": {"breaker": BREAKER.stats(), "latency": OPENROUTER_TIMEOUT.stats()},
+        "routing": ROUTER.describe(),
+        "ruleResponses": RULE_RESPONSES.stats(),
+    })
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus text format: stage latencies, rules-vs-AI path, fallbacks."""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 
 @app.route("/api/analyze-symptoms", methods=["POST"])
 def analyze_symptoms():
     try:
-        data = request.get_json()
-        symptoms = (data.get("symptoms") or "").strip()
+        with STAGE_SECONDS.time("parse"):
+            data = request.get_json()
+            symptoms = (data.get("symptoms") or "").strip()
+            lang = data.get("language", "en")
+            budget = _latency_budget(data)
 
         if len(symptoms) < 5:
             return jsonify({"error": "Please describe your symptoms in more detail"}), 400
 
-        lang = data.get("language", "en")
-
-        if OPENROUTER_API_KEY:
-            result = _analyze_with_ai(symptoms, lang)
+        emergency = _emergency_answer(symptoms, lang)
+        if emergency is not None:
+            TRIAGE_PATH.inc("analyze", "emergency")
+            if EMERGENCY_AI_ENRICH and OPENROUTER_API_KEY:
+                return jsonify(_enrich_emergency(emergency[0], symptoms, lang))
+            return _json_body(emergency[1])
+
+        tier, kb, matches = _route(symptoms, lang)
+        if tier.model is None:
+            TRIAGE_PATH.inc("analyze", "rules")
+            return _json_body(_rule_answer(kb, matches, lang)[1])
+
+        TRIAGE_PATH.inc("analyze", "ai")
+        if budget:
+            result = _analyze_hedged(symptoms, lang, budget, tier)
         else:
-            result = _analyze_with_rules(symptoms)
-
-        # normalise every response
-        result.setdefault("color", URGENCY_COLORS.get(result.get("urgency", "medium"), "#f59e0b"))
-        result.setdefault("disclaimer", DISCLAIMER)
-        return jsonify(result)
+            result = _analyze_with_ai(symptoms, lang, tier)
+        return jsonify(_normalise(result))
 
     except Exception as exc:
-        print(f"[ERROR] {exc}")
+        logger.exception(f"[ERROR] {exc}")
         return jsonify({"error": str(exc)}), 500
 
 
+@app.route("/api/analyze-symptoms/refinement/<token>")
+def analyze_symptoms_refinement(token):
+    """Fetch the AI answer for a provisional (deadline-mode) rule response.
+
+    200 → refined result, 202 → still running, 404 → unknown or expired.
+    """
+    future = REFINEMENTS.get(token)
+    if future is not None:
+        if not future.done():
+            return jsonify({"status": "pending"}), 202
+        REFINEMENTS.discard(token)
+        return jsonify(_normalise(future.result()))
+
+    # started on another worker: its result reaches us through the cache
+    cached = AI_CACHE.get(REFINEMENTS.cache_key(token))
+    if cached is not None:
+        return jsonify(_normalise(cached))
+    if REFINEMENTS.expired(token):
+        return jsonify({"error": "Unknown or expired refinement token"}), 404
+    return jsonify({"status": "pending"}), 202
+
+
+@app.route("/api/analyze-symptoms/batch", methods=["POST"])
+def analyze_symptoms_batch():
+    """Triage a list of queued records, streaming one NDJSON line per record.
+
+    Request:  {"records": [{"id": "...", "symptoms": "...", "language": "hi"}, ...]}
+    Response: application/x-ndjson, one {"index", "id", "result" | "error"} per
+    line in completion order – rule results first, AI results as they finish.
+    """
+    with STAGE_SECONDS.time("parse"):
+        data = request.get_json(silent=True) or {}
+        records = data.get("records")
+    if not isinstance(records, list) or not records:
+        return jsonify({"error": "'records' must be a non-empty list"}), 400
+    if len(records) > BATCH_MAX_RECORDS:
+        return jsonify({"error": f"At most {BATCH_MAX_RECORDS} records per batch"}), 400
+
+    valid, lines = [], []
+    for i, rec in enumerate(records):
+        rec = rec if isinstance(rec, dict) else {}
+        symptoms = str(rec.get("symptoms") or "").strip()
+        if len(symptoms) < 5:
+            lines.append({"index": i, "id": rec.get("id"),
+                          "error": "Please describe your symptoms in more detail"})
+        else:
+            valid.append((i, rec.get("id"), symptoms, rec.get("language", "en")))
+
+    def generate():
+        for line in lines:
+            yield _ndjson(line)
+
+        # rule path: score the whole batch in one pass and stream every record
+        # the rules may answer (all of them without an API key) immediately
+        kb = KB.current()
+        with STAGE_SECONDS.time("rule_scoring_batch"):
+            all_matches = _scorer(kb).score_many([v[2].lower() for v in valid])
+        remote = []
+        for rec, matches in zip(valid, all_matches):
+            i, rec_id, symptoms, lang = rec
+            emergency = _emergency_answer(symptoms, lang)
+            tier = _pick_tier(matches, symptoms, lang) if emergency is None else None
+            if emergency is not None:
+                TRIAGE_PATH.inc("batch", "emergency")
+                body = emergency[1]
+            elif tier.model is not None:
+                remote.append(rec + (tier,))
+                continue
+            else:
+                TRIAGE_PATH.inc("batch", "rules")
+                body = _rule_answer(kb, matches, lang)[1]
+            # splice the precomposed body into the line, no re-serialisation
+            head = json.dumps({"index": i, "id": rec_id}, ensure_ascii=False)[:-1]
+            yield f'{head}, "result": '.encode() + body + b"}\n"
+        if not remote:
+            return
+        TRIAGE_PATH.inc("batch", "ai", amount=len(remote))
+
+        futures = {_BATCH_AI_POOL.submit(_analyze_with_ai, symptoms, lang, tier): (i, rec_id)
+                   for i, rec_id, symptoms, lang, tier in remote}
+        try:
+            for fut in as_completed(futures):
+                i, rec_id = futures[fut]
+                try:
+                    line = {"index": i, "id": rec_id, "result": _normalise(fut.result())}
+                except Exception as exc:
+                    logger.error(f"[Batch Error] {exc}")
+                    line = {"index": i, "id": rec_id, "error": str(exc)}
+                yield _ndjson(line)
+        finally:
+            # client went away mid-stream: don't spend quota on queued records
+            for fut in futures:
+                fut.cancel()
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@app.route("/api/analyze-symptoms/stream", methods=["GET", "POST"])
+def analyze_symptoms_stream():
+    """Server-Sent Events variant of analyze_symptoms for slow networks.
+
+    Each report field is pushed as ``event: field`` (``{"key", "value"}``) as
+    soon as the model has finished generating it – urgency first – followed by
+    ``event: done`` with the complete response. GET (query params) is accepted
+    so browsers can use EventSource.
+    """
+    with STAGE_SECONDS.time("parse"):
+        data = (request.get_json(silent=True) or {}) if request.method == "POST" else request.args
+        symptoms = (data.get("symptoms") or "").strip()
+        lang = data.get("language", "en")
+    if len(symptoms) < 5:
+        return jsonify({"error": "Please describe your symptoms in more detail"}), 400
+
+    return Response(
+        stream_with_context(_stream_report_events(symptoms, lang)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _latency_budget(data: dict) -> float:
+    """Seconds the AI answer may take before the rule answer is returned
+    (request ``deadline`` overrides AI_LATENCY_BUDGET; 0 disables hedging)."""
+    try:
+        budget = float(data.get("deadline", AI_LATENCY_BUDGET))
+    except (TypeError, ValueError):
+        budget = AI_LATENCY_BUDGET
+    return min(max(budget, 0.0), OPENROUTER.read_timeout)
+
+
+def _analyze_hedged(symptoms: str, lang: str, budget: float, tier: Tier = None) -> dict:
+    """Race the AI call against *budget*; the rule engine answers meanwhile.
+
+    On time → the AI result. Late → the rule result flagged ``provisional``
+    with a ``refinementToken`` for /api/analyze-symptoms/refinement/<token>.
+    """
+    tier = tier or ROUTER.large
+    future = _HEDGE_POOL.submit(_analyze_with_ai, symptoms, lang, tier)
+    rules = _analyze_with_rules(symptoms, lang)
+    try:
+        return future.result(timeout=budget)
+    except FutureTimeout:
+        pass
+    FALLBACKS.inc("deadline")
+    key = ai_cache.make_key(symptoms, lang, tier.model)
+    rules["provisional"] = True
+    rules["refinementToken"] = REFINEMENTS.add(future, key)
+    return rules
+
+
+def _enrich_emergency(result: dict, symptoms: str, lang: str) -> dict:
+    """The emergency answer plus a ``refinementToken`` for the AI report,
+    which is fetched in the background (see analyze_symptoms_refinement)."""
+    key = _emergency_key(symptoms, lang)
+    future = _HEDGE_POOL.submit(_emergency_ai_report, symptoms, lang, key)
+    return dict(result, refinementToken=REFINEMENTS.add(future, key))
+
+
+def _emergency_key(symptoms: str, lang: str) -> str:
+    """Cache key of the overridden emergency report. Not the plain AI key:
+    a refinement poll answered from the cache (a repeat poll, or another
+    worker) must get the report with the override, not the raw one."""
+    return ai_cache.make_key(symptoms, lang, f"{OPENROUTER_MODEL}\x1femergency")
+
+
+def _emergency_ai_report(symptoms: str, lang: str, key: str) -> dict:
+    """AI enrichment of an emergency answer – it never lowers the urgency.
+    Only a real AI report is cached; a fallback is returned to this poll alone."""
+    report, parsed = _ai_report(symptoms, lang)
+    report.update(urgency="high", emergency=True)
+    if parsed:
+        AI_CACHE.set(key, report)
+    return report
+
+
+# shared across batch requests so the OpenRouter concurrency cap is per worker
+_BATCH_AI_POOL = ThreadPoolExecutor(max_workers=BATCH_AI_CONCURRENCY,
+                                    thread_name_prefix="batch-ai")
+
+# AI calls raced against a latency budget keep running here after the
+# request has been answered by the rule engine
+_HEDGE_POOL = ThreadPoolExecutor(max_workers=AI_HEDGE_WORKERS, thread_name_prefix="hedge-ai")
+
+
+def _normalise(result: dict) -> dict:
+    """Fill the display fields every triage response carries."""
+    result.setdefault("color", URGENCY_COLORS.get(result.get("urgency", "medium"), "#f59e0b"))
+    result.setdefault("disclaimer", DISCLAIMER)
+    return result
+
+
+def _ndjson(obj: dict) -> str:
+    return json.dumps(obj, ensure_ascii=False) + "\n"
+
+
+def _json_body(body: bytes) -> Response:
+    """Send an already-serialised JSON body."""
+    return app.response_class(body, mimetype="application/json")
+
+
 # ══════════════════════════════════════════════════════════════════
 #  AI-POWERED ANALYSIS  (OpenRouter)
 # ══════════════════════════════════════════════════════════════════
@@ -77,18 +410,80 @@ Output ONLY a raw JSON object – no markdown, no commentary:
 {
   "urgency": "low | medium | high",
   "urgencyText": "<Condition Name> – <Action>",
+  "redFlags": "<warning signs that need immediate hospital visit>",
+  "advice": "<4-5 numbered actionable steps specific to THESE symptoms>",
   "possibleCauses": "<2-3 specific medical causes for THESE symptoms>",
   "whyHappening": "<Simple explanation of the body mechanism causing THESE symptoms>",
-  "advice": "<4-5 numbered actionable steps specific to THESE symptoms>",
   "homeRemedies": "<2-3 safe home remedies relevant to THESE symptoms>",
-  "redFlags": "<warning signs that need immediate hospital visit>",
   "timeline": "<expected duration and when to expect improvement>"
 }
 """
 
+# every AI report carries these fields (in the order the prompt asks for them,
+# most actionable first, so a streamed report shows them earliest)
+REPORT_DEFAULTS = {
+    "urgency": "medium",
+    "urgencyText": "Needs Evaluation",
+    "redFlags": "",
+    "advice": "",
+    "possibleCauses": "",
+    "whyHappening": "",
+    "homeRemedies": "",
+    "timeline": "",
+}
+
+
+def _analyze_with_ai(symptoms: str, lang: str = "en", tier: Tier = None) -> dict:
+    """Call OpenRouter and return structured result; falls back to rules on any failure.
+
+    *tier* (see model_router.py) picks the model and token budget; the large
+    model by default. Parsed AI reports are cached (see ai_cache.py) under the
+    normalised symptoms + language + model, so repeated complaints skip the
+    network. Concurrent identical requests are coalesced onto one upstream
+    call (see singleflight.py).
+    """
+    return _ai_report(symptoms, lang, tier)[0]
+
+
+def _ai_report(symptoms: str, lang: str = "en", tier: Tier = None) -> tuple:
+    """``(result, parsed)`` for _analyze_with_ai: *parsed* is False when the
+    result is a fallback (the rule answer or the model's raw text), which
+    callers must not cache."""
+    tier = tier or ROUTER.large
+    key = ai_cache.make_key(symptoms, lang, tier.model)
+    cached = AI_CACHE.get(key)
+    if cached is not None:
+        return cached, True
+
+    def fetch():
+        result, parsed = _call_openrouter(symptoms, lang, tier)
+        if parsed:   # never cache the raw-text fallback
+            AI_CACHE.set(key, result)
+        return result, parsed
+
+    def recheck():
+        cached = AI_CACHE.get(key)
+        return None if cached is None else (cached, True)
+
+    try:
+        result, parsed = AI_FLIGHTS.do(key, fetch, recheck=recheck)
+    except CircuitOpenError:
+        FALLBACKS.inc("breaker_open")
+        return _analyze_with_rules(symptoms, lang), False
+    except Exception as exc:
+        logger.error(f"[AI Error] {exc}")
+        FALLBACKS.inc("ai_error")
+        return _analyze_with_rules(symptoms, lang), False
+    return dict(result), parsed   # shared between coalesced callers – copy before normalising
+
+
+class OpenRouterError(Exception):
+    """Non-200 response from OpenRouter."""
+
 
-def _analyze_with_ai(symptoms: str, lang: str = "en") -> dict:
-    """Call OpenRouter and return structured result; falls back to rules on any failure."""
+def _openrouter_request(symptoms: str, lang: str, stream: bool = False, tier: Tier = None) -> dict:
+    """Headers + JSON body for a chat-completions call to *tier*'s model."""
+    tier = tier or ROUTER.large
 
     lang_instruction = ""
     if lang == "hi":
@@ -98,68 +493,224 @@ def _analyze_with_ai(symptoms: str, lang: str = "en") -> dict:
 
     user_msg = f"Patient symptoms: {symptoms}{lang_instruction}"
 
+    body = {
+        "model": tier.model,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user",   "content": user_msg},
+        ],
+        "temperature": 0.4,      # lower = more focused, factual
+        "max_tokens": tier.max_tokens,
+        "top_p": 0.9,
+    }
+    if stream:
+        body["stream"] = True
+    return {
+        "headers": {
+            "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "http://localhost:5000",
+            "X-Title": "GramHealth AI",
+        },
+        "json": body,
+        "stream": stream,
+    }
+
+
+# upstream statuses that mean "OpenRouter is unhealthy / unusable right now"
+_BREAKER_FAILURE_STATUSES = {401, 402, 403, 408, 429}
+
+
+def _post_openrouter(req: dict):
+    """POST through the circuit breaker with the adaptive read timeout.
+
+    Raises CircuitOpenError without touching the network while the breaker is
+    open, and OpenRouterError for non-200 responses. Transport errors, 5xx and
+    auth/quota/rate-limit statuses count as breaker failures.
+    """
+    if not BREAKER.allow():
+        raise CircuitOpenError("OpenRouter circuit open – answering from rules")
+
+    # streamed reads time out per chunk, so they keep the static read timeout
+    read_timeout = OPENROUTER.read_timeout if req.get("stream") else OPENROUTER_TIMEOUT.current()
+    start = time.monotonic()
     try:
-        resp = requests.post(
-            OPENROUTER_URL,
-            headers={
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "http://localhost:5000",
-                "X-Title": "GramHealth AI",
-            },
-            json={
-                "model": OPENROUTER_MODEL,
-                "messages": [
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user",   "content": user_msg},
-                ],
-                "temperature": 0.4,      # lower = more focused, factual
-                "max_tokens": 1200,
-                "top_p": 0.9,
-            },
-            timeout=30,
-        )
+        resp = OPENROUTER.post(timeout=(OPENROUTER.connect_timeout, read_timeout), **req)
+    except Exception:
+        BREAKER.record_failure()
+        raise
 
-        if resp.status_code != 200:
-            print(f"[OpenRouter {resp.status_code}] {resp.text[:300]}")
-            return _analyze_with_rules(symptoms)
+    _record_upstream_status(resp.status_code)
+    if resp.status_code != 200:
+        detail = resp.text[:300]
+        resp.close()
+        raise OpenRouterError(f"[OpenRouter {resp.status_code}] {detail}")
 
-        raw = resp.json()["choices"][0]["message"]["content"]
+    if not req.get("stream"):
+        OPENROUTER_TIMEOUT.observe(time.monotonic() - start)
+    return resp
 
-        # strip markdown fences if model wraps them
-        raw = re.sub(r"```json\s*", "", raw)
-        raw = re.sub(r"```\s*$", "", raw)
-        raw = raw.strip()
 
-        m = re.search(r"\{.*\}", raw, re.DOTALL)
-        if m:
-            ai = json.loads(m.group())
-            # guarantee required fields exist
-            ai.setdefault("urgency", "medium")
-            ai.setdefault("urgencyText", "Needs Evaluation")
-            ai.setdefault("possibleCauses", "")
-            ai.setdefault("whyHappening", "")
-            ai.setdefault("advice", "")
-            ai.setdefault("homeRemedies", "")
-            ai.setdefault("redFlags", "")
-            ai.setdefault("timeline", "")
-            return ai
-
-        # couldn't parse JSON – use the text as advice
-        return {
-            "urgency": "medium",
-            "urgencyText": "Symptom Analysis",
-            "possibleCauses": "",
-            "whyHappening": "",
-            "advice": raw[:600],
-            "homeRemedies": "",
-            "redFlags": "",
-            "timeline": "",
-        }
+def _record_upstream_status(status: int):
+    """Feed one OpenRouter response status to the circuit breaker."""
+    if status >= 500 or status in _BREAKER_FAILURE_STATUSES:
+        BREAKER.record_failure()
+    else:
+        BREAKER.record_success()
+
 
+def _call_openrouter(symptoms: str, lang: str = "en", tier: Tier = None) -> tuple:
+    """One OpenRouter round trip → ``(result, parsed)``.
+
+    *parsed* is False when the model didn't return JSON and its text was used
+    as advice. Raises on transport errors and non-200 responses.
+    """
+    tier = tier or ROUTER.large
+    start = time.perf_counter()
+    data = _post_openrouter(_openrouter_request(symptoms, lang, tier=tier)).json()
+    elapsed = time.perf_counter() - start
+    STAGE_SECONDS.observe(elapsed, "openrouter")
+    tier.account(elapsed, data.get("usage"))
+    return _parse_report(data["choices"][0]["message"]["content"])
+
+
+def _parse_report(raw: str) -> tuple:
+    """Model output → ``(result, parsed)``; see _call_openrouter."""
+
+    # strip markdown fences if model wraps them
+    raw = re.sub(r"```json\s*", "", raw)
+    raw = re.sub(r"```\s*$", "", raw)
+    raw = raw.strip()
+
+    m = re.search(r"\{.*\}", raw, re.DOTALL)
+    if m:
+        try:
+            ai = json.loads(m.group())
+        except ValueError:
+            JSON_PARSE_FAILURES.inc("openrouter")
+            raise
+        # guarantee required fields exist
+        for field, default in REPORT_DEFAULTS.items():
+            ai.setdefault(field, default)
+        return ai, True
+
+    # couldn't parse JSON – use the text as advice
+    JSON_PARSE_FAILURES.inc("openrouter")
+    return {
+        "urgency": "medium",
+        "urgencyText": "Symptom Analysis",
+        "possibleCauses": "",
+        "whyHappening": "",
+        "advice": raw[:600],
+        "homeRemedies": "",
+        "redFlags": "",
+        "timeline": "",
+    }, False
+
+
+def _stream_openrouter(symptoms: str, lang: str = "en", tier: Tier = None):
+    """Yield content deltas from a ``stream=True`` completion (OpenRouter SSE)."""
+    tier = tier or ROUTER.large
+    start = time.perf_counter()
+    with _post_openrouter(_openrouter_request(symptoms, lang, stream=True, tier=tier)) as resp:
+        try:
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue          # blank separators and ": keep-alive" comments
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    return
+                chunk = json.loads(data)
+                if "error" in chunk:
+                    raise OpenRouterError(f"[OpenRouter stream] {chunk['error']}")
+                delta = (chunk.get("choices") or [{}])[0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+        except Exception:
+            BREAKER.record_failure()   # stalled / broken mid-stream
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            STAGE_SECONDS.observe(elapsed, "openrouter_stream")
+            tier.account(elapsed)
+
+
+def _stream_report_events(symptoms: str, lang: str):
+    """Generate SSE events for one triage: a ``field`` event per report field
+    as soon as it is complete, then ``done`` with the full normalised result."""
+
+    def emit(event: str, payload: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    def emit_fields(result: dict):
+        for key, value in result.items():
+            if key in ("color", "disclaimer"):   # derived: sent with urgency / in done
+                continue
+            yield emit("field", {"key": key, "value": value})
+            if key == "urgency":
+                yield emit("field", {"key": "color", "value": URGENCY_COLORS.get(value, "#f59e0b")})
+
+    emergency = _emergency_answer(symptoms, lang)
+    if emergency is not None:
+        TRIAGE_PATH.inc("stream", "emergency")
+        yield from emit_fields(emergency[0])
+        yield emit("done", emergency[0])
+        return
+
+    tier, kb, matches = _route(symptoms, lang)
+    if tier.model is None:
+        TRIAGE_PATH.inc("stream", "rules")
+        result = _rule_answer(kb, matches, lang)[0]
+        yield from emit_fields(result)
+        yield emit("done", result)
+        return
+
+    TRIAGE_PATH.inc("stream", "ai")
+    key = ai_cache.make_key(symptoms, lang, tier.model)
+    cached = AI_CACHE.get(key)
+    if cached is not None:
+        yield from emit_fields(cached)
+        yield emit("done", _normalise(cached))
+        return
+
+    parser = ReportFieldParser()
+    failed = None
+    try:
+        for delta in _stream_openrouter(symptoms, lang, tier):
+            for field, value in parser.feed(delta):
+                yield from emit_fields({field: value})
+            if parser.done:
+                break
+    except CircuitOpenError:
+        failed = "breaker_open"
     except Exception as exc:
-        print(f"[AI Error] {exc}")
-        return _analyze_with_rules(symptoms)
+        logger.error(f"[AI Stream Error] {exc}")
+        failed = "ai_error"
+
+    if failed is None and not parser.done:
+        JSON_PARSE_FAILURES.inc("openrouter_stream")   # stream ended mid-report
+    if not parser.fields:
+        # nothing usable arrived – answer from the rule engine instead
+        FALLBACKS.inc(failed or "unparsed")
+        result = _analyze_with_rules(symptoms, lang)
+        yield from emit_fields(result)
+        yield emit("done", _normalise(result))
+        return
+
+    result = dict(parser.fields)
+    if parser.done:
+        fill = REPORT_DEFAULTS
+    else:
+        # cut off mid-report: the rule engine answers what the model didn't get to
+        FALLBACKS.inc(failed or "unparsed")
+        fill = dict(REPORT_DEFAULTS, **{k: v for k, v in _analyze_with_rules(symptoms, lang).items()
+                                        if k in REPORT_DEFAULTS})
+    missing = {k: v for k, v in fill.items() if k not in result}
+    yield from emit_fields(missing)
+    result.update(missing)
+    if parser.done:
+        AI_CACHE.set(key, result)
+    yield emit("done", _normalise(result))
 
 
 # ══════════════════════════════════════════════════════════════════
@@ -170,407 +721,14 @@ def _analyze_with_ai(symptoms: str, lang: str = "en") -> dict:
 # ══════════════════════════════════════════════════════════════════
 
 # ---------- condition knowledge base ----------
-CONDITIONS = {
-    "dental": {
-        "keywords": ["tooth", "teeth", "wisdom tooth", "wisdom teeth", "toothache",
-                      "gum", "dental", "molar", "cavity", "jaw pain"],
-        "urgency": "medium",
-        "label": "Dental Pain",
-        "causes": (
-            "Impacted wisdom tooth (tooth stuck under gum or pressing neighbouring teeth), "
-            "dental cavity reaching the nerve (pulpitis), gum infection (pericoronitis), "
-            "or a dental abscess (pus pocket at the tooth root)"
-        ),
-        "mechanism": (
-            "When a wisdom tooth can't erupt fully, a flap of gum covers it and traps "
-            "bacteria, causing swelling and throbbing pain. If decay reaches the inner "
-            "nerve (pulp), every hot/cold stimulus sends a sharp pain signal."
-        ),
-        "advice": (
-            "1. Rinse with warm salt water (1 tsp salt in a glass of warm water) every 2-3 hours.\n"
-            "2. Take Ibuprofen 400 mg with food every 8 hours for pain and swelling.\n"
-            "3. Apply an ice pack on the cheek – 15 min on, 15 min off.\n"
-            "4. Eat soft foods (khichdi, dal, curd) and chew on the opposite side.\n"
-            "5. Visit a dentist within 48 hours for X-ray and treatment plan."
-        ),
-        "home_remedies": (
-            "Clove oil on cotton applied to the sore gum numbs pain naturally. "
-            "A cold tea bag pressed against the area reduces swelling. "
-            "Turmeric paste (haldi + water) on gums has anti-bacterial properties."
-        ),
-        "red_flags": "Fever above 101 °F, facial swelling spreading to eye/neck, difficulty opening mouth or swallowing, pus oozing from gums",
-        "timeline": "Pain eases in 2-3 days with salt rinses and ibuprofen. If impacted, a dentist may schedule extraction (recovery: 7-10 days)."
-    },
-
-    "tremor": {
-        "keywords": ["shaking", "tremor", "trembling", "hands shaking", "hand shaking",
-                      "shivering", "vibrating"],
-        "urgency": "medium",
-        "label": "Tremor / Shaking",
-        "causes": (
-            "Pain-triggered adrenaline surge (most common with dental/injury pain), "
-            "low blood sugar (skipped meals), excess caffeine or tea, anxiety/stress response, "
-            "thyroid over-activity (hyperthyroidism), or essential tremor (neurological)"
-        ),
-        "mechanism": (
-            "Severe pain makes your brain release adrenaline (fight-or-flight hormone). "
-            "This speeds up your heart, tenses muscles, and causes visible trembling. "
-            "Low blood sugar starves nerve cells of fuel, making them misfire and twitch."
-        ),
-        "advice": (
-            "1. If you're in pain, treating the pain (see dental/injury advice) usually stops the shaking.\n"
-            "2. Sit down, drink a glass of warm sweet milk or glucose water to raise blood sugar.\n"
-            "3. Practice slow breathing: breathe in 4 sec → hold 4 sec → breathe out 6 sec.\n"
-            "4. Reduce tea/coffee to max 2 cups a day.\n"
-            "5. If tremor persists for more than a week without pain, see a doctor – they'll check thyroid and sugar levels."
-        ),
-        "home_remedies": (
-            "Warm milk with a teaspoon of ghee before bed calms the nervous system. "
-            "Soaked almonds (4-5 overnight) eaten in the morning support nerve health. "
-            "Regular walking 30 min/day reduces anxiety-related tremors."
-        ),
-        "red_flags": "Tremor only on one side of the body, numbness or weakness in limbs, slurred speech, confusion",
-        "timeline": "Stress/pain-related tremors stop within hours once pain is managed. If it persists beyond 1 week, get blood tests done."
-    },
-
-    "headache": {
-        "keywords": ["headache", "head pain", "migraine", "head hurting", "head ache",
-                      "temple pain", "forehead pain"],
-        "urgency": "medium",
-        "label": "Headache",
-        "causes": (
-            "Tension headache (tight muscles in neck/scalp from stress or screen time), "
-            "migraine (neurological, often one-sided with nausea), dehydration, "
-            "sinus congestion, eye strain, or high blood pressure"
-        ),
-        "mechanism": (
-            "Tension headaches: stress tightens muscles around your skull, compressing pain nerves. "
-            "Migraines: abnormal brain wave activity dilates blood vessels and inflames nearby nerves, "
-            "causing intense pulsing pain, light/sound sensitivity, and sometimes aura (visual disturbance)."
-        ),
-        "advice": (
-            "1. Drink 2 glasses of water immediately – dehydration is the #1 overlooked cause.\n"
-            "2. Take Paracetamol 500 mg (or Ibuprofen 400 mg with food).\n"
-            "3. Rest in a dark, quiet room with a cold damp cloth on your forehead.\n"
-            "4. Gently massage the temples and back of the neck in slow circles.\n"
-            "5. If headaches occur >3 times a week or are the worst you've ever had, see a doctor urgently."
-        ),
-        "home_remedies": (
-            "Peppermint oil dabbed on temples provides cooling relief. "
-            "Strong ginger tea with jaggery can ease migraine nausea. "
-            "A pinch of cinnamon paste on the forehead helps with sinus headache."
-        ),
-        "red_flags": "Sudden 'thunderclap' worst-ever headache, stiff neck with fever, confusion, vision loss, weakness on one side",
-        "timeline": "Tension headache: resolves in 30 min – 4 hours with rest and medication. Migraines: 4-72 hours."
-    },
-
-    "fever": {
-        "keywords": ["fever", "temperature", "high temp", "bukhar", "burning up",
-                      "chills", "sweating", "102", "103", "104"],
-        "urgency": "medium",
-        "label": "Fever",
-        "causes": (
-            "Viral infection (common cold, flu, COVID-19, dengue), bacterial infection "
-            "(throat, urinary, typhoid), malaria (if in endemic area), "
-            "or body's inflammatory response to an injury/infection"
-        ),
-        "mechanism": (
-            "Your immune system detects invading germs and releases chemicals called pyrogens. "
-            "These reset your brain's thermostat (hypothalamus) to a higher temperature. "
-            "The higher heat slows germ reproduction and boosts white blood cell activity – "
-            "that's why you feel hot but shiver (body generating heat to reach the new setpoint)."
-        ),
-        "advice": (
-            "1. Take Paracetamol 500 mg every 6 hours (do NOT exceed 4 doses/day).\n"
-            "2. Sponge forehead, armpits, and neck with lukewarm (not cold) water.\n"
-            "3. Drink ORS, coconut water, or lime water – aim for 8-10 glasses/day.\n"
-            "4. Wear light cotton clothes, use a thin sheet instead of heavy blankets.\n"
-            "5. Record temperature every 4 hours. If it crosses 103 °F or lasts >3 days, see a doctor for blood tests."
-        ),
-        "home_remedies": (
-            "Tulsi (holy basil) tea with black pepper and honey is a traditional fever reducer. "
-            "Rice starch water (kanji) keeps energy up when appetite is low. "
-            "A paste of sandalwood on the forehead provides a cooling effect."
-        ),
-        "red_flags": "Fever above 103 °F, rash appearing with fever, severe bodyache with low platelets suspicion (dengue), confusion, difficulty breathing",
-        "timeline": "Viral fevers: 3-5 days. If no improvement by day 3, get a blood test (CBC, Widal, Dengue NS1)."
-    },
-
-    "chest_pain": {
-        "keywords": ["chest pain", "chest pressure", "chest tight", "heart pain",
-                      "heart attack", "crushing pain"],
-        "urgency": "high",
-        "label": "Chest Pain – EMERGENCY",
-        "causes": (
-            "Heart attack (blocked coronary artery), angina (reduced blood flow), "
-            "pulmonary embolism (blood clot in lung), severe acidity/GERD, "
-            "or muscle strain in chest wall"
-        ),
-        "mechanism": (
-            "In a heart attack, a fatty plaque in a heart artery ruptures and a blood clot blocks "
-            "blood flow. The heart muscle downstream starts dying within minutes – "
-            "this causes crushing chest pain that may radiate to the left arm, jaw, or back."
-        ),
-        "advice": (
-            "1. CALL 108 (AMBULANCE) IMMEDIATELY.\n"
-            "2. Sit upright or in whatever position feels easiest to breathe.\n"
-            "3. Chew 1 Aspirin 325 mg (if not allergic) – it helps dissolve the clot.\n"
-            "4. Do NOT walk, drive, or exert yourself. Stay calm.\n"
-            "5. If the person becomes unconscious and stops breathing, start chest CPR (push hard and fast in the centre of the chest)."
-        ),
-        "home_remedies": (
-            "There are NO home remedies for heart-related chest pain – get to a hospital. "
-            "If the pain is clearly acid-related (burning after meals, relieved by antacid), "
-            "try a glass of cold milk or an antacid tablet."
-        ),
-        "red_flags": "ALL chest pain must be evaluated urgently. Sweating with chest pain, pain in left arm/jaw, breathlessness, fainting",
-        "timeline": "Heart attack: treatment within 90 minutes saves life. Do NOT wait."
-    },
-
-    "stomach": {
-        "keywords": ["stomach pain", "stomach ache", "abdomen", "belly pain",
-                      "nausea", "vomiting", "diarrhea", "loose motion",
-                      "food poisoning", "acidity", "gas", "bloating"],
-        "urgency": "medium",
-        "label": "Stomach / Digestive Issue",
-        "causes": (
-            "Gastroenteritis (stomach infection from contaminated food/water), "
-            "acidity/GERD (excess stomach acid), food poisoning, "
-            "irritable bowel syndrome (IBS), or intestinal worms"
-        ),
-        "mechanism": (
-            "Contaminated food or water introduces bacteria/viruses that irritate the gut lining. "
-            "Your body responds with vomiting and diarrhea to expel the toxins. "
-            "Acidity occurs when the stomach produces excess hydrochloric acid that burns the lining."
-        ),
-        "advice": (
-            "1. Prepare ORS: 1 litre boiled-cooled water + 6 teaspoons sugar + ½ teaspoon salt. Sip every 5 min.\n"
-            "2. Do NOT eat solid food for 4-6 hours if vomiting. Then start with plain rice, moong dal water, or curd-rice.\n"
-            "3. For acidity: chew 1 antacid tablet (Gelusil/Digene) or take Pantoprazole 40 mg before breakfast.\n"
-            "4. Avoid spicy, oily, and dairy foods for 48 hours.\n"
-            "5. If you see blood in vomit or stool, have severe cramp pain, or can't keep water down for 12 hours – go to hospital."
-        ),
-        "home_remedies": (
-            "Jeera (cumin) water: boil 1 tsp cumin in water for 5 min – soothes stomach. "
-            "Ajwain (carom seeds) with black salt relieves gas and bloating. "
-            "Plain curd with rice is the easiest food to digest during recovery."
-        ),
-        "red_flags": "Blood in vomit or stool, severe dehydration (dry mouth, no urine >8 hrs), high fever with stomach pain, rigid/hard abdomen",
-        "timeline": "Food poisoning: 12-48 hours. Gastroenteritis: 2-3 days. Acidity: improves in 1-2 days with medication."
-    },
-
-    "respiratory": {
-        "keywords": ["cough", "cold", "flu", "runny nose", "congestion", "sore throat",
-                      "sneezing", "blocked nose", "phlegm", "mucus"],
-        "urgency": "low",
-        "label": "Cold / Upper Respiratory Infection",
-        "causes": (
-            "Common cold (rhinovirus – 200+ strains), seasonal flu (influenza), "
-            "COVID-19, allergic rhinitis (dust/pollen), or sinus infection"
-        ),
-        "mechanism": (
-            "Viruses attach to the cells lining your nose and throat, triggering inflammation. "
-            "Your body produces mucus to trap the virus and sends more blood to the area "
-            "(causing the stuffy feeling). Sneezing and coughing are reflexes to expel the invaders."
-        ),
-        "advice": (
-            "1. Steam inhalation 3 times a day: boil water, add 2 drops eucalyptus oil, inhale with towel over head for 10 min.\n"
-            "2. Gargle with warm salt water morning and night for sore throat.\n"
-            "3. Drink warm haldi-doodh (turmeric milk) or ginger-honey tea before bed.\n"
-            "4. Take Cetirizine 10 mg at night if there's a lot of sneezing/runny nose.\n"
-            "5. Rest well, wash hands often, and wear a mask around others."
-        ),
-        "home_remedies": (
-            "Kadha: boil tulsi leaves, ginger, black pepper, and cloves in water – sip warm. "
-            "Honey (1 tsp) before bed reduces nighttime cough. "
-            "Nasal saline drops (salt water) clear congestion without medicine."
-        ),
-        "red_flags": "Difficulty breathing or chest tightness, high fever >3 days, blood in sputum, severe headache with stiff neck",
-        "timeline": "Common cold: 5-7 days. Flu: 7-10 days. Cough may linger 2-3 weeks. See a doctor if not improving by day 5."
-    },
-
-    "skin": {
-        "keywords": ["rash", "itching", "skin", "allergy", "hives", "swelling",
-                      "red spots", "bumps", "pimple", "boil", "eczema", "fungal"],
-        "urgency": "low",
-        "label": "Skin / Allergy Issue",
-        "causes": (
-            "Allergic reaction (food, detergent, pollen), fungal infection (ringworm, athlete's foot), "
-            "eczema (dry inflamed skin), insect bites, or heat rash (prickly heat)"
-        ),
-        "mechanism": (
-            "When skin contacts an allergen, immune cells release histamine. "
-            "Histamine widens blood vessels (redness), leaks fluid into tissue (swelling), "
-            "and stimulates itch nerves. Fungal infections thrive in warm moist skin folds."
-        ),
-        "advice": (
-            "1. Take Cetirizine 10 mg at night to reduce itching and swelling.\n"
-            "2. Apply calamine lotion on itchy areas for soothing relief.\n"
-            "3. For fungal patches: apply Clotrimazole cream twice daily for 2 weeks, keep area dry.\n"
-            "4. Wear loose cotton clothes, avoid scratching (trim nails short).\n"
-            "5. If rash spreads rapidly, face/throat swells, or breathing becomes difficult – this is anaphylaxis, rush to hospital."
-        ),
-        "home_remedies": (
-            "Neem paste applied to ringworm patches has antifungal properties. "
-            "Coconut oil soothes dry eczema skin. "
-            "A cold oatmeal bath relieves widespread itching."
-        ),
-        "red_flags": "Rapid swelling of face/lips/tongue, difficulty breathing (anaphylaxis), fever with widespread rash, blisters/peeling skin",
-        "timeline": "Allergic rash: clears in 2-5 days with antihistamines. Fungal infection: needs 2-4 weeks of consistent cream application."
-    },
-
-    "injury": {
-        "keywords": ["cut", "wound", "bleeding", "fracture", "broken", "sprain",
-                      "fall", "accident", "hit", "injury", "bruise", "burn"],
-        "urgency": "medium",
-        "label": "Injury / Wound",
-        "causes": (
-            "Physical trauma from a fall, accident, or impact. "
-            "Could result in soft tissue injury (bruise/sprain), laceration (cut), "
-            "fracture (broken bone), or burn (thermal/chemical)"
-        ),
-        "mechanism": (
-            "When tissue is damaged, blood vessels break causing bleeding and bruising. "
-            "Your body sends inflammatory cells and fluid to the area (swelling) to begin repair. "
-            "A fracture means the bone has cracked or broken – you'll feel intense pain with movement."
-        ),
-        "advice": (
-            "1. For bleeding: press a clean cloth firmly on the wound for 10 minutes without lifting.\n"
-            "2. For sprains: RICE method – Rest, Ice (15 min on/off), Compress with bandage, Elevate the limb.\n"
-            "3. For burns: run cool (not ice-cold) water over the burn for 10 minutes, cover loosely.\n"
-            "4. Take Paracetamol 500 mg for pain. Do NOT apply ointments/toothpaste on burns.\n"
-            "5. If bone looks deformed, you can't move the limb, or bleeding doesn't stop – go to hospital immediately."
-        ),
-        "home_remedies": (
-            "Turmeric-coconut oil paste on minor cuts is antiseptic. "
-            "Aloe vera gel on minor burns cools and helps healing. "
-            "Cold compress (ice in cloth) for the first 48 hours of a sprain."
-        ),
-        "red_flags": "Bone visibly deformed or poking through skin, bleeding won't stop after 15 min of pressure, head injury with confusion/vomiting, deep wound needing stitches",
-        "timeline": "Bruises: 1-2 weeks. Sprains: 2-6 weeks. Fractures: 4-8 weeks in cast. Cuts: 5-10 days to heal."
-    },
-
-    "eye": {
-        "keywords": ["eye", "vision", "blurry", "red eye", "eye pain", "watery eyes",
-                      "eye swelling", "conjunctivitis", "itchy eye"],
-        "urgency": "medium",
-        "label": "Eye Problem",
-        "causes": (
-            "Conjunctivitis (viral/bacterial eye infection), allergic eye irritation, "
-            "eye strain from screens, foreign body in eye, or stye (eyelid infection)"
-        ),
-        "mechanism": (
-            "The conjunctiva (thin membrane covering the eye) becomes inflamed when infected or irritated. "
-            "Blood vessels dilate (redness), the eye produces excess tears or discharge to flush out the irritant."
-        ),
-        "advice": (
-            "1. Wash hands before touching eyes. Use clean cotton soaked in cooled boiled water to gently clean discharge.\n"
-            "2. For infection: use antibiotic eye drops (Ciprofloxacin drops) 4 times a day for 5 days.\n"
-            "3. For allergy: cold compress on closed eyes + antiallergy drops (Olopatadine).\n"
-            "4. Do NOT rub eyes, share towels, or wear contact lenses until healed.\n"
-            "5. If vision becomes blurry, eye is very painful, or light causes severe pain – see an eye doctor ASAP."
-        ),
-        "home_remedies": (
-            "Rose water drops soothe mild eye irritation. "
-            "Cold cucumber slices on closed eyes reduce puffiness and redness. "
-            "Washing eyes with clean, cooled boiled water 3 times a day helps with discharge."
-        ),
-        "red_flags": "Sudden vision loss, severe eye pain, something stuck in eye you can't remove, eye injury with blood inside eye",
-        "timeline": "Viral conjunctivitis: 5-7 days. Bacterial: improves in 2-3 days with drops. Eye strain: resolves with rest."
-    },
-
-    "urinary": {
-        "keywords": ["urine", "burning urine", "frequent urination", "uti", "urinary",
-                      "pee", "kidney", "back pain lower"],
-        "urgency": "medium",
-        "label": "Urinary Issue",
-        "causes": (
-            "Urinary tract infection (UTI – bacteria from outside enter the urethra), "
-            "kidney stones (mineral deposits blocking urine flow), "
-            "dehydration causing concentrated dark urine"
-        ),
-        "mechanism": (
-            "Bacteria (usually E. coli from the gut) travel up the urethra and infect the bladder lining. "
-            "This causes inflammation, making the bladder feel full even when it's not – "
-            "hence the burning sensation and urge to urinate frequently."
-        ),
-        "advice": (
-            "1. Drink 3-4 litres of water today to flush bacteria out.\n"
-            "2. Do NOT hold urine – empty your bladder fully every time.\n"
-            "3. Common UTI treatment: Nitrofurantoin 100 mg twice daily for 5 days (needs doctor prescription).\n"
-            "4. Cranberry juice (unsweetened) may help prevent bacteria from sticking to bladder walls.\n"
-            "5. If you have back pain, fever, blood in urine, or vomiting – this may be a kidney infection, see a doctor today."
-        ),
-        "home_remedies": (
-            "Barley water (jau ka pani): boil barley in water, strain, sip throughout the day – soothes the urinary tract. "
-            "Coriander seed water has cooling properties. "
-            "Coconut water is a natural diuretic that helps flush the system."
-        ),
-        "red_flags": "Fever with back/flank pain (kidney infection), blood in urine, severe pain that comes in waves (kidney stone), unable to urinate at all",
-        "timeline": "UTI with antibiotic: symptoms improve in 24-48 hours. Kidney stones: may pass in 1-3 days (drink lots of water). See doctor if pain is severe."
-    },
-
-    "anxiety": {
-        "keywords": ["anxiety", "panic", "anxious", "panic attack", "nervous",
-                      "worried", "stress", "can't sleep", "insomnia", "palpitation"],
-        "urgency": "low",
-        "label": "Anxiety / Stress",
-        "causes": (
-            "Generalized anxiety disorder, panic disorder, acute stress reaction, "
-            "sleep deprivation, excessive caffeine, or an underlying physical condition "
-            "(thyroid, anaemia) mimicking anxiety"
-        ),
-        "mechanism": (
-            "Your brain's amygdala (threat detector) fires a false alarm, flooding your body with "
-            "adrenaline and cortisol. Heart races, muscles tense, breathing speeds up, stomach churns – "
-            "this is the fight-or-flight response activating when there's no real danger."
-        ),
-        "advice": (
-            "1. Box breathing: breathe IN 4 sec → HOLD 4 sec → OUT 4 sec → HOLD 4 sec. Repeat 5 times.\n"
-            "2. Grounding exercise: name 5 things you see, 4 you touch, 3 you hear, 2 you smell, 1 you taste.\n"
-            "3. Walk outside for 15-20 minutes – movement burns off stress hormones.\n"
-            "4. Limit tea/coffee to 2 cups before noon. No screens 1 hour before bed.\n"
-            "5. If panic attacks happen frequently or you have thoughts of self-harm, speak to a counsellor (iCall helpline: 9152987821)."
-        ),
-        "home_remedies": (
-            "Warm chamomile or ashwagandha tea before bed promotes calm. "
-            "Lavender oil on pillow helps with sleep. "
-            "15 minutes of slow pranayama (deep yogic breathing) daily reduces baseline anxiety."
-        ),
-        "red_flags": "Thoughts of self-harm or suicide (call KIRAN helpline: 1800-599-0019), chest pain (rule out heart problem), fainting spells",
-        "timeline": "Panic attacks peak in 10 minutes and pass in 20-30 minutes. Chronic anxiety: improves over 4-6 weeks with regular breathing exercises, lifestyle changes, or therapy."
-    },
-
-    "back_pain": {
-        "keywords": ["back pain", "lower back", "spine", "backache", "slipped disc",
-                      "sciatica", "back hurting"],
-        "urgency": "low",
-        "label": "Back Pain",
-        "causes": (
-            "Muscle strain (heavy lifting, poor posture), lumbar spondylosis (wear and tear of spine), "
-            "slipped disc (disc pressing on nerve), or kidney problem (if pain is on one side with fever)"
-        ),
-        "mechanism": (
-            "Most back pain is muscular: overuse or sudden twisting tears small muscle fibres, "
-            "causing inflammation and spasm. A slipped disc means the soft cushion between vertebrae "
-            "bulges out and presses on nearby nerves, causing pain that may shoot down the leg (sciatica)."
-        ),
-        "advice": (
-            "1. Stay gently active – complete bed rest makes it worse. Walk slowly for 10 min every 2 hours.\n"
-            "2. Apply a hot water bag to the sore area for 15-20 minutes, 3 times a day.\n"
-            "3. Take Ibuprofen 400 mg with food every 8 hours for pain and inflammation.\n"
-            "4. Sleep on your side with a pillow between the knees to reduce spine strain.\n"
-            "5. If pain shoots down the leg, you feel numbness/tingling, or have trouble controlling urine – see a doctor urgently."
-        ),
-        "home_remedies": (
-            "Warm mustard oil massage along the spine improves blood flow. "
-            "A pinch of turmeric in warm milk before bed reduces inflammation. "
-            "Cat-cow stretch (on hands and knees, arch and round the back slowly) done 10 times twice daily eases stiffness."
-        ),
-        "red_flags": "Pain shooting down the leg with numbness (sciatica), loss of bladder/bowel control, fever with back pain (spinal infection), pain after serious fall/accident",
-        "timeline": "Muscle strain: improves in 3-7 days. Disc-related: 4-6 weeks. If no improvement in 2 weeks, get an X-ray/MRI."
-    },
-}
+# Source: knowledge/conditions.json, compiled offline into knowledge/conditions.kb
+# (python knowledge_base.py compile). Workers mmap the compiled file and pick up
+# a newly compiled version within KB_RELOAD_INTERVAL seconds, without a restart.
+KB = knowledge_base.KnowledgeBase(
+    path=os.getenv("KB_PATH", knowledge_base.DEFAULT_PATH),
+    source=os.getenv("KB_SOURCE", knowledge_base.DEFAULT_SOURCE),
+    check_interval=float(os.getenv("KB_RELOAD_INTERVAL", "5")),
+)
 
 
 def _score_conditions(symptoms_lower: str) -> list:
@@ -583,122 +741,137 @@ def _score_conditions(symptoms_lower: str) -> list:
     
     Generic words like "pain" are ignored in word-level matching to avoid
     false cross-matches (e.g. "head paining" triggering dental via "jaw pain").
+
+    Both tables are precompiled into the knowledge-base file (see rule_index.py):
+    every keyword phrase lives in one Aho-Corasick automaton, so a single pass
+    over the input finds all phrase hits regardless of how many keywords exist.
+
+    With RULE_SCORER=tfidf the TF-IDF scorer ranks instead (see tfidf_index.py).
     """
-    # extract individual words from user input
-    input_words = set(re.findall(r"[a-z]+", symptoms_lower))
-
-    # synonyms / stemming map: common variations → root keyword
-    WORD_ALIASES = {
-        "paining": "pain", "painful": "pain", "pains": "pain", "hurts": "pain",
-        "hurting": "pain", "aching": "pain", "ache": "pain", "aches": "pain",
-        "sore": "pain", "burning": "burn", "itchy": "itching", "itches": "itching",
-        "dizzy": "dizziness", "vomit": "vomiting", "puking": "vomiting",
-        "breathless": "breathing", "coughing": "cough", "sneezy": "sneezing",
-        "shaky": "shaking", "shakes": "shaking", "trembling": "tremor",
-        "feverish": "fever", "temperature": "fever",
-        "tummy": "stomach", "belly": "stomach", "abdomen": "stomach",
-        "peeing": "urine", "urinating": "urine",
-        "sleepless": "insomnia", "sleeplessness": "insomnia",
-        "anxious": "anxiety", "panicking": "panic", "stressed": "stress",
-        "blurred": "blurry", "swollen": "swelling",
-    }
+    return _scorer(KB.current()).score(symptoms_lower)
 
-    # Generic symptom-descriptor words that appear across many conditions.
-    # These should ONLY contribute to exact phrase matches, never word-level
-    # matching, to prevent "jaw pain" matching just because user said "pain".
-    GENERIC_WORDS = {
-        "pain", "ache", "severe", "mild", "moderate", "chronic", "acute",
-        "high", "low", "attack", "problem", "issue", "infection",
-    }
 
-    # expand input words with aliases
-    expanded_words = set(input_words)
-    for word in input_words:
-        if word in WORD_ALIASES:
-            expanded_words.add(WORD_ALIASES[word])
-
-    scored = []
-    for name, c in CONDITIONS.items():
-        score = 0
-
-        # --- Strategy 1: exact phrase match (higher weight) ---
-        for kw in c["keywords"]:
-            if kw in symptoms_lower:
-                score += len(kw.split()) * 3   # "wisdom teeth" = 6 pts
-
-        # --- Strategy 2: individual word match ---
-        # split each keyword into its component words and check overlap,
-        # but EXCLUDE generic words so "pain" alone can't cross-match
-        kw_word_set = set()
-        for kw in c["keywords"]:
-            for w in kw.split():
-                if w not in GENERIC_WORDS:
-                    kw_word_set.add(w)
-        # also add the condition label words (lowercase), minus generic ones
-        for w in c["label"].lower().split():
-            if w not in GENERIC_WORDS:
-                kw_word_set.add(w)
-
-        overlap = expanded_words & kw_word_set
-        if overlap:
-            score += len(overlap)   # each matched word = 1 pt
-
-        if score > 0:
-            scored.append((score, name, c))
-
-    scored.sort(reverse=True, key=lambda x: x[0])
-    return scored
-
-
-def _analyze_with_rules(symptoms: str) -> dict:
+def _scorer(kb):
+    """The RULE_SCORER index of *kb*: its RuleIndex, or the TF-IDF index."""
+    return _tfidf_index(kb) if RULE_SCORER == "tfidf" else kb.index
+
+
+@lru_cache(maxsize=2)       # the live knowledge-base version and the one before it
+def _tfidf_index(kb) -> TfidfIndex:
+    """TF-IDF matrix over *kb*'s conditions, all languages, built once per version."""
+    locales = [locale.conditions for locale in kb.locales.values() if locale.lang != "en"]
+    return TfidfIndex(kb.conditions, locales, min_score=TFIDF_MIN_SCORE,
+                      spelling=kb.index.spelling)
+
+
+def _analyze_with_rules(symptoms: str, lang: str = "en") -> dict:
     """Match symptoms against the condition DB, combine top matches, and
-    compose a unified response so multi-symptom inputs get multi-condition answers."""
-
-    symptoms_lower = symptoms.lower()
-    matches = _score_conditions(symptoms_lower)
-
-    if not matches:
-        return {
-            "urgency": "medium",
-            "urgencyText": "Unrecognised Symptoms – See a Doctor",
-            "possibleCauses": (
-                "Your symptoms don't match common patterns in our database. "
-                "This does NOT mean they aren't important – it means a doctor needs to evaluate you in person."
-            ),
-            "whyHappening": (
-                "The human body is complex and some symptom combinations need clinical examination, "
-                "blood tests, or imaging to diagnose properly."
-            ),
-            "advice": (
-                "1. Visit your nearest Primary Health Centre (PHC) within 24 hours.\n"
-                "2. Write down all your symptoms, when they started, and what makes them better or worse.\n"
-                "3. In the meantime: rest, stay hydrated, and avoid self-medication.\n"
-                "4. If you feel seriously unwell at any point, call 108 for an ambulance."
-            ),
-            "homeRemedies": "Stay hydrated with warm water, lemon, and a pinch of salt. Light home-cooked food. Adequate rest.",
-            "redFlags": "Severe or worsening pain, high fever, difficulty breathing, confusion, bleeding",
-            "timeline": "See a doctor within 24-48 hours for proper diagnosis.",
-        }
-
-    # take top 2 conditions max (to handle combined symptoms like "tooth pain + shaking")
-    top = matches[:2]
+    compose a unified response so multi-symptom inputs get multi-condition answers.
+
+    Hindi/Marathi keywords are part of the index; *lang* picks the language
+    of the response texts (English for languages the base doesn't cover).
+    """
+    return dict(_rules_response(symptoms, lang)[0])   # callers may add fields
+
+
+def _rules_response(symptoms: str, lang: str = "en") -> tuple:
+    """Precomposed ``(result, json_body)`` rule answer (see rule_responses.py)."""
+    kb = KB.current()
+    with STAGE_SECONDS.time("rule_scoring"):
+        matches = _scorer(kb).score(symptoms.lower())
+    return _rule_answer(kb, matches, lang)
+
+
+def _rule_answer(kb, matches: list, lang: str) -> tuple:
+    """Precomposed answer for scored *matches* (a lookup unless the table
+    is in LRU mode and misses)."""
+    with STAGE_SECONDS.time("compose"):
+        return RULE_RESPONSES.get(kb, matches, lang)
+
+
+def _route(symptoms: str, lang: str) -> tuple:
+    """Score *symptoms* once and pick the model tier: ``(tier, kb, matches)``."""
+    kb = KB.current()
+    with STAGE_SECONDS.time("rule_scoring"):
+        matches = _scorer(kb).score(symptoms.lower())
+    return _pick_tier(matches, symptoms, lang), kb, matches
+
+
+def _pick_tier(matches: list, symptoms: str, lang: str) -> Tier:
+    """ROUTER's tier for scored *matches*; always the rules without an API key."""
+    tier = ROUTER.route(matches, symptoms, lang) if OPENROUTER_API_KEY else ROUTER.rules
+    MODEL_TIER.inc(tier.name)
+    return tier
+
+
+def _emergency_answer(symptoms: str, lang: str):
+    """Precomposed ``(result, json_body)`` emergency answer when the input
+    carries a red flag (see rule_index.EmergencyClassifier), else None.
+    Checked before scoring and before any network call."""
+    kb = KB.current()
+    with STAGE_SECONDS.time("emergency_check"):
+        trigger = kb.emergency.classify(symptoms.lower(), kb.index.spelling)
+    if trigger is None:
+        return None
+    return _emergency_responses(kb)[(kb.locale(lang).lang, trigger)]
+
+
+@lru_cache(maxsize=2)       # the live knowledge-base version and the one before it
+def _emergency_responses(kb) -> dict:
+    """``(lang, trigger)`` → ``(result, json_body)`` for every emergency answer of *kb*."""
+    table = {}
+    for lang, locale in kb.locales.items():
+        for trigger in kb.emergency.answers:
+            result = _normalise(_compose_emergency_response(trigger, locale))
+            table[(lang, trigger)] = (result, dumps(result))
+    return table
+
+
+def _compose_emergency_response(trigger: str, locale) -> dict:
+    """The language's emergency answer (call 108, CPR steps). A hit on a
+    high-urgency condition adds that condition's causes and specific advice."""
+    result = dict(locale.emergency)
+    if trigger:
+        c = locale.conditions[trigger]
+        result.update(
+            possibleCauses=c["causes"],
+            whyHappening=c["mechanism"],
+            advice=f"{result['advice']}\n\n{c['advice_block']}",
+            homeRemedies=c["home_remedies"],
+            redFlags=c["red_flags"],
+            timeline=c["timeline"],
+        )
+    result["emergency"] = True
+    return result
+
+
+def _compose_rules_response(names: tuple, locale) -> dict:
+    """Build the response dict for the top-ranked condition *names* (at most
+    two, to handle combined symptoms like "tooth pain + shaking") in the
+    language of *locale* (a knowledge_base.Locale)."""
+
+    if not names:
+        return dict(locale.unrecognised)
+
+    top = [(0, name, locale.conditions[name]) for name in names]
 
     # highest urgency wins
     urgency_rank = {"high": 3, "medium": 2, "low": 1}
     best_urgency = max(top, key=lambda x: urgency_rank.get(x[2]["urgency"], 0))
     urgency = best_urgency[2]["urgency"]
 
+    # per-condition fragments are pre-joined in the compiled knowledge base
     labels    = " + ".join(m[2]["label"] for m in top)
-    causes    = "\n\n".join(f"▸ {m[2]['label']}: {m[2]['causes']}" for m in top)
-    mechanism = "\n\n".join(f"▸ {m[2]['label']}: {m[2]['mechanism']}" for m in top)
-    advice    = "\n\n".join(f"── {m[2]['label']} ──\n{m[2]['advice']}" for m in top)
-    remedies  = "\n\n".join(f"▸ {m[2]['label']}: {m[2]['home_remedies']}" for m in top)
+    causes    = "\n\n".join(m[2]["causes_item"] for m in top)
+    mechanism = "\n\n".join(m[2]["mechanism_item"] for m in top)
+    advice    = "\n\n".join(m[2]["advice_block"] for m in top)
+    remedies  = "\n\n".join(m[2]["remedies_item"] for m in top)
     flags     = " | ".join(m[2]["red_flags"] for m in top)
-    timeline  = "\n".join(f"▸ {m[2]['label']}: {m[2]['timeline']}" for m in top)
+    timeline  = "\n".join(m[2]["timeline_item"] for m in top)
 
     return {
         "urgency": urgency,
-        "urgencyText": f"{labels} – {'Seek Immediate Care' if urgency == 'high' else 'Consult a Doctor' if urgency == 'medium' else 'Self-Care & Monitor'}",
+        "urgencyText": f"{labels} – {locale.actions[urgency]}",
         "possibleCauses": causes,
         "whyHappening": mechanism,
         "advice": advice,
@@ -708,6 +881,47 @@ def _analyze_with_rules(symptoms: str) -> dict:
     }
 
 
+# Every rule answer is one of 1 + n + n·(n-1) (language, top-2) combinations:
+# all of them are composed – with color/disclaimer – and serialised once per
+# knowledge-base version. Above RULE_RESPONSES_EAGER_LIMIT answers they are
+# composed on demand into an LRU of RULE_RESPONSES_CACHE_SIZE instead.
+RULE_RESPONSES = RuleResponses(
+    lambda names, locale: _normalise(_compose_rules_response(names, locale)),
+    eager_limit=int(os.getenv("RULE_RESPONSES_EAGER_LIMIT", "5000")),
+    maxsize=int(os.getenv("RULE_RESPONSES_CACHE_SIZE", "4096")),
+)
+
+
+def _warm_kb():
+    """``KB.current()``, with everything built per knowledge-base version
+    (precomposed answers, emergency answers, scorer) ready for it."""
+    kb = KB.current()
+    RULE_RESPONSES.warm(kb)
+    _emergency_responses(kb)
+    _scorer(kb)
+    return kb
+
+
+_warm_kb()
+
+
+def init_worker():
+    """Per-process start-up that must not happen before a fork – threads and
+    sockets don't survive ``fork()``. Runs at import, or, when gunicorn
+    preloads the app (gunicorn.conf.py), in each worker's post_fork hook."""
+    AI_CACHE.after_fork()
+    # Prometheus /metrics: per worker, or summed over all workers that share METRICS_DIR
+    if os.getenv("METRICS_DIR"):
+        metrics.share(os.getenv("METRICS_DIR"),
+                      interval=float(os.getenv("METRICS_SHARE_INTERVAL", "5")))
+    if OPENROUTER_API_KEY and OPENROUTER_WARM_CONNECTIONS:
+        OPENROUTER.warm(OPENROUTER_WARM_CONNECTIONS)
+
+
+if os.getenv("GUNICORN_PRELOAD") != "1":
+    init_worker()
+
+
 # ── Run ──────────────────────────────────────────────────────────
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 5000))
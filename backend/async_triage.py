@@ -0,0 +1,252 @@
+"""
+Async symptom triage: ``POST /api/analyze-symptoms`` on the FastAPI stack.
+
+Same request and response contract as the Flask route in app.py, but an
+OpenRouter call in flight is a suspended coroutine on one event loop rather
+than a gunicorn thread blocked on a socket, so a single uvicorn process can
+hold thousands of slow AI triages at once. Mounted by voice_agent.py (port
+8002)::
+
+    app.include_router(async_triage.router)
+
+Everything except the HTTP client is shared with app.py: the rule engine and
+precomposed answers, the prompt and report parser, the AI cache, the circuit
+breaker and adaptive timeout, and the deadline-mode refinements. The blocking
+parts of those – the AI cache's SQLite tier and the knowledge-base file check
+and reload – run in the default thread pool (``asyncio.to_thread``), never on
+the event loop.
+
+The client is aiohttp (already installed with the voice agent's LangChain
+stack). httpx was tried first, but its connection pool rescans every
+connection whenever a request starts or ends, which costs more than the
+network wait once a few hundred calls are in flight.
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+import aiohttp
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, Response
+
+import ai_cache
+import app as triage
+import metrics
+from circuit_breaker import CircuitOpenError
+from metrics import FALLBACKS, STAGE_SECONDS, TRIAGE_PATH
+from model_router import Tier
+
+logger = logging.getLogger(__name__)
+
+# one connection per in-flight call (HTTP/1.1), so the pool is sized for the
+# concurrency this path is meant to carry rather than OPENROUTER_POOL_SIZE
+ASYNC_OPENROUTER_MAX_CONNECTIONS = int(os.getenv("ASYNC_OPENROUTER_MAX_CONNECTIONS", "2048"))
+
+AI_INFLIGHT = metrics.Gauge("gramhealth_async_ai_inflight",
+                            "OpenRouter calls in flight on the async triage path")
+
+router = APIRouter()
+
+_session = None
+_flights = {}       # cache key → Task; concurrent identical requests share it
+
+
+def session() -> aiohttp.ClientSession:
+    """The process-wide keep-alive session (created on first use, inside the loop)."""
+    global _session
+    if _session is None:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=ASYNC_OPENROUTER_MAX_CONNECTIONS))
+    return _session
+
+
+async def cache_get(key: str):
+    """``AI_CACHE.get`` without blocking the loop on the SQLite tier."""
+    if triage.AI_CACHE.db_path:
+        return await asyncio.to_thread(triage.AI_CACHE.get, key)
+    return triage.AI_CACHE.get(key)
+
+
+async def cache_set(key: str, value: dict):
+    if triage.AI_CACHE.db_path:
+        await asyncio.to_thread(triage.AI_CACHE.set, key, value)
+    else:
+        triage.AI_CACHE.set(key, value)
+
+
+async def refresh_kb():
+    """Run the knowledge-base file check when it is due, in a thread: a new
+    version is loaded and warmed there (app._warm_kb), so the rule calls
+    below always find ``KB.current()`` on its fast path."""
+    if triage.KB.check_due():
+        await asyncio.to_thread(triage._warm_kb)
+
+
+async def aclose():
+    """Close the pooled connections (call from the app's shutdown)."""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+@router.post("/api/analyze-symptoms")
+async def analyze_symptoms(request: Request):
+    try:
+        with STAGE_SECONDS.time("parse"):
+            data = await request.json()
+            symptoms = (data.get("symptoms") or "").strip()
+            lang = data.get("language", "en")
+            budget = triage._latency_budget(data)
+
+        if len(symptoms) < 5:
+            return JSONResponse({"error": "Please describe your symptoms in more detail"}, 400)
+
+        # rule checks are tens of µs – cheaper inline than a thread hop, once
+        # the knowledge base is current
+        await refresh_kb()
+        emergency = triage._emergency_answer(symptoms, lang)
+        if emergency is not None:
+            TRIAGE_PATH.inc("analyze_async", "emergency")
+            if triage.EMERGENCY_AI_ENRICH and triage.OPENROUTER_API_KEY:
+                key = triage._emergency_key(symptoms, lang)
+                task = asyncio.ensure_future(_emergency_ai_report(symptoms, lang, key))
+                return JSONResponse(dict(emergency[0],
+                                         refinementToken=triage.REFINEMENTS.add(task, key)))
+            return Response(emergency[1], media_type="application/json")
+
+        tier, kb, matches = triage._route(symptoms, lang)
+        if tier.model is None:
+            TRIAGE_PATH.inc("analyze_async", "rules")
+            body = triage._rule_answer(kb, matches, lang)[1]
+            return Response(body, media_type="application/json")
+
+        TRIAGE_PATH.inc("analyze_async", "ai")
+        if budget:
+            result = await _analyze_hedged(symptoms, lang, budget, tier)
+        else:
+            result = await _analyze_with_ai(symptoms, lang, tier)
+        return JSONResponse(triage._normalise(result))
+
+    except Exception as exc:
+        logger.exception(f"[ERROR] {exc}")
+        return JSONResponse({"error": str(exc)}, 500)
+
+
+@router.get("/api/analyze-symptoms/refinement/{token}")
+async def analyze_symptoms_refinement(token: str):
+    """As app.py: 200 → refined result, 202 → still running, 404 → unknown."""
+    task = triage.REFINEMENTS.get(token)
+    if task is not None:
+        if not task.done():
+            return JSONResponse({"status": "pending"}, 202)
+        triage.REFINEMENTS.discard(token)
+        return JSONResponse(triage._normalise(task.result()))
+
+    cached = await cache_get(triage.REFINEMENTS.cache_key(token))
+    if cached is not None:
+        return JSONResponse(triage._normalise(dict(cached)))
+    if triage.REFINEMENTS.expired(token):
+        return JSONResponse({"error": "Unknown or expired refinement token"}, 404)
+    return JSONResponse({"status": "pending"}, 202)
+
+
+async def _analyze_hedged(symptoms: str, lang: str, budget: float, tier: Tier) -> dict:
+    """app._analyze_hedged on the event loop: the AI task keeps running after
+    a late answer and is picked up through the refinement route."""
+    task = asyncio.ensure_future(_analyze_with_ai(symptoms, lang, tier))
+    rules = triage._analyze_with_rules(symptoms, lang)
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), budget)
+    except asyncio.TimeoutError:
+        pass
+    FALLBACKS.inc("deadline")
+    key = ai_cache.make_key(symptoms, lang, tier.model)
+    rules["provisional"] = True
+    rules["refinementToken"] = triage.REFINEMENTS.add(task, key)
+    return rules
+
+
+async def _emergency_ai_report(symptoms: str, lang: str, key: str) -> dict:
+    """As app._emergency_ai_report: the AI report never lowers the urgency,
+    and is cached with the override under the emergency key."""
+    report, parsed = await _ai_report(symptoms, lang)
+    report.update(urgency="high", emergency=True)
+    if parsed:
+        await cache_set(key, report)
+    return report
+
+
+async def _analyze_with_ai(symptoms: str, lang: str = "en", tier: Tier = None) -> dict:
+    """Cached, coalesced OpenRouter report; the rules answer on any failure."""
+    return (await _ai_report(symptoms, lang, tier))[0]
+
+
+async def _ai_report(symptoms: str, lang: str = "en", tier: Tier = None) -> tuple:
+    """As app._ai_report: ``(result, parsed)``, *parsed* False for a fallback."""
+    tier = tier or triage.ROUTER.large
+    key = ai_cache.make_key(symptoms, lang, tier.model)
+    cached = await cache_get(key)
+    if cached is not None:
+        return cached, True
+
+    task = _flights.get(key)
+    if task is None:
+        task = _flights[key] = asyncio.ensure_future(_fetch(key, symptoms, lang, tier))
+        task.add_done_callback(lambda _: _flights.pop(key, None))
+    try:
+        # shielded: a disconnecting client must not cancel the others' call
+        result, parsed = await asyncio.shield(task)
+    except CircuitOpenError:
+        FALLBACKS.inc("breaker_open")
+    except Exception as exc:
+        logger.error(f"[AI Error] {exc}")
+        FALLBACKS.inc("ai_error")
+    else:
+        return dict(result), parsed   # shared between coalesced callers – copy before normalising
+    await refresh_kb()        # the call may have outlasted the last check
+    return triage._analyze_with_rules(symptoms, lang), False
+
+
+async def _fetch(key: str, symptoms: str, lang: str, tier: Tier) -> tuple:
+    result, parsed = await _call_openrouter(symptoms, lang, tier)
+    if parsed:   # never cache the raw-text fallback
+        await cache_set(key, result)
+    return result, parsed
+
+
+async def _call_openrouter(symptoms: str, lang: str, tier: Tier) -> tuple:
+    """app._call_openrouter over aiohttp: same breaker, timeouts and parser."""
+    if not triage.BREAKER.allow():
+        raise CircuitOpenError("OpenRouter circuit open – answering from rules")
+
+    req = triage._openrouter_request(symptoms, lang, tier=tier)
+    timeout = aiohttp.ClientTimeout(sock_connect=triage.OPENROUTER.connect_timeout,
+                                    sock_read=triage.OPENROUTER_TIMEOUT.current())
+    start = time.perf_counter()
+    AI_INFLIGHT.inc()
+    try:
+        async with session().post(triage.OPENROUTER_URL, headers=req["headers"],
+                                  json=req["json"], timeout=timeout) as resp:
+            status = resp.status
+            if status == 200:
+                body = await resp.json(content_type=None)
+            else:
+                detail = (await resp.text())[:300]
+    except Exception:
+        triage.BREAKER.record_failure()
+        raise
+    finally:
+        AI_INFLIGHT.dec()
+
+    triage._record_upstream_status(status)
+    if status != 200:
+        raise triage.OpenRouterError(f"[OpenRouter {status}] {detail}")
+
+    elapsed = time.perf_counter() - start
+    triage.OPENROUTER_TIMEOUT.observe(elapsed)
+    STAGE_SECONDS.observe(elapsed, "openrouter")
+    tier.account(elapsed, body.get("usage"))
+    return triage._parse_report(body["choices"][0]["message"]["content"])
@@ -0,0 +1,152 @@
+"""
+Sync vs. async triage under many slow AI calls in flight, fully offline.
+
+Points both serving paths at the OpenRouter stand-in with a high latency and
+sends the same burst of AI-bound requests (unique English complaints, AI
+cache off) to each:
+
+  sync    gunicorn app:app, --workers × --threads blocking threads
+  async   uvicorn voice_agent:app, one process, POST /api/analyze-symptoms
+          from async_triage.py
+
+and reports wall time, requests/s and latency percentiles. With W × T
+threads and an upstream latency L, the sync path finishes at most W·T/L
+requests per second whatever the concurrency; the async path stays near
+concurrency/L until its event loop runs out of CPU.
+
+    cd backend
+    python bench/bench_async.py                              # 1000 in flight, 1 s upstream
+    python bench/bench_async.py --concurrency 3000 --latency 2 --only async
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from corpus import generate                                    # noqa: E402
+from loadgen import BACKEND_DIR, free_port, percentile, wait_ready  # noqa: E402
+
+ENDPOINT = "/api/analyze-symptoms"
+
+
+async def burst(url: str, bodies: list, concurrency: int, timeout: float) -> dict:
+    """POST every body with at most *concurrency* in flight."""
+    latencies, statuses = [], Counter()
+    gate = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(connector=connector,
+                                     timeout=aiohttp.ClientTimeout(total=timeout)) as client:
+        async def one(body):
+            async with gate:
+                start = time.perf_counter()
+                try:
+                    async with client.post(url, data=body,
+                                           headers={"Content-Type": "application/json"}) as resp:
+                        await resp.read()
+                        status = resp.status
+                except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                    status = type(exc).__name__
+                latencies.append(time.perf_counter() - start)
+                statuses[status] += 1
+
+        begin = time.perf_counter()
+        await asyncio.gather(*(one(b) for b in bodies))
+        elapsed = time.perf_counter() - begin
+
+    lat = sorted(latencies)
+    return {
+        "requests": len(lat),
+        "seconds": round(elapsed, 2),
+        "rps": round(len(lat) / elapsed, 1),
+        "p50_ms": round(percentile(lat, 0.50) * 1e3, 1),
+        "p95_ms": round(percentile(lat, 0.95) * 1e3, 1),
+        "p99_ms": round(percentile(lat, 0.99) * 1e3, 1),
+        "max_ms": round(lat[-1] * 1e3, 1),
+        "statuses": {str(k): v for k, v in sorted(statuses.items(), key=str)},
+    }
+
+
+def serve(kind: str, env: dict, args) -> tuple:
+    port = free_port()
+    if kind == "sync":
+        cmd = [sys.executable, "-m", "gunicorn", "-b", f"127.0.0.1:{port}", "-w", str(args.workers),
+               "--threads", str(args.threads), "--log-level", "warning", "app:app"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "voice_agent:app", "--host", "127.0.0.1",
+               "--port", str(port), "--log-level", "warning", "--backlog", "4096"]
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+    wait_ready("127.0.0.1", port, "/api/health", proc, timeout=60)
+    return proc, f"http://127.0.0.1:{port}{ENDPOINT}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=1000, help="requests in flight")
+    parser.add_argument("--requests", type=int, help="burst size (default: --concurrency)")
+    parser.add_argument("--latency", type=float, default=1.0, help="fake OpenRouter seconds")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers (sync)")
+    parser.add_argument("--threads", type=int, default=32, help="gunicorn threads per worker (sync)")
+    parser.add_argument("--only", choices=("sync", "async"))
+    parser.add_argument("--timeout", type=float, default=300.0, help="client timeout, seconds")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    n = args.requests or args.concurrency
+    samples = generate(n, mix={"en": 1.0})
+    # unique complaints: nothing may be answered from the cache or coalesced
+    bodies = [json.dumps({"symptoms": f"{s['symptoms']} (case {i})", "language": "en"})
+              .encode("utf-8") for i, s in enumerate(samples)]
+
+    fake_port = free_port()
+    fake = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(__file__), "fake_openrouter.py"),
+         "--port", str(fake_port), "--latency", str(args.latency), "--jitter", str(args.jitter)],
+        stdout=subprocess.DEVNULL)
+    wait_ready("127.0.0.1", fake_port, "/stats", fake)
+    env = dict(os.environ, KB_RELOAD_INTERVAL="3600", AI_CACHE_SIZE="0",
+               OPENROUTER_API_KEY="bench-key",
+               OPENROUTER_URL=f"http://127.0.0.1:{fake_port}/api/v1/chat/completions")
+    env.pop("AI_CACHE_DB", None)
+
+    report = {"concurrency": args.concurrency, "latency": args.latency}
+    try:
+        for kind in ("sync", "async"):
+            if args.only and kind != args.only:
+                continue
+            proc, url = serve(kind, env, args)
+            try:
+                asyncio.run(burst(url, bodies[:10], 10, args.timeout))      # warm up
+                report[kind] = asyncio.run(burst(url, bodies, args.concurrency, args.timeout))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+    finally:
+        fake.terminate()
+        fake.wait(timeout=30)
+
+    print(f"{n} AI triages, {args.concurrency} in flight, upstream {args.latency}s ± {args.jitter}s")
+    print(f"{'path':<6} {'seconds':>8} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'max ms':>9}  statuses")
+    for kind in ("sync", "async"):
+        r = report.get(kind)
+        if r:
+            print(f"{kind:<6} {r['seconds']:>8} {r['rps']:>8} {r['p50_ms']:>9} {r['p95_ms']:>9} "
+                  f"{r['p99_ms']:>9} {r['max_ms']:>9}  {r['statuses']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Typo tolerance: match quality and latency of the rule scorer with and
+without spelling correction, on the labelled corpus at several typo rates.
+
+    cd backend
+    python bench/bench_fuzzy.py
+    python bench/bench_fuzzy.py --rates 0 0.3 1 -n 5000
+
+recall@2   labelled samples whose first condition is among the top two matches
+false +    unlabelled (vague) samples that matched anything
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from corpus import generate                         # noqa: E402
+from knowledge_base import KnowledgeBase            # noqa: E402
+
+
+class NoCorrection:
+    @staticmethod
+    def correct(text):
+        return None
+
+
+def evaluate(index, samples: list) -> tuple:
+    start = time.perf_counter()
+    ranked = [index.score(s["symptoms"].lower()) for s in samples]
+    us = (time.perf_counter() - start) / len(samples) * 1e6
+
+    labelled = [(s, r) for s, r in zip(samples, ranked) if s["expected"]]
+    vague = [r for s, r in zip(samples, ranked) if not s["expected"]]
+    recall = sum(s["expected"][0] in [m[1] for m in r[:2]] for s, r in labelled) / len(labelled)
+    false_pos = sum(bool(r) for r in vague) / max(1, len(vague))
+    return recall, false_pos, us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=3000)
+    parser.add_argument("--rates", type=float, nargs="+", default=[0.0, 0.5, 1.0])
+    args = parser.parse_args()
+
+    index = KnowledgeBase().current().index
+    spelling = index.spelling
+
+    print(f"{'typos':>6} | {'recall@2':>8} {'false +':>8} {'µs':>6} | "
+          f"{'recall@2':>8} {'false +':>8} {'µs':>6}")
+    print(f"{'':>6} | {'exact':^24} | {'corrected':^24}")
+    for rate in args.rates:
+        samples = generate(args.n, typo_rate=rate)
+        index.spelling = NoCorrection()
+        exact = evaluate(index, samples)
+        index.spelling = spelling
+        fuzzy = evaluate(index, samples)
+        print(f"{rate:>6.2f} | {exact[0]:>8.3f} {exact[1]:>8.3f} {exact[2]:>6.1f} | "
+              f"{fuzzy[0]:>8.3f} {fuzzy[1]:>8.3f} {fuzzy[2]:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
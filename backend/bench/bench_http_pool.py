@@ -0,0 +1,126 @@
+"""
+Keep-alive pool vs. fresh connection per call, against a local OpenRouter stand-in.
+
+Runs the same concurrent load twice – once with module-level ``requests.post``
+(new TCP+TLS handshake per call, the old behaviour) and once with
+``PooledClient`` – and reports latency percentiles, throughput and how many
+connections the server accepted. TLS uses a throwaway self-signed cert when
+``openssl`` is available (``--no-tls`` to force plain HTTP).
+
+    cd backend
+    python bench/bench_http_pool.py --concurrency 16 --requests 50
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from openrouter_client import PooledClient       # noqa: E402
+
+PAYLOAD = {"model": "fake/model", "messages": [{"role": "user", "content": "fever and cold"}]}
+
+
+def self_signed_cert(workdir: str):
+    cert, key = os.path.join(workdir, "cert.pem"), os.path.join(workdir, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+                    "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+                    "-days", "1", "-keyout", key, "-out", cert],
+                   check=True, capture_output=True)
+    return cert, key
+
+
+def spawn_server(latency: float, cert: str, key: str):
+    """Run fake_openrouter.py in a child process; return (proc, url, stats_url)."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    cmd = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_openrouter.py"),
+           "--port", str(port), "--latency", str(latency)]
+    if cert:
+        cmd += ["--certfile", cert, "--keyfile", key]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+    base = f"{'https' if cert else 'http'}://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return proc, f"{base}/api/v1/chat/completions", f"{base}/stats"
+
+
+def run_load(post, concurrency: int, per_thread: int) -> dict:
+    latencies, lock = [], threading.Lock()
+
+    def worker():
+        local = []
+        for _ in range(per_thread):
+            t0 = time.perf_counter()
+            resp = post()
+            resp.raise_for_status()
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1e3  # noqa: E731
+    return {"rps": len(latencies) / elapsed, "p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=50, help="requests per thread")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake model latency (s)")
+    parser.add_argument("--no-tls", action="store_true")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        tls = not args.no_tls and shutil.which("openssl")
+        cert, key = self_signed_cert(workdir) if tls else (None, None)
+        proc, url, stats_url = spawn_server(args.latency, cert, key)
+        verify = cert or True
+        connections = lambda: requests.get(stats_url, verify=verify).json()["connections"]  # noqa: E731
+        print(f"stand-in: {url}  concurrency={args.concurrency} "
+              f"requests={args.concurrency * args.requests}")
+        print(f"{'client':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'conns':>6}")
+
+        pooled = PooledClient(url, pool_size=args.concurrency)
+        clients = {
+            "fresh": lambda: requests.post(url, json=PAYLOAD, timeout=(5, 30), verify=verify),
+            "pooled": lambda: pooled.post(json=PAYLOAD, verify=verify),
+        }
+        try:
+            for name, post in clients.items():
+                before = connections()
+                r = run_load(post, args.concurrency, args.requests)
+                # -1: the stats request itself opens a connection
+                print(f"{name:>8} {r['rps']:>8.0f} {r['p50']:>8.2f} {r['p95']:>8.2f} "
+                      f"{r['p99']:>8.2f} {connections() - before - 1:>6}")
+        finally:
+            proc.terminate()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
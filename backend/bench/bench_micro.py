@@ -0,0 +1,130 @@
+"""
+Micro-benchmarks for the triage hot path, driven by the synthetic corpus.
+
+Times each step a rule answer goes through – the emergency check,
+normalisation, scoring (per language, and with typos to correct), batch
+scoring, response composition vs. the precomposed lookup, serialisation –
+plus the streaming report parser and the AI cache key.
+
+    cd backend
+    python bench/bench_micro.py                  # table
+    python bench/bench_micro.py --json out.json  # machine-readable, for CI diffs
+    python bench/bench_micro.py -k score         # only cases whose name contains "score"
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.pop("OPENROUTER_API_KEY", None)     # never reach the network from here
+
+import app as gramhealth                         # noqa: E402
+import ai_cache                                  # noqa: E402
+from corpus import generate                      # noqa: E402
+from report_stream import ReportFieldParser      # noqa: E402
+from rule_index import normalise_text            # noqa: E402
+from rule_responses import dumps                 # noqa: E402
+
+
+def timeit(fn, items: list, rounds: int) -> float:
+    """Median µs per item over *rounds* passes of *fn* across *items*."""
+    runs = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        runs.append((time.perf_counter() - start) / len(items) * 1e6)
+    return statistics.median(runs)
+
+
+def cases(corpus: list) -> dict:
+    kb = gramhealth.KB.current()
+    index = kb.index
+    by_lang = {}
+    for s in corpus:
+        by_lang.setdefault(s["language"], []).append(s["symptoms"].lower())
+    texts = [s["symptoms"].lower() for s in corpus]
+    ascii_texts = [t for t in texts if t.isascii()]
+    deva_texts = [t for t in texts if not t.isascii()]
+
+    ranked = [(s["language"], index.score(s["symptoms"].lower())) for s in corpus]
+    keys = [(kb.locale(lang), tuple(m[1] for m in matches[:2])) for lang, matches in ranked]
+
+    report = json.dumps(dict(gramhealth._analyze_with_rules("fever and cough"),
+                             urgency="medium"), ensure_ascii=False)
+    chunks = [report[i:i + 12] for i in range(0, len(report), 12)]
+
+    def parse_report(_):
+        parser = ReportFieldParser()
+        for chunk in chunks:
+            parser.feed(chunk)
+
+    def compose(key):
+        locale, names = key
+        return gramhealth._normalise(gramhealth._compose_rules_response(names, locale))
+
+    results = [compose(k) for k in keys]
+
+    def jsonify(result):
+        with gramhealth.app.app_context():
+            gramhealth.jsonify(result)
+
+    def body(entry):
+        with gramhealth.app.app_context():
+            gramhealth._json_body(entry[1])
+
+    entries = [gramhealth.RULE_RESPONSES.get(kb, matches, lang) for lang, matches in ranked]
+
+    table = {
+        "emergency.classify": (lambda t: kb.emergency.classify(t, index.spelling), texts),
+        "normalise_text ascii": (normalise_text, ascii_texts),
+        "normalise_text devanagari": (normalise_text, deva_texts),
+        "compose rules response": (compose, keys),
+        "precomposed lookup": (lambda r: gramhealth.RULE_RESPONSES.get(kb, r[1], r[0]), ranked),
+        "jsonify(result)": (jsonify, results),
+        "_json_body(precomposed)": (body, entries),
+        "dumps(result)": (dumps, results),
+        "report parser, per report (12-char chunks)": (parse_report, [None] * 50),
+        "ai_cache.make_key": (lambda t: ai_cache.make_key(t, "en", "model"), texts),
+        "score_many, per record (100/batch)": (
+            lambda i: index.score_many(texts[i:i + 100]), list(range(0, len(texts), 100))),
+    }
+    for lang, items in sorted(by_lang.items()):
+        table[f"index.score {lang}"] = (index.score, items)
+    table["index.score, every keyword misspelt"] = (
+        index.score, [s["symptoms"].lower() for s in generate(len(corpus), typo_rate=1.0)])
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=2000, help="corpus size")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("-k", dest="filter", default="", help="run cases containing this text")
+    parser.add_argument("--json", help="also write {case: µs} to this file")
+    args = parser.parse_args()
+
+    corpus = generate(args.n)
+    out = {}
+    print(f"{'case':<42} {'µs/op':>9}")
+    for name, (fn, items) in cases(corpus).items():
+        if args.filter not in name or not items:
+            continue
+        us = timeit(fn, items, args.rounds)
+        if name.startswith("score_many"):
+            us /= 100
+        out[name] = round(us, 2)
+        print(f"{name:<42} {us:>9.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(out, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Model routing: how the labelled corpus splits across the rules / small /
+large tiers for a set of thresholds, and how good the no-model answers are.
+
+    cd backend
+    python bench/bench_routing.py                          # defaults of app.py
+    python bench/bench_routing.py --rules-min-score 6 --small
+    python bench/bench_routing.py --rules-min-score 3 --rules-margin 1.5 --typos 0.3
+    python bench/bench_routing.py --scorer tfidf --rules-min-score 60 --small
+
+Red-flag inputs are answered before routing and counted as "emergency".
+
+recall@2   labelled inputs routed to the rules whose condition is in the answer
+vague      unlabelled (vague) inputs routed to the rules – they get a guess
+"""
+
+import argparse
+import os
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from corpus import generate                         # noqa: E402
+from knowledge_base import KnowledgeBase            # noqa: E402
+from model_router import ModelRouter, Tier          # noqa: E402
+from tfidf_index import TfidfIndex                  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=5000)
+    parser.add_argument("--typos", type=float, default=0.0, help="corpus typo rate")
+    parser.add_argument("--scorer", choices=("keyword", "tfidf"), default="keyword",
+                        help="RULE_SCORER (tfidf scores are 0-100: scale the min scores)")
+    parser.add_argument("--rules-languages", default="hi,mr")
+    parser.add_argument("--rules-languages-min-score", type=int, default=3)
+    parser.add_argument("--rules-min-score", type=int, default=0)
+    parser.add_argument("--rules-margin", type=float, default=2.0)
+    parser.add_argument("--rules-max-words", type=int, default=8)
+    parser.add_argument("--small", action="store_true", help="enable the small-model tier")
+    parser.add_argument("--small-max-words", type=int, default=20)
+    parser.add_argument("--small-languages", default="en")
+    args = parser.parse_args()
+
+    router = ModelRouter(
+        large=Tier("large", "large-model", 1200),
+        small=Tier("small", "small-model" if args.small else None, 600),
+        rules_languages=[l for l in args.rules_languages.split(",") if l],
+        rules_languages_min_score=args.rules_languages_min_score,
+        rules_min_score=args.rules_min_score,
+        rules_margin=args.rules_margin,
+        rules_max_words=args.rules_max_words,
+        small_max_words=args.small_max_words,
+        small_languages=[l for l in args.small_languages.split(",") if l],
+    )
+    kb = KnowledgeBase().current()
+    index = kb.index
+    scorer = index
+    if args.scorer == "tfidf":
+        scorer = TfidfIndex(kb.conditions, [l.conditions for l in kb.locales.values() if l.lang != "en"],
+                            spelling=index.spelling)
+    samples = generate(args.n, typo_rate=args.typos)
+
+    tiers, by_lang = Counter(), Counter()
+    hits = labelled = vague = 0
+    budget = 0
+    for s in samples:
+        if kb.emergency.classify(s["symptoms"].lower(), index.spelling) is not None:
+            tiers["emergency"] += 1
+            by_lang[("emergency", s["language"])] += 1
+            continue
+        matches = scorer.score(s["symptoms"].lower())
+        tier = router.route(matches, s["symptoms"], s["language"])
+        tiers[tier.name] += 1
+        by_lang[(tier.name, s["language"])] += 1
+        budget += tier.max_tokens
+        if tier.model is None:
+            if s["expected"]:
+                labelled += 1
+                hits += s["expected"][0] in [m[1] for m in matches[:2]]
+            else:
+                vague += 1
+
+    langs = sorted({s["language"] for s in samples})
+    print(f"{'tier':<9} {'share':>7}  " + "  ".join(f"{l:>6}" for l in langs))
+    for name in ("emergency", "rules", "small", "large"):
+        print(f"{name:<9} {tiers[name] / len(samples):>7.1%}  "
+              + "  ".join(f"{by_lang[(name, l)]:>6}" for l in langs))
+    print(f"rules answers: recall@2 {hits / max(1, labelled):.3f} on {labelled} labelled, "
+          f"{vague} vague")
+    print(f"max_tokens budget vs. all-large: {budget / (1200 * len(samples)):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Rule-scorer scaling benchmark.
+
+Grows the condition table from the real 13 entries to 10k by appending
+synthetic conditions (pseudo-word keywords, so they behave like unrelated
+regional diseases) and times RuleIndex.score against a linear scan that
+visits every condition per request, like the original scorer did.
+
+    cd backend
+    python bench/bench_scoring.py            # 13 → 10k
+    python bench/bench_scoring.py --sizes 13 1000 --repeat 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from knowledge_base import load_source                   # noqa: E402
+from rule_index import GENERIC_WORDS, RuleIndex          # noqa: E402
+
+CONDITIONS = load_source()["conditions"]
+
+QUERIES = [
+    "my head is paining since morning",
+    "fever and cold with body ache",
+    "wisdom teeth pain and hands shaking",
+    "chest pain sweating left arm",
+    "stomach pain vomiting loose motion",
+    "burning urine and lower back pain",
+    "itchy red spots on skin after eating prawns",
+    "cannot sleep, feeling anxious all the time",
+]
+
+SYLLABLES = ["ka", "ri", "mo", "tu", "ne", "sa", "lo", "vi", "pa", "dhu", "zen", "qor"]
+
+
+def synthetic_conditions(n: int, seed: int = 7) -> dict:
+    """CONDITIONS plus n-13 generated entries shaped like the real ones."""
+    rng = random.Random(seed)
+    table = dict(CONDITIONS)
+    template = next(iter(CONDITIONS.values()))
+
+    def word():
+        return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+    for i in range(max(0, n - len(CONDITIONS))):
+        kws = [" ".join(word() for _ in range(rng.randint(1, 2))) for _ in range(10)]
+        table[f"synthetic_{i}"] = dict(template, keywords=kws, label=f"{word().title()} Syndrome", i18n={})
+    return table
+
+
+def linear_score(conditions: dict, symptoms_lower: str) -> list:
+    """Reference scorer that touches every condition (pre-index behaviour)."""
+    words = RuleIndex.expand_words(symptoms_lower)
+    scored = []
+    for name, c in conditions.items():
+        score = sum(len(kw.split()) * 3 for kw in c["keywords"] if kw in symptoms_lower)
+        kw_words = {w for kw in c["keywords"] for w in kw.split()}
+        kw_words.update(c["label"].lower().split())
+        score += len(words & (kw_words - GENERIC_WORDS))
+        if score > 0:
+            scored.append((score, name, c))
+    scored.sort(reverse=True, key=lambda x: x[0])
+    return scored
+
+
+def per_call_us(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(QUERIES[i % len(QUERIES)])
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[13, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'conditions':>10} {'build ms':>9} {'indexed µs':>11} {'linear µs':>10}")
+    for n in args.sizes:
+        table = synthetic_conditions(n)
+        t0 = time.perf_counter()
+        index = RuleIndex(table)
+        build_ms = (time.perf_counter() - t0) * 1e3
+
+        for q in QUERIES:   # the index must agree with the reference scorer
+            assert [x[:2] for x in index.score(q)] == [x[:2] for x in linear_score(table, q)], q
+
+        indexed = per_call_us(index.score, args.repeat)
+        linear = per_call_us(lambda q: linear_score(table, q), max(1, args.repeat // max(1, n // 13)))
+        print(f"{len(table):>10} {build_ms:>9.1f} {indexed:>11.1f} {linear:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Serving profile: memory per worker and start-up time of the triage API,
+plain ``gunicorn app:app`` vs. the gunicorn.conf.py profile, fully offline.
+
+  plain     no config file: every worker imports the app (and builds its
+            tables) after the fork
+  profile   gunicorn.conf.py: the app is preloaded in the master and the
+            workers fork from it (gc frozen), sharing its pages
+
+Both run the same --workers × --threads, with the rule path only (no API
+key). For each it reports (gunicorn logs the killed worker as an error):
+
+  first 200   launch → first answer from /api/health
+  all ready   launch → every worker has finished starting
+  respawn     SIGKILL one worker → its replacement has finished starting
+  RSS/PSS/USS per worker after --requests triage requests, from
+              /proc/<pid>/smaps_rollup (PSS splits shared pages between the
+              processes sharing them; USS is what the worker alone holds)
+
+A worker counts as started once it has written its first metrics file (the
+last step of app start-up; METRICS_DIR is set for the run). Linux only.
+
+    cd backend
+    python bench/bench_serving.py
+    python bench/bench_serving.py --workers 8 --requests 5000
+"""
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from corpus import generate                                 # noqa: E402
+from loadgen import BACKEND_DIR, free_port, wait_ready      # noqa: E402
+
+
+def children(pid: int) -> list:
+    """PIDs whose parent is *pid*."""
+    out = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    if int(f.read().rsplit(")", 1)[1].split()[1]) == pid:
+                        out.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                pass
+    return out
+
+
+def wait_started(master: int, workers: int, metrics_dir: str, exclude=(),
+                 timeout: float = 120.0) -> list:
+    """Wait until *workers* children of *master* (other than *exclude*) have
+    published their first metrics file."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        ready = [p for p in children(master) if p not in exclude
+                 and os.path.exists(os.path.join(metrics_dir, f"metrics-{p}.json"))]
+        if len(ready) >= workers:
+            return ready
+        time.sleep(0.01)
+    raise SystemExit(f"workers not started after {timeout}s")
+
+
+def memory(pid: int) -> dict:
+    """Rss, Pss and USS (private clean + dirty) of *pid* in MB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {"rss": fields["Rss"], "pss": fields["Pss"],
+            "uss": fields["Private_Clean"] + fields["Private_Dirty"]}
+
+
+def load(port: int, bodies: list, clients: int = 8):
+    """POST every body once from *clients* threads, a new connection each time."""
+    def run(chunk):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        for body in chunk:
+            conn.request("POST", "/api/analyze-symptoms", body=body,
+                         headers={"Content-Type": "application/json", "Connection": "close"})
+            conn.getresponse().read()
+            conn.close()
+
+    threads = [threading.Thread(target=run, args=(bodies[i::clients],)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def measure(kind: str, args, bodies: list, metrics_dir: str) -> dict:
+    port = free_port()
+    cmd = [sys.executable, "-m", "gunicorn", "-b", f"127.0.0.1:{port}", "-w", str(args.workers),
+           "--threads", str(args.threads), "--log-level", "warning"]
+    empty = None
+    if kind == "plain":
+        fd, empty = tempfile.mkstemp(suffix=".py")      # keep gunicorn.conf.py out
+        os.close(fd)
+        cmd += ["-c", empty]
+    env = dict(os.environ, KB_RELOAD_INTERVAL="3600", METRICS_DIR=metrics_dir)
+    for var in ("OPENROUTER_API_KEY", "GUNICORN_PRELOAD", "GUNICORN_WORKERS", "WEB_CONCURRENCY"):
+        env.pop(var, None)
+
+    begin = time.perf_counter()
+    proc = subprocess.Popen(cmd + ["app:app"], cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+    try:
+        wait_ready("127.0.0.1", port, "/api/health", proc, timeout=120)
+        first = time.perf_counter() - begin
+        workers = wait_started(proc.pid, args.workers, metrics_dir)
+        all_ready = time.perf_counter() - begin
+
+        # connection-per-request, so the kernel spreads the load over the workers
+        load(port, bodies)
+        workers = children(proc.pid)
+        per_worker = [memory(p) for p in workers]
+        master = memory(proc.pid)
+
+        victim = workers[0]
+        begin = time.perf_counter()
+        os.kill(victim, signal.SIGKILL)
+        wait_started(proc.pid, 1, metrics_dir, exclude=workers)
+        respawn = time.perf_counter() - begin
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        if empty:
+            os.unlink(empty)
+
+    n = len(per_worker)
+    return {
+        "first_200_s": round(first, 2),
+        "all_ready_s": round(all_ready, 2),
+        "respawn_s": round(respawn, 3),
+        "worker_rss_mb": round(sum(m["rss"] for m in per_worker) / n, 1),
+        "worker_pss_mb": round(sum(m["pss"] for m in per_worker) / n, 1),
+        "worker_uss_mb": round(sum(m["uss"] for m in per_worker) / n, 1),
+        "master_rss_mb": round(master["rss"], 1),
+        "total_pss_mb": round(master["pss"] + sum(m["pss"] for m in per_worker), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000, help="warm-up load before measuring")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    bodies = [json.dumps({"symptoms": s["symptoms"], "language": s["language"]}).encode("utf-8")
+              for s in generate(args.requests)]
+    report = {"workers": args.workers, "threads": args.threads}
+    for kind in ("plain", "profile"):
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            report[kind] = measure(kind, args, bodies, metrics_dir)
+
+    print(f"{args.workers} workers × {args.threads} threads, {args.requests} rule-path requests")
+    print(f"{'':<8} {'first 200':>9} {'all ready':>9} {'respawn':>8} {'RSS/wkr':>8} "
+          f"{'PSS/wkr':>8} {'USS/wkr':>8} {'master':>7} {'total PSS':>9}")
+    for kind in ("plain", "profile"):
+        r = report[kind]
+        print(f"{kind:<8} {r['first_200_s']:>8}s {r['all_ready_s']:>8}s {r['respawn_s']:>7}s "
+              f"{r['worker_rss_mb']:>6}MB {r['worker_pss_mb']:>6}MB {r['worker_uss_mb']:>6}MB "
+              f"{r['master_rss_mb']:>5}MB {r['total_pss_mb']:>7}MB")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Keyword scorer vs. TF-IDF scorer: match quality and latency on the labelled
+corpus (RULE_SCORER=keyword / tfidf).
+
+    cd backend
+    python bench/bench_tfidf.py
+    python bench/bench_tfidf.py --rates 0 0.5 1 --min-score 25 -n 5000
+
+recall@1   labelled samples whose first condition is ranked first
+recall@2   labelled samples whose first condition is among the top two
+both       two-condition samples with both conditions in the top two
+extra      one-condition samples answered with a wrong second condition
+false +    unlabelled (vague) samples that matched anything
+
+Latency: µs per input scoring one at a time (``score``) and as batches
+(``score_many``; for TF-IDF one matrix product per batch).
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from corpus import generate                         # noqa: E402
+from knowledge_base import KnowledgeBase            # noqa: E402
+from tfidf_index import TfidfIndex                  # noqa: E402
+
+
+def quality(ranked: list, samples: list) -> tuple:
+    top1 = top2 = labelled = both = multi = extra = single = false_pos = vague = 0
+    for s, r in zip(samples, ranked):
+        names = [m[1] for m in r[:2]]
+        if not s["expected"]:
+            vague += 1
+            false_pos += bool(r)
+            continue
+        labelled += 1
+        top1 += names[:1] == s["expected"][:1]
+        top2 += s["expected"][0] in names
+        if len(s["expected"]) > 1:
+            multi += 1
+            both += set(s["expected"]) <= set(names)
+        else:
+            single += 1
+            extra += len(names) > 1 and names[1] not in s["expected"]
+    return (top1 / labelled, top2 / labelled, both / max(1, multi), extra / max(1, single),
+            false_pos / max(1, vague))
+
+
+def per_input_us(index, texts: list) -> float:
+    start = time.perf_counter()
+    for t in texts:
+        index.score(t)
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=3000)
+    parser.add_argument("--rates", type=float, nargs="+", default=[0.0, 0.5], help="typo rates")
+    parser.add_argument("--min-score", type=int, default=20, help="TF-IDF TFIDF_MIN_SCORE")
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 10, 100, 1000])
+    args = parser.parse_args()
+
+    kb = KnowledgeBase().current()
+    locales = [locale.conditions for locale in kb.locales.values() if locale.lang != "en"]
+    start = time.perf_counter()
+    tfidf = TfidfIndex(kb.conditions, locales, min_score=args.min_score,
+                       spelling=kb.index.spelling)
+    build_ms = (time.perf_counter() - start) * 1e3
+    scorers = {"keyword": kb.index, "tfidf": tfidf}
+    print(f"TF-IDF build (once per knowledge-base version): {build_ms:.0f} ms, {len(tfidf.vocab)} n-grams × {len(tfidf.names)} "
+          f"conditions ({tfidf.matrix.nbytes / 1e6:.2f} MB)")
+
+    print(f"\n{'typos':>6} {'scorer':<8} {'recall@1':>8} {'recall@2':>8} {'both':>6} "
+          f"{'extra':>6} {'false +':>8}")
+    for rate in args.rates:
+        samples = generate(args.n, typo_rate=rate)
+        texts = [s["symptoms"].lower() for s in samples]
+        for name, index in scorers.items():
+            q = quality(index.score_many(texts), samples)
+            print(f"{rate:>6.2f} {name:<8} {q[0]:>8.3f} {q[1]:>8.3f} {q[2]:>6.3f} "
+                  f"{q[3]:>6.3f} {q[4]:>8.3f}")
+
+    # latency on distinct inputs, so batch de-duplication doesn't flatter either side
+    samples = generate(max(args.batches) * 4)
+    texts = list(dict.fromkeys(f"{s['symptoms'].lower()} #{i}" for i, s in enumerate(samples)))
+    print(f"\n{'µs/input':<14}" + "".join(f"{name:>10}" for name in scorers))
+    print(f"{'score':<14}" + "".join(f"{per_input_us(index, texts):>10.1f}"
+                                     for index in scorers.values()))
+    for size in args.batches:
+        chunks = [texts[i:i + size] for i in range(0, len(texts) - size + 1, size)]
+        cells = []
+        for index in scorers.values():
+            start = time.perf_counter()
+            for chunk in chunks:
+                index.score_many(chunk)
+            cells.append((time.perf_counter() - start) / (len(chunks) * size) * 1e6)
+        print(f"{'batch ' + str(size):<14}" + "".join(f"{c:>10.1f}" for c in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Voice WebSocket audio path: bytes on the wire and server CPU per audio chunk,
+base64-in-JSON messages vs. binary frames (voice_audio.py). No network and no
+Gemini – only the work voice_agent.py does for each chunk it relays.
+
+  uplink     browser chunk → Gemini realtimeInput message
+               json    json.loads the client message, json.dumps the Gemini one
+               binary  parse the frame, base64 the PCM view into the message
+  downlink   Gemini base64 chunk → message to the browser
+               json    json.dumps {"type": "audio", "audio": ...} (send_json)
+               binary  decode the base64 once, prepend the 4-byte header
+
+Uplink coalescing (UplinkCoalescer): --sessions WebSocket connections over
+loopback each stream --seconds of audio in --chunk-ms chunks, as fast as
+they go, once per frame length (0 = every chunk as its own message). It
+reports Gemini messages per audio second and the CPU (both ends of the
+connections, one process) per second of audio – 1 ms per audio second is
+one core per 1000 live sessions. Compression is off unless --deflate: deflate
+on base64 PCM saves ~25% of the bytes but costs more CPU than all the rest,
+and grows faster than linearly with the message size.
+
+Silence suppression (VoiceActivityDetector): a synthetic consultation –
+speech bursts (voiced harmonics at a syllable rate, with "s"-like noise
+bursts) between pauses, over background noise – is fed through the VAD in
+--chunk-ms chunks. It reports the share of bytes dropped, the share of chunks
+with speech in them that were dropped (should be 0) and µs per chunk.
+
+Slow client (OutboundQueue): Gemini delivers a --turn-s spoken reply (binary
+frames, 100 ms each) five times faster than real time, followed by a
+transcript, to a client whose link drains --link-kbps. It reports the
+most audio queued, the audio dropped, the oldest message's wait and whether
+the transcript arrived, for a bounded queue and an unbounded one. The run
+is time-compressed by --time-scale; waits are reported in real seconds.
+
+    cd backend
+    python bench/bench_voice.py
+    python bench/bench_voice.py --chunk-ms 40 --chunks 20000
+    python bench/bench_voice.py --chunk-ms 20 --sessions 500 --frames 0 40 100 200
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import websockets
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import voice_audio                                  # noqa: E402
+from outbound_queue import OutboundQueue            # noqa: E402
+
+
+def per_chunk_us(fn, items: list, rounds: int = 5) -> float:
+    """Best µs per item over *rounds* passes of *fn* across *items*."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items) * 1e6
+
+
+def uplink_json(text: str) -> str:
+    data = json.loads(text)
+    return json.dumps({"realtimeInput": {"mediaChunks": [{
+        "data": data["audio"], "mimeType": "audio/pcm;rate=16000"}]}})
+
+
+def uplink_binary(frame: bytes) -> str:
+    _kind, _seq, pcm = voice_audio.parse_frame(frame)
+    return voice_audio.realtime_input(pcm)
+
+
+async def coalescing(sessions: int, seconds: float, chunk_ms: int, frame_ms: int,
+                     deflate: bool = False) -> dict:
+    """CPU seconds and messages for *sessions* streams through the coalescer."""
+    received = 0
+
+    async def sink(ws):
+        nonlocal received
+        async for _ in ws:
+            received += 1
+
+    chunk = os.urandom(voice_audio.MIC_RATE * chunk_ms // 1000 * 2)
+    chunks = int(seconds * 1000 / chunk_ms)
+    compression = "deflate" if deflate else None
+    async with websockets.serve(sink, "127.0.0.1", 0, max_size=None, compression=compression) as server:
+        port = server.sockets[0].getsockname()[1]
+        conns = [await websockets.connect(f"ws://127.0.0.1:{port}", max_size=None,
+                                          compression=compression)
+                 for _ in range(sessions)]
+
+        async def stream(ws):
+            async def send(pcm):
+                await ws.send(voice_audio.realtime_input(pcm))
+            uplink = voice_audio.UplinkCoalescer(send, frame_ms=frame_ms, min_ms=frame_ms,
+                                                 max_ms=frame_ms)
+            for _ in range(chunks):
+                await uplink.add(chunk)
+            await uplink.flush()
+            return uplink.messages_out
+
+        start = time.process_time()
+        sent = sum(await asyncio.gather(*(stream(ws) for ws in conns)))
+        while received < sent:
+            await asyncio.sleep(0.01)
+        cpu = time.process_time() - start
+        for ws in conns:
+            await ws.close()
+    audio_s = sessions * seconds
+    return {"messages_per_audio_s": sent / audio_s, "cpu_ms_per_audio_s": cpu / audio_s * 1000}
+
+
+def consultation(seconds: float, noise_db: float = -50, speech_db: float = -25,
+                 seed: int = 7) -> tuple:
+    """``(pcm, is_speech)``: int16 PCM of alternating pauses (0.5-4 s) and
+    utterances (0.5-2.5 s), and a per-sample speech mask."""
+    rng = np.random.default_rng(seed)
+    rate = voice_audio.MIC_RATE
+    total = int(seconds * rate)
+    signal = rng.normal(0, 32768 * 10 ** (noise_db / 20), total)
+    mask = np.zeros(total, dtype=bool)
+    pos = 0
+    while pos < total:
+        pos += int(rng.uniform(0.5, 4.0) * rate)
+        length = min(int(rng.uniform(0.5, 2.5) * rate), total - pos)
+        if length <= 0:
+            break
+        t = np.arange(length) / rate
+        pitch = rng.uniform(100, 220)
+        voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+        syllables = 0.55 + 0.45 * np.sin(2 * np.pi * 4 * t)          # ~4 syllables/s
+        amplitude = 32768 * 10 ** (speech_db / 20)
+        signal[pos:pos + length] += amplitude * syllables * voiced
+        hiss = np.sin(2 * np.pi * 1.3 * t) > 0.9                       # "s"/"sh" bursts
+        signal[pos:pos + length] += hiss * rng.normal(0, amplitude / 3, length)
+        mask[pos:pos + length] = True
+        pos += length
+    return np.clip(signal, -32768, 32767).astype("<i2").tobytes(), mask
+
+
+def vad_report(seconds: float, chunk_ms: int) -> dict:
+    pcm, mask = consultation(seconds)
+    step = voice_audio.MIC_RATE * chunk_ms // 1000 * 2
+    chunks = [pcm[i:i + step] for i in range(0, len(pcm) - step + 1, step)]
+    speech = [mask[i // 2:(i + step) // 2].any() for i in range(0, len(pcm) - step + 1, step)]
+
+    vad = voice_audio.VoiceActivityDetector()
+    index = {id(c): i for i, c in enumerate(chunks)}
+    forwarded = set()
+    start = time.perf_counter()
+    for chunk in chunks:
+        out, _ended = vad.process(chunk)
+        forwarded.update(index[id(c)] for c in out)
+    us = (time.perf_counter() - start) / len(chunks) * 1e6
+    lost = sum(1 for i, s in enumerate(speech) if s and i not in forwarded)
+    return {"speech_share": sum(speech) / len(chunks), "dropped": vad.bytes_saved / vad.bytes_in,
+            "speech_lost": lost / max(1, sum(speech)), "us_per_chunk": us}
+
+
+async def slow_client(turn_s: float, link_kbps: float, queue_kb: int, scale: float) -> dict:
+    """Push one reply through an OutboundQueue draining at *link_kbps*."""
+    frame = voice_audio.agent_frame(base64.b64encode(bytes(voice_audio.AGENT_RATE // 10 * 2)).decode(), 0)
+    transcript_seen = False
+
+    async def send(message):
+        nonlocal transcript_seen
+        transcript_seen |= isinstance(message, str)
+        await asyncio.sleep(len(message) / (link_kbps * 1000 / 8) * scale)
+
+    queue = OutboundQueue(send, max_audio_bytes=queue_kb * 1024)
+    writer = asyncio.create_task(queue.run())
+    for _ in range(int(turn_s * 10)):
+        queue.put_audio(frame)
+        await asyncio.sleep(0.1 / 5 * scale)                 # 5x real time
+    await queue.put_control('{"type":"agent","text":"..."}')
+    while len(queue):
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.01)
+    writer.cancel()
+    return {"peak_kb": queue.peak_audio_bytes / 1024, "dropped": queue.dropped_bytes / 1024,
+            "max_wait_s": queue.max_wait / scale, "transcript": transcript_seen}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunk-ms", type=int, default=85, help="browser chunk length")
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=200, help="coalescing: concurrent streams")
+    parser.add_argument("--seconds", type=float, default=10, help="coalescing: audio per stream")
+    parser.add_argument("--frames", type=int, nargs="+", default=[0, 40, 100, 200],
+                        help="coalescing: frame lengths in ms (0 = off)")
+    parser.add_argument("--vad-seconds", type=float, default=600, help="VAD: length of the consultation")
+    parser.add_argument("--turn-s", type=float, default=20, help="slow client: reply length")
+    parser.add_argument("--link-kbps", type=float, default=256, help="slow client: link speed")
+    parser.add_argument("--queue-kb", type=int, default=256, help="slow client: VOICE_CLIENT_QUEUE_KB")
+    parser.add_argument("--time-scale", type=float, default=0.1, help="slow client: run speed-up")
+    parser.add_argument("--deflate", action="store_true",
+                        help="coalescing: negotiate permessage-deflate (websockets' default)")
+    args = parser.parse_args()
+
+    mic = [os.urandom(voice_audio.MIC_RATE * args.chunk_ms // 1000 * 2) for _ in range(args.chunks)]
+    agent = [base64.b64encode(os.urandom(voice_audio.AGENT_RATE * args.chunk_ms // 1000 * 2)).decode()
+             for _ in range(args.chunks)]
+
+    up_json = [json.dumps({"type": "audio", "audio": base64.b64encode(p).decode()}) for p in mic]
+    up_binary = [voice_audio.HEADER.pack(voice_audio.MIC_PCM16, 0, i & 0xFFFF) + p
+                 for i, p in enumerate(mic)]
+    down_json = [json.dumps({"type": "audio", "audio": b}) for b in agent]
+    down_binary = [voice_audio.agent_frame(b, i) for i, b in enumerate(agent)]
+
+    rows = [
+        ("uplink", "json", len(up_json[0].encode()), per_chunk_us(uplink_json, up_json)),
+        ("uplink", "binary", len(up_binary[0]), per_chunk_us(uplink_binary, up_binary)),
+        ("downlink", "json", len(down_json[0].encode()),
+         per_chunk_us(lambda b: json.dumps({"type": "audio", "audio": b}), agent)),
+        ("downlink", "binary", len(down_binary[0]),
+         per_chunk_us(lambda b: voice_audio.agent_frame(b, 0), agent)),
+    ]
+    print(f"{args.chunk_ms} ms chunks (PCM: {len(mic[0])} B up, {len(mic[0]) * 3 // 2} B down)")
+    print(f"{'':<9} {'format':<7} {'bytes/msg':>9} {'µs/chunk':>9}")
+    for direction, fmt, size, us in rows:
+        print(f"{direction:<9} {fmt:<7} {size:>9} {us:>9.2f}")
+
+    print(f"\nsilence suppression: {args.vad_seconds:g} s consultation")
+    print(f"{'chunk ms':>8} {'speech chunks':>13} {'bytes dropped':>13} {'speech lost':>11} {'µs/chunk':>9}")
+    for chunk_ms in sorted({20, args.chunk_ms}):
+        r = vad_report(args.vad_seconds, chunk_ms)
+        print(f"{chunk_ms:>8} {r['speech_share']:>13.1%} {r['dropped']:>13.1%} "
+              f"{r['speech_lost']:>11.1%} {r['us_per_chunk']:>9.1f}")
+
+    print(f"\nslow client: {args.turn_s:g} s reply ({voice_audio.AGENT_RATE * 2 // 1000} kB/s) "
+          f"over a {args.link_kbps:g} kbit/s link")
+    print(f"{'queue':<10} {'peak kB':>8} {'dropped kB':>10} {'max wait s':>10} {'transcript':>10}")
+    for label, kb in ((f"{args.queue_kb} kB", args.queue_kb), ("unbounded", 1 << 30)):
+        r = asyncio.run(slow_client(args.turn_s, args.link_kbps, kb, args.time_scale))
+        print(f"{label:<10} {r['peak_kb']:>8.0f} {r['dropped']:>10.0f} {r['max_wait_s']:>10.1f} "
+              f"{'yes' if r['transcript'] else 'no':>10}")
+
+    print(f"\nuplink coalescing: {args.sessions} sessions × {args.seconds:g} s of audio "
+          f"in {args.chunk_ms} ms chunks")
+    print(f"{'frame ms':>8} {'msgs/audio s':>12} {'CPU ms/audio s':>14}")
+    for frame_ms in args.frames:
+        r = asyncio.run(coalescing(args.sessions, args.seconds, args.chunk_ms, frame_ms, args.deflate))
+        print(f"{frame_ms or 'off':>8} {r['messages_per_audio_s']:>12.1f} "
+              f"{r['cpu_ms_per_audio_s']:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Synthetic multilingual symptom corpus for benchmarks and match-quality checks.
+
+Sentences are assembled from the knowledge base's own keywords (English,
+Hindi/Marathi in Devanagari and romanised) inside per-language templates, so
+every sample carries the conditions it was built from as its label:
+
+    {"symptoms": "mujhe 2 din se sir dard hai", "language": "hi", "expected": ["headache"]}
+
+About one in ten samples is a vague complaint with no label (``expected: []``).
+With ``--typos RATE`` that fraction of keywords gets one keyboard-style edit
+(dropped, doubled, swapped or substituted letter) in a word of 5+ letters,
+the way phone keyboards and speech-to-text produce "hedache" or "stomuch".
+Generation is seeded, so the same arguments always give the same corpus.
+
+    cd backend
+    python bench/corpus.py -n 2000 --out /tmp/corpus.jsonl
+    python bench/corpus.py -n 2000 --typos 0.5
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from knowledge_base import load_source        # noqa: E402
+
+TEMPLATES = {
+    ("en", "latin"): {
+        1: ["having {a}", "i have {a} since {d}", "{a} since {d}, please help", "my child has {a}",
+            "suffering from {a} for {d}", "{a} is getting worse"],
+        2: ["{a} and {b}", "i have {a} and {b} since {d}", "{a}, also {b}", "{a} with {b} for {d}"],
+    },
+    ("hi", "latin"): {
+        1: ["mujhe {a} hai", "{d} se {a} ho raha hai", "bahut {a} hai", "mere bete ko {a} hai"],
+        2: ["{a} aur {b}", "mujhe {a} aur {b} hai", "{d} se {a} aur {b}"],
+    },
+    ("hi", "deva"): {
+        1: ["मुझे {a} है", "{d} से {a} हो रहा है", "बहुत {a} है", "मेरे बेटे को {a} है"],
+        2: ["{a} और {b}", "मुझे {a} और {b} है", "{d} से {a} और {b}"],
+    },
+    ("mr", "latin"): {
+        1: ["mala {a} aahe", "{d} pasun {a}", "khup {a}", "mazya mulala {a} aahe"],
+        2: ["{a} ani {b}", "mala {a} ani {b} aahe", "{d} pasun {a} ani {b}"],
+    },
+    ("mr", "deva"): {
+        1: ["मला {a} आहे", "{d} पासून {a}", "खूप {a}", "माझ्या मुलाला {a} आहे"],
+        2: ["{a} आणि {b}", "मला {a} आणि {b} आहे", "{d} पासून {a} आणि {b}"],
+    },
+}
+
+DURATIONS = {
+    ("en", "latin"): ["2 days", "yesterday", "a week", "this morning"],
+    ("hi", "latin"): ["2 din", "kal", "ek hafte", "subah"],
+    ("hi", "deva"): ["2 दिन", "कल", "एक हफ्ते", "सुबह"],
+    ("mr", "latin"): ["2 divas", "kal", "ek athavda", "sakali"],
+    ("mr", "deva"): ["2 दिवस", "काल", "एक आठवडा", "सकाळ"],
+}
+
+UNLABELLED = {
+    "en": ["feeling weird today", "not feeling well since morning", "general weakness, no energy",
+           "something is wrong with my body"],
+    "hi": ["kuch theek nahi lag raha", "तबीयत ठीक नहीं लग रही", "kamzori lag rahi hai", "अजीब सा लग रहा है"],
+    "mr": ["bara vatat nahi", "मला बरं वाटत नाही", "ashaktpana aahe", "काहीतरी वेगळं वाटतंय"],
+}
+
+DEFAULT_MIX = {"en": 0.5, "hi": 0.3, "mr": 0.2}
+
+
+def keyword_pools(conditions: dict) -> dict:
+    """(lang, script) → condition name → usable keywords."""
+    pools = {}
+    for name, c in conditions.items():
+        pools.setdefault(("en", "latin"), {})[name] = [k for k in c["keywords"] if not k.isdigit()]
+        for lang, local in (c.get("i18n") or {}).items():
+            for kw in local.get("keywords", ()):
+                script = "latin" if kw.isascii() else "deva"
+                pools.setdefault((lang, script), {}).setdefault(name, []).append(kw)
+    return pools
+
+
+def misspell(keyword: str, rng: random.Random) -> str:
+    """One random edit in one of *keyword*'s words of 5+ letters (Latin only;
+    Devanagari keywords are returned unchanged)."""
+    words = keyword.split()
+    candidates = [i for i, w in enumerate(words) if len(w) >= 5 and w.isascii() and w.isalpha()]
+    if not candidates:
+        return keyword
+    i = rng.choice(candidates)
+    w = words[i]
+    pos = rng.randrange(1, len(w) - 1)
+    edit = rng.choice(("drop", "double", "swap", "substitute"))
+    if edit == "drop":
+        w = w[:pos] + w[pos + 1:]
+    elif edit == "double":
+        w = w[:pos] + w[pos] + w[pos:]
+    elif edit == "swap":
+        w = w[:pos] + w[pos + 1] + w[pos] + w[pos + 2:]
+    else:
+        w = w[:pos] + rng.choice("aeiouy" if w[pos] in "aeiouy" else "bcdfghklmnprstvz") + w[pos + 1:]
+    words[i] = w
+    return " ".join(words)
+
+
+def generate(n: int = 1000, seed: int = 42, mix: dict = None, conditions: dict = None,
+             typo_rate: float = 0.0) -> list:
+    """Return *n* labelled samples ``{"symptoms", "language", "expected"}``."""
+    rng = random.Random(seed)
+    conditions = conditions or load_source()["conditions"]
+    pools = keyword_pools(conditions)
+    mix = mix or DEFAULT_MIX
+    langs, weights = zip(*mix.items())
+
+    samples = []
+    for _ in range(n):
+        lang = rng.choices(langs, weights)[0]
+        if rng.random() < 0.1:
+            samples.append({"symptoms": rng.choice(UNLABELLED[lang]), "language": lang, "expected": []})
+            continue
+        script = "latin" if lang == "en" else rng.choice(("latin", "deva"))
+        pool = pools[(lang, script)]
+        names = rng.sample(sorted(pool), 2 if rng.random() < 0.3 else 1)
+        kws = [rng.choice(pool[name]) for name in names]
+        if typo_rate:
+            kws = [misspell(kw, rng) if rng.random() < typo_rate else kw for kw in kws]
+        template = rng.choice(TEMPLATES[(lang, script)][len(names)])
+        text = template.format(a=kws[0], b=kws[-1], d=rng.choice(DURATIONS[(lang, script)]))
+        if script == "latin" and rng.random() < 0.2:
+            text = text.capitalize() + rng.choice((".", "!", "..", " ?"))
+        samples.append({"symptoms": text, "language": lang, "expected": names})
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the synthetic symptom corpus")
+    parser.add_argument("-n", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--typos", type=float, default=0.0, help="fraction of keywords misspelt")
+    parser.add_argument("--out", help="JSONL file (default: stdout)")
+    args = parser.parse_args()
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        for sample in generate(args.n, args.seed, typo_rate=args.typos):
+            out.write(json.dumps(sample, ensure_ascii=False) + "\n")
+    finally:
+        if args.out:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
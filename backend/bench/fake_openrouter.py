@@ -0,0 +1,204 @@
+"""
+Local stand-in for the OpenRouter chat-completions API.
+
+Answers POST /api/v1/chat/completions with a canned triage report after a
+configurable delay (as SSE chunks when the request sets ``"stream": true``),
+over HTTP/1.1 keep-alive (optionally TLS). Failure injection for load tests:
+
+  --error-rate      fraction of calls answered 500/429 with an error body
+  --malformed-rate  fraction of 200s whose content is not parseable JSON
+                    (chatty prose, or a report cut off mid-object)
+  --jitter          ± uniform random spread added to --latency
+
+GET /stats returns accepted connections, requests and injected failures so
+benchmarks can show how many handshakes a client paid for.
+
+    python bench/fake_openrouter.py --port 8089 --latency 0.2 --error-rate 0.05
+    OPENROUTER_URL=http://127.0.0.1:8089/api/v1/chat/completions python app.py
+"""
+
+import argparse
+import json
+import random
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPORT = {
+    "urgency": "medium",
+    "urgencyText": "Viral Fever – Consult a Doctor",
+    "redFlags": "Fever above 103 °F, rash, bleeding gums, confusion",
+    "advice": "1. Paracetamol 500 mg every 6 hours.\n2. Drink ORS.\n3. Rest.",
+    "possibleCauses": "Viral infection, early dengue, or seasonal flu",
+    "whyHappening": "Your immune system raises body temperature to fight germs.",
+    "homeRemedies": "Tulsi tea with honey.",
+    "timeline": "3-5 days; blood test if no improvement by day 3.",
+}
+
+# what a model returns when it ignores "output ONLY a raw JSON object"
+MALFORMED = [
+    "I'm sorry, but I can't provide a diagnosis. Please consult a doctor.",
+    json.dumps(REPORT)[:120],                              # truncated generation
+    "Here is the report:\n```json\n{urgency: medium, advice: rest}\n```",
+]
+
+
+class FakeOpenRouterServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 4096          # bursts of concurrent handshakes
+
+    def __init__(self, addr, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, malformed_rate: float = 0.0, seed: int = None):
+        super().__init__(addr, _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.rng = random.Random(seed)
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+        self.malformed = 0
+        self._lock = threading.Lock()
+
+    def count(self, attr: str):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def draw(self) -> tuple:
+        """(delay, outcome) for one call; outcome is "ok", "error" or "malformed"."""
+        with self._lock:
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            roll = self.rng.random()
+        if roll < self.error_rate:
+            return delay, "error"
+        if roll < self.error_rate + self.malformed_rate:
+            return delay, "malformed"
+        return delay, "ok"
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"connections": self.connections, "requests": self.requests,
+                    "errors": self.errors, "malformed": self.malformed}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"      # keep-alive
+    disable_nagle_algorithm = True     # headers and body go out in separate writes
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path != "/stats":
+            self.send_error(404)
+            return
+        self._send_json(self.server.stats())
+
+    def _send_json(self, obj: dict, status: int = 200):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self.server.count("requests")
+        delay, outcome = self.server.draw()
+        if delay:
+            time.sleep(delay)
+
+        if outcome == "error":
+            self.server.count("errors")
+            status = self.server.rng.choice((500, 502, 429))
+            self._send_json({"error": {"code": status, "message": "injected failure"}}, status)
+            return
+        if outcome == "malformed":
+            self.server.count("malformed")
+            content = self.server.rng.choice(MALFORMED)
+        else:
+            content = json.dumps(REPORT, ensure_ascii=False)
+
+        if request.get("stream"):
+            self._send_stream(content)
+            return
+        prompt = sum(len(m.get("content", "")) for m in request.get("messages", ()))
+        self._send_json({
+            "id": "fake-completion",
+            "model": request.get("model", "fake/model"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            # ~4 characters per token, as OpenRouter reports for Latin text
+            "usage": {"prompt_tokens": prompt // 4, "completion_tokens": len(content) // 4},
+        })
+
+    def _send_stream(self, content: str, chunk_chars: int = 12):
+        """SSE completion in the OpenRouter/OpenAI format, chunked encoding."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(data: str):
+            raw = data.encode()
+            self.wfile.write(f"{len(raw):x}\r\n".encode() + raw + b"\r\n")
+
+        chunk(": OPENROUTER PROCESSING\n\n")
+        for i in range(0, len(content), chunk_chars):
+            delta = {"choices": [{"index": 0, "delta": {"content": content[i:i + chunk_chars]}}]}
+            chunk(f"data: {json.dumps(delta)}\n\n")
+        chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 certfile: str = None, keyfile: str = None, **faults) -> FakeOpenRouterServer:
+    """Start the stand-in on a background thread; ``server.url`` is its endpoint.
+    *faults*: jitter, error_rate, malformed_rate, seed (see FakeOpenRouterServer)."""
+    server = FakeOpenRouterServer((host, port), latency=latency, **faults)
+    scheme = "http"
+    if certfile:
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ctx.load_cert_chain(certfile, keyfile)
+        server.socket = ctx.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    server.url = f"{scheme}://{host}:{server.server_address[1]}/api/v1/chat/completions"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenRouter stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± seconds of random spread")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction answered 5xx/429")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="fraction answered with non-JSON content")
+    parser.add_argument("--seed", type=int, help="make injected failures reproducible")
+    parser.add_argument("--certfile")
+    parser.add_argument("--keyfile")
+    args = parser.parse_args()
+
+    server = start_server(args.host, args.port, args.latency, args.certfile, args.keyfile,
+                          jitter=args.jitter, error_rate=args.error_rate,
+                          malformed_rate=args.malformed_rate, seed=args.seed)
+    print(f"fake OpenRouter listening on {server.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+End-to-end load generator: the Flask app under gunicorn, fully offline.
+
+Starts ``gunicorn app:app`` (and, in ``ai`` mode, bench/fake_openrouter.py
+with the requested latency and failure rates), drives it with keep-alive
+clients replaying the synthetic corpus for a fixed duration, and reports
+requests/s, p50/p95/p99 latency, status codes and what the stand-in saw.
+
+    cd backend
+    python bench/loadgen.py --mode rules --duration 10
+    python bench/loadgen.py --mode ai --latency 0.3 --error-rate 0.05 --malformed-rate 0.02
+    python bench/loadgen.py --target http://127.0.0.1:5000     # an already-running server
+
+Gates for CI: ``--max-p99 MS`` / ``--min-rps N`` exit 1 when missed, and
+``--json FILE`` writes the full report.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from corpus import generate        # noqa: E402
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(host: str, port: int, path: str, proc: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise SystemExit(f"process exited with {proc.returncode} before becoming ready")
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", path)
+            if conn.getresponse().status < 500:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f"{host}:{port}{path} not ready after {timeout}s")
+
+
+def get_json(host: str, port: int, path: str) -> dict:
+    try:
+        conn = http.client.HTTPConnection(host, port, timeout=5)
+        conn.request("GET", path)
+        return json.loads(conn.getresponse().read())
+    except (OSError, ValueError):
+        return {}
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.lock = threading.Lock()
+
+    def add(self, latency: float, status):
+        with self.lock:
+            self.latencies.append(latency)
+            self.statuses[status] += 1
+
+
+def client(host: str, port: int, path: str, bodies: list, offset: int,
+           warm_until: float, stop_at: float, stats: Stats):
+    """One keep-alive connection replaying *bodies* until *stop_at*."""
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    headers = {"Content-Type": "application/json"}
+    i = offset
+    while True:
+        start = time.perf_counter()
+        if start >= stop_at:
+            break
+        try:
+            conn.request("POST", path, bodies[i % len(bodies)], headers)
+            resp = conn.getresponse()
+            resp.read()
+            status = resp.status
+        except (OSError, http.client.HTTPException) as exc:
+            status = type(exc).__name__
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=60)
+        if start >= warm_until:
+            stats.add(time.perf_counter() - start, status)
+        i += 1
+    conn.close()
+
+
+def start_services(args) -> tuple:
+    """Spawn the fake OpenRouter (ai mode) and gunicorn; returns (procs, host, port)."""
+    procs = []
+    env = dict(os.environ, KB_RELOAD_INTERVAL="3600")
+    env.pop("OPENROUTER_API_KEY", None)
+
+    if args.mode == "ai":
+        fake_port = free_port()
+        procs.append(subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(__file__), "fake_openrouter.py"),
+             "--port", str(fake_port), "--latency", str(args.latency), "--jitter", str(args.jitter),
+             "--error-rate", str(args.error_rate), "--malformed-rate", str(args.malformed_rate),
+             "--seed", str(args.seed)],
+            stdout=subprocess.DEVNULL))
+        wait_ready("127.0.0.1", fake_port, "/stats", procs[-1])
+        env.update(OPENROUTER_API_KEY="bench-key",
+                   OPENROUTER_URL=f"http://127.0.0.1:{fake_port}/api/v1/chat/completions")
+        args.fake_port = fake_port
+        if not args.cache:
+            env["AI_CACHE_SIZE"] = "0"
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+
+    port = free_port()
+    procs.append(subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-b", f"127.0.0.1:{port}", "-w", str(args.workers),
+         "--threads", str(args.threads), "--log-level", "warning", "app:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL))
+    wait_ready("127.0.0.1", port, "/api/health", procs[-1], timeout=60)
+    return procs, "127.0.0.1", port
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=("rules", "ai"), default="rules",
+                        help="rules: no API key; ai: OpenRouter calls go to the local stand-in")
+    parser.add_argument("--target", help="load an existing server instead of starting one")
+    parser.add_argument("--endpoint", default="/api/analyze-symptoms")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--corpus", type=int, default=2000, help="corpus size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake OpenRouter seconds")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--cache", action="store_true", help="keep the AI response cache on")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the app (repeatable)")
+    parser.add_argument("--max-p99", type=float, help="fail if p99 exceeds this many ms")
+    parser.add_argument("--min-rps", type=float, help="fail if throughput is below this")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    procs = []
+    if args.target:
+        url = urlsplit(args.target)
+        host, port = url.hostname, url.port or 80
+    else:
+        procs, host, port = start_services(args)
+
+    bodies = [json.dumps({"symptoms": s["symptoms"], "language": s["language"]}, ensure_ascii=False)
+              .encode("utf-8") for s in generate(args.corpus, args.seed)]
+    stats = Stats()
+    try:
+        begin = time.perf_counter()
+        warm_until, stop_at = begin + args.warmup, begin + args.warmup + args.duration
+        threads = [threading.Thread(target=client, args=(host, port, args.endpoint, bodies,
+                                                         i * 997, warm_until, stop_at, stats))
+                   for i in range(args.concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - max(warm_until, begin)
+
+        lat = sorted(stats.latencies)
+        report = {
+            "mode": "target" if args.target else args.mode,
+            "endpoint": args.endpoint,
+            "concurrency": args.concurrency,
+            "workers": None if args.target else args.workers,
+            "threads": None if args.target else args.threads,
+            "requests": len(lat),
+            "rps": round(len(lat) / elapsed, 1),
+            "p50_ms": round(percentile(lat, 0.50) * 1e3, 2),
+            "p95_ms": round(percentile(lat, 0.95) * 1e3, 2),
+            "p99_ms": round(percentile(lat, 0.99) * 1e3, 2),
+            "max_ms": round((lat[-1] if lat else 0) * 1e3, 2),
+            "statuses": {str(k): v for k, v in sorted(stats.statuses.items(), key=str)},
+            "health": get_json(host, port, "/api/health"),
+        }
+        if getattr(args, "fake_port", None):
+            report["fakeOpenRouter"] = get_json("127.0.0.1", args.fake_port, "/stats")
+    finally:
+        for p in reversed(procs):
+            p.terminate()
+        for p in procs:
+            p.wait(timeout=30)
+
+    print(f"{report['requests']} requests in {elapsed:.1f}s at concurrency {args.concurrency}: "
+          f"{report['rps']} req/s")
+    print(f"latency ms  p50 {report['p50_ms']}  p95 {report['p95_ms']}  "
+          f"p99 {report['p99_ms']}  max {report['max_ms']}")
+    print(f"statuses    {report['statuses']}")
+    if "fakeOpenRouter" in report:
+        print(f"openrouter  {report['fakeOpenRouter']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    failed = []
+    if args.max_p99 is not None and report["p99_ms"] > args.max_p99:
+        failed.append(f"p99 {report['p99_ms']} ms > {args.max_p99} ms")
+    if args.min_rps is not None and report["rps"] < args.min_rps:
+        failed.append(f"{report['rps']} req/s < {args.min_rps} req/s")
+    if failed:
+        print("FAIL: " + "; ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
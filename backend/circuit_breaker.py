@@ -0,0 +1,149 @@
+"""
+Circuit breaker and adaptive timeout for the OpenRouter dependency.
+
+CircuitBreaker – tracks the outcome of the last ``window`` calls:
+
+  closed     calls flow; once ≥ ``min_calls`` outcomes are recorded and the
+             failure rate reaches ``failure_rate`` the breaker opens
+  open       calls are rejected immediately (callers use the rule engine)
+             for ``open_seconds``
+  half_open  up to ``half_open_probes`` trial calls are let through; a
+             success closes the breaker, a failure re-opens it
+
+AdaptiveTimeout – derives the read timeout from observed latencies
+(p99 × ``multiplier``, clamped to [floor, ceiling]) so a degraded upstream
+is cut off at a realistic bound instead of the worst-case 30 s.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the breaker is open."""
+
+
+def _percentile(sorted_values, q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class CircuitBreaker:
+    def __init__(self, failure_rate: float = 0.5, min_calls: int = 5, window: int = 20,
+                 open_seconds: float = 30.0, half_open_probes: int = 1):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._outcomes = deque(maxlen=window)     # True = failure
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.rejected = self.trips = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._advance(time.monotonic())
+            return self._state
+
+    def allow(self) -> bool:
+        """Reserve permission for one upstream call."""
+        with self._lock:
+            self._advance(time.monotonic())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._close()
+            else:
+                self._outcomes.append(False)
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append(True)
+            if (self._state == CLOSED and len(self._outcomes) >= self.min_calls
+                    and self._rate() >= self.failure_rate):
+                self._open()
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._advance(time.monotonic())
+            return {
+                "state": self._state,
+                "failureRate": round(self._rate(), 3),
+                "calls": len(self._outcomes),
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+
+    # ── internals (lock held) ────────────────────────────────────
+    def _rate(self) -> float:
+        return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def _advance(self, now: float):
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self.trips += 1
+        logger.warning(f"[Breaker] OPEN for {self.open_seconds:.0f}s (failure rate {self._rate():.0%})")
+
+    def _close(self):
+        self._state = CLOSED
+        self._outcomes.clear()
+        logger.info("[Breaker] CLOSED – upstream recovered")
+
+
+class AdaptiveTimeout:
+    """Read timeout that follows the observed latency distribution."""
+
+    def __init__(self, floor: float = 8.0, ceiling: float = 30.0,
+                 multiplier: float = 1.5, min_samples: int = 20, window: int = 200):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def current(self) -> float:
+        """Ceiling until enough samples exist, then clamp(p99 × multiplier)."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return self.ceiling
+            p99 = _percentile(sorted(self._samples), 0.99)
+        return min(self.ceiling, max(self.floor, p99 * self.multiplier))
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+        out = {"readTimeout": round(self.current(), 2), "samples": len(samples)}
+        if samples:
+            out.update(p50=round(_percentile(samples, 0.50), 3),
+                       p95=round(_percentile(samples, 0.95), 3),
+                       p99=round(_percentile(samples, 0.99), 3))
+        return out
@@ -0,0 +1,74 @@
+"""
+Production gunicorn profile for the triage API (picked up automatically when
+gunicorn runs in this directory)::
+
+    cd backend
+    gunicorn app:app
+    GUNICORN_WORKERS=auto GUNICORN_THREADS=32 gunicorn app:app
+
+* The app is imported once in the master (``preload_app``): the compiled
+  knowledge base, rule index, TF-IDF matrix and precomposed answers are built
+  before the fork and shared copy-on-write by every worker. ``gc.freeze()``
+  before each fork keeps the collector from touching – and so copying – those
+  pages later.
+* Threaded workers (``gthread``): an OpenRouter call blocks its thread for
+  seconds, so each worker carries GUNICORN_THREADS of them, while the worker
+  count follows the CPU cores (``auto`` = 2 × cores + 1).
+* Each worker then starts what can't cross a fork – the metrics publisher
+  and warm OpenRouter connections – in ``post_fork`` (app.init_worker).
+
+Graceful restart: ``kill -HUP <master>`` replaces the workers one by one,
+letting in-flight requests finish within GUNICORN_GRACEFUL_TIMEOUT; since
+the app is preloaded, new code needs ``kill -USR2`` (start a new master)
+followed by ``kill -QUIT`` to the old one. Knowledge-base updates need
+neither – workers pick up a recompiled conditions.kb on their own.
+"""
+
+import gc
+import os
+
+
+def _cores() -> int:
+    """CPUs this process may run on (container CPU sets included)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:          # not on Linux
+        return os.cpu_count() or 1
+
+
+def _workers(value: str) -> int:
+    return 2 * _cores() + 1 if value == "auto" else int(value)
+
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+
+# workers: a number or "auto"; WEB_CONCURRENCY is what Render/Heroku set
+workers = _workers(os.getenv("GUNICORN_WORKERS") or os.getenv("WEB_CONCURRENCY") or "auto")
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+
+# a worker busy on a full-length OpenRouter call (connect + read timeout) is not stuck
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# optional recycling of workers after N requests (0 = never)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+preload_app = True
+# tells app.py to leave per-process start-up to post_fork
+os.environ["GUNICORN_PRELOAD"] = "1"
+
+# heartbeat files in RAM: a disk-backed /tmp can stall workers under I/O load
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+
+def pre_fork(server, worker):
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import app
+    app.init_worker()
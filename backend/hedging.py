@@ -0,0 +1,66 @@
+"""
+Latency-budget hedging between AI and rule-based triage.
+
+When the AI answer misses its budget, the caller returns the rule result
+immediately with a refinement token; the still-running AI call is parked
+here so the client can fetch the refined answer later.
+
+Tokens look like ``<issued-hex>.<nonce>.<cache-key>``: the embedded AI cache
+key lets ANY worker answer the poll once the result reaches the shared cache
+tier, and the issue time lets it tell "still pending" from "expired".
+"""
+
+import secrets
+import threading
+import time
+
+
+class PendingRefinements:
+    """Per-worker registry of in-flight AI refinements (token → future)."""
+
+    def __init__(self, ttl: float = 300.0, max_pending: int = 1000):
+        self.ttl = ttl
+        self.max_pending = max_pending
+        self._pending = {}               # token → (expires_at, future)
+        self._lock = threading.Lock()
+
+    def add(self, future, cache_key: str) -> str:
+        now = time.time()
+        token = f"{int(now):x}.{secrets.token_urlsafe(9)}.{cache_key}"
+        with self._lock:
+            self._purge(now)
+            if len(self._pending) >= self.max_pending:
+                # drop the oldest – its client will fall back to the cache lookup
+                self._pending.pop(next(iter(self._pending)))
+            self._pending[token] = (now + self.ttl, future)
+        return token
+
+    def get(self, token: str):
+        """Return the parked future for *token* (None if not in this worker)."""
+        with self._lock:
+            entry = self._pending.get(token)
+        return entry[1] if entry else None
+
+    def discard(self, token: str):
+        with self._lock:
+            self._pending.pop(token, None)
+
+    def expired(self, token: str) -> bool:
+        """True if the token is malformed or older than the TTL."""
+        try:
+            issued = int(token.split(".", 1)[0], 16)
+        except ValueError:
+            return True
+        return time.time() > issued + self.ttl
+
+    @staticmethod
+    def cache_key(token: str) -> str:
+        return token.rsplit(".", 1)[-1]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _purge(self, now: float):
+        for token in [t for t, (exp, _) in self._pending.items() if exp <= now]:
+            del self._pending[token]
@@ -0,0 +1,308 @@
+"""
+Condition knowledge base: external source file → compiled binary index.
+
+The editable source is ``knowledge/conditions.json``::
+
+    {"version": "...",
+     "languages": {"en": {"actions": {...}, "unrecognised": {...}, "emergency": {...}},
+                   "hi": ..., "mr": ...},
+     "red_flag_phrases": {"en": [...], "hi": [...], "mr": [...]},
+     "conditions": {"<name>": {"keywords": [...], "label": ..., ...,
+                               "i18n": {"hi": {"keywords": [...], "label": ..., ...}, "mr": ...}}}}
+
+``languages`` holds the fixed response texts of each supported language
+(urgency actions, the "unrecognised symptoms" answer, the emergency answer);
+a condition's ``i18n`` block gives its Devanagari/romanised keywords and
+translated texts, with any missing field falling back to English.
+``red_flag_phrases`` is the curated danger-sign lexicon that, together with
+the ``high``-urgency keywords, sends an input straight to the emergency
+answer (see rule_index.EmergencyClassifier).
+
+It is compiled OFFLINE into ``knowledge/conditions.kb``:
+
+    python knowledge_base.py compile [--src SRC] [--out OUT]
+
+Binary layout (little-endian)::
+
+    magic "GHKB" | u16 format | u16 reserved | u32 meta_len | u32 blob_len
+    meta  – UTF-8 JSON: version, language texts, per-condition
+            keywords/label/urgency (per language), byte spans of every
+            text field (per language), and the precompiled RuleIndex and
+            EmergencyClassifier tables
+    blob  – UTF-8 text fields, including the pre-joined fragments used to
+            compose responses ("▸ <label>: <causes>", "── <label> ──\\n<advice>", …)
+
+Workers ``mmap`` the file read-only, so the text blob lives once in the page
+cache and is shared by every gunicorn worker; fields are decoded on access.
+The compiler writes to a temp file and ``os.replace``s it, so a new version
+appears atomically and ``KnowledgeBase.current()`` swaps to it on its next
+stat check – no restart needed.
+"""
+
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections.abc import Mapping
+
+from rule_index import EmergencyClassifier, RuleIndex
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOURCE = os.path.join(BASE_DIR, "knowledge", "conditions.json")
+DEFAULT_PATH = os.path.join(BASE_DIR, "knowledge", "conditions.kb")
+
+MAGIC = b"GHKB"
+FORMAT_VERSION = 7
+HEADER = struct.Struct("<4sHHII")
+
+# plain text fields copied from the source
+TEXT_FIELDS = ("causes", "mechanism", "advice", "home_remedies", "red_flags", "timeline")
+
+# pre-joined fragments: the per-condition pieces _analyze_with_rules stitches together
+JOINED_FIELDS = {
+    "causes_item":    "▸ {label}: {causes}",
+    "mechanism_item": "▸ {label}: {mechanism}",
+    "advice_block":   "── {label} ──\n{advice}",
+    "remedies_item":  "▸ {label}: {home_remedies}",
+    "timeline_item":  "▸ {label}: {timeline}",
+}
+
+
+class KnowledgeBaseError(Exception):
+    """Raised for a missing, corrupt or incompatible compiled knowledge base."""
+
+
+def load_source(path: str = DEFAULT_SOURCE) -> dict:
+    """Read the editable JSON source: ``{"version": ..., "conditions": {...}}``."""
+    with open(path, encoding="utf-8") as f:
+        doc = json.load(f)
+    if not isinstance(doc.get("conditions"), dict) or not doc["conditions"]:
+        raise KnowledgeBaseError(f"{path}: 'conditions' must be a non-empty object")
+    if "en" not in (doc.get("languages") or {}):
+        raise KnowledgeBaseError(f"{path}: 'languages' must include 'en'")
+    return doc
+
+
+def compile_kb(src: str = DEFAULT_SOURCE, out: str = DEFAULT_PATH) -> str:
+    """Compile the JSON source into the binary index at *out* (atomic replace)."""
+    doc = load_source(src)
+    conditions = doc["conditions"]
+    languages = doc["languages"]
+
+    blob = bytearray()
+
+    def store(c: dict) -> dict:
+        spans = {}
+        texts = {f: c[f] for f in TEXT_FIELDS}
+        texts.update({f: tpl.format_map(c) for f, tpl in JOINED_FIELDS.items()})
+        for field, text in texts.items():
+            data = text.encode("utf-8")
+            spans[field] = [len(blob), len(data)]
+            blob.extend(data)
+        return spans
+
+    entries = []
+    for name, c in conditions.items():
+        i18n = c.get("i18n") or {}
+        local = {}
+        for lang in languages:
+            if lang != "en":
+                lc = {**c, **i18n.get(lang, {})}     # untranslated fields stay English
+                local[lang] = {"label": lc["label"], "keywords": i18n.get(lang, {}).get("keywords", []),
+                               "spans": store(lc)}
+        entries.append({
+            "name": name,
+            "keywords": c["keywords"],
+            "label": c["label"],
+            "urgency": c["urgency"],
+            "spans": store(c),
+            "i18n": local,
+        })
+
+    meta = json.dumps({
+        "version": str(doc.get("version", "")),
+        "languages": languages,
+        "conditions": entries,
+        "index": RuleIndex(conditions).to_tables(),
+        "emergency": EmergencyClassifier(conditions, [
+            p for phrases in (doc.get("red_flag_phrases") or {}).values() for p in phrases
+        ]).to_tables(),
+    }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    tmp = f"{out}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(meta), len(blob)))
+        f.write(meta)
+        f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, out)
+    return out
+
+
+class MappedCondition(Mapping):
+    """Read-only condition record whose text fields are decoded on demand
+    from the shared mmap; behaves like the original CONDITIONS dict entries."""
+
+    __slots__ = ("_fields", "_spans", "_blob")
+
+    def __init__(self, entry: dict, blob: memoryview):
+        self._fields = {"keywords": entry["keywords"], "label": entry["label"],
+                        "urgency": entry["urgency"]}
+        self._spans = entry["spans"]
+        self._blob = blob
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return self._fields[key]
+        off, length = self._spans[key]
+        return str(self._blob[off:off + length], "utf-8")
+
+    def __iter__(self):
+        yield from self._fields
+        yield from self._spans
+
+    def __len__(self):
+        return len(self._fields) + len(self._spans)
+
+
+class Locale:
+    """Rule-engine texts for one response language: the conditions with
+    their translated fields, urgency actions and the no-match answer."""
+
+    __slots__ = ("lang", "conditions", "actions", "unrecognised", "emergency")
+
+    def __init__(self, lang: str, conditions: dict, texts: dict):
+        self.lang = lang
+        self.conditions = conditions
+        self.actions = texts["actions"]
+        self.unrecognised = texts["unrecognised"]
+        self.emergency = texts["emergency"]
+
+
+class CompiledKB:
+    """One loaded version of the compiled knowledge base."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(buf) < HEADER.size:
+            raise KnowledgeBaseError(f"{path}: truncated header")
+        magic, fmt, _, meta_len, blob_len = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise KnowledgeBaseError(f"{path}: not a format-{FORMAT_VERSION} knowledge base")
+        if HEADER.size + meta_len + blob_len != len(buf):
+            raise KnowledgeBaseError(f"{path}: size mismatch")
+
+        meta = json.loads(bytes(buf[HEADER.size:HEADER.size + meta_len]))
+        blob = memoryview(buf)[HEADER.size + meta_len:]
+
+        self.path = path
+        self.loaded = time.monotonic()     # orders versions for derived caches
+        self.signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+        self.version = meta["version"]
+        self.conditions = {e["name"]: MappedCondition(e, blob) for e in meta["conditions"]}
+        self.index = RuleIndex(self.conditions, meta["index"])
+        self.emergency = EmergencyClassifier(tables=meta["emergency"])
+
+        self.locales = {"en": Locale("en", self.conditions, meta["languages"]["en"])}
+        for lang, texts in meta["languages"].items():
+            if lang != "en":
+                local = {e["name"]: MappedCondition(dict(e, **e["i18n"][lang]), blob)
+                         for e in meta["conditions"]}
+                self.locales[lang] = Locale(lang, local, texts)
+
+    def locale(self, lang: str) -> Locale:
+        """Texts for *lang*, or English when the language isn't in the base."""
+        return self.locales.get(lang) or self.locales["en"]
+
+
+class KnowledgeBase:
+    """Holder for the live CompiledKB that hot-swaps to a newer file version.
+
+    ``current()`` stats the file at most every *check_interval* seconds; when
+    the compiled file has been replaced, the new version is loaded and swapped
+    in with a single reference assignment, so in-flight requests keep using
+    the version they started with.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, source: str = DEFAULT_SOURCE,
+                 check_interval: float = 5.0):
+        self.path = path
+        self.source = source
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+
+        if self._is_stale():
+            compile_kb(source, path)
+        try:
+            self._kb = CompiledKB(path)
+        except KnowledgeBaseError:
+            if not os.path.exists(source):
+                raise
+            compile_kb(source, path)      # e.g. left over from an older format
+            self._kb = CompiledKB(path)
+
+    def _is_stale(self) -> bool:
+        """Compiled file missing, or older than its source (dev convenience)."""
+        if not os.path.exists(self.path):
+            return True
+        return (os.path.exists(self.source)
+                and os.path.getmtime(self.source) > os.path.getmtime(self.path))
+
+    def check_due(self) -> bool:
+        """True when the next ``current()`` will stat the file (and may load
+        a new version) – for callers that want to do that off their thread."""
+        return time.monotonic() >= self._next_check
+
+    def current(self) -> CompiledKB:
+        now = time.monotonic()
+        if now >= self._next_check and self._lock.acquire(blocking=False):
+            try:
+                self._next_check = now + self.check_interval
+                self._maybe_reload()
+            finally:
+                self._lock.release()
+        return self._kb
+
+    def _maybe_reload(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return
+        if (st.st_ino, st.st_mtime_ns, st.st_size) == self._kb.signature:
+            return
+        try:
+            kb = CompiledKB(self.path)
+        except (OSError, ValueError, KnowledgeBaseError) as exc:
+            logger.warning(f"[KB] keeping version {self._kb.version}: {exc}")
+            return
+        self._kb = kb
+        logger.info(f"[KB] loaded version {kb.version} ({len(kb.conditions)} conditions)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GramHealth knowledge-base tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    comp = sub.add_parser("compile", help="compile the JSON source into the binary index")
+    comp.add_argument("--src", default=DEFAULT_SOURCE)
+    comp.add_argument("--out", default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    if args.cmd == "compile":
+        out = compile_kb(args.src, args.out)
+        kb = CompiledKB(out)
+        print(f"compiled {len(kb.conditions)} conditions, languages {'/'.join(kb.locales)} "
+              f"(version {kb.version}) → {out} [{os.path.getsize(out)} bytes]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Prometheus metrics for both backends, in the text exposition format.
+
+A small, dependency-free subset of the client library: counters, gauges and
+histograms with labels, rendered by ``render()`` for a ``/metrics`` route::
+
+    STAGE_SECONDS.observe(0.0004, "rule_scoring")
+    with STAGE_SECONDS.time("openrouter"):
+        ...
+
+The metrics every service shares are defined here; service-specific ones
+next to the code they measure.
+
+Each gunicorn worker counts on its own. With ``METRICS_DIR`` set (see
+``share()``), every worker writes its counts to that directory every few
+seconds and ``render()`` adds up all workers, so a scrape that lands on any
+one worker sees the whole service.
+"""
+
+import glob
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 50 µs (a rule lookup) … 30 s (a slow model)
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Registry:
+    """The metrics of one process, plus (optionally) the other workers'."""
+
+    def __init__(self):
+        self.metrics = []
+        self.shared_dir = None
+        self.stale_after = 0.0
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def snapshot(self) -> dict:
+        return {m.name: m.snapshot() for m in self.metrics}
+
+    def share(self, directory: str, interval: float = 5.0):
+        """Publish this worker's counts to *directory* every *interval*
+        seconds and merge the other workers' files into ``render()``."""
+        os.makedirs(directory, exist_ok=True)
+        self.shared_dir = directory
+        self.stale_after = interval * 6     # a worker that stopped writing is gone
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+
+        def publish():
+            while True:
+                tmp = f"{path}.tmp"
+                with open(tmp, "w") as f:
+                    json.dump(self.snapshot(), f)
+                os.replace(tmp, path)
+                time.sleep(interval)
+
+        threading.Thread(target=publish, name="metrics-share", daemon=True).start()
+
+    def _others(self) -> list:
+        if not self.shared_dir:
+            return []
+        own = f"metrics-{os.getpid()}.json"
+        now = time.time()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.shared_dir, "metrics-*.json")):
+            if os.path.basename(path) == own:
+                continue
+            try:
+                if now - os.path.getmtime(path) > self.stale_after:
+                    continue
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue        # replaced or removed while we looked
+        return snapshots
+
+    def render(self) -> str:
+        others = self._others()
+        lines = []
+        for m in self.metrics:
+            values = m.snapshot()
+            for other in others:
+                m.merge(values, other.get(m.name, {}))
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.lines(values))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames=(), registry: Registry = REGISTRY):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        # label values (joined by \x1f) → value; an unlabelled metric starts at 0
+        self._values = {} if self.labelnames else {"": 0}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels) -> str:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return "\x1f".join(map(str, labels))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {k: (list(v) if isinstance(v, list) else v) for k, v in self._values.items()}
+
+    def merge(self, into: dict, other: dict):
+        for key, value in other.items():
+            into[key] = into.get(key, 0) + value
+
+    def lines(self, values: dict) -> list:
+        out = []
+        for key, value in sorted(values.items()):
+            labels = key.split("\x1f") if key else ()
+            out.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return out
+
+
+class Counter(_Metric):
+    """Monotonic count; by convention the name ends in ``_total``."""
+
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """A value that goes up and down (e.g. open sessions)."""
+
+    kind = "gauge"
+
+    def inc(self, *labels, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Bucketed durations (seconds) with ``_bucket``/``_sum``/``_count``."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS,
+                 registry: Registry = REGISTRY):
+        super().__init__(name, help, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+
+    def observe(self, value: float, *labels):
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # one slot per bucket, one for +Inf, then sum
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[i] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def merge(self, into: dict, other: dict):
+        for key, counts in other.items():
+            mine = into.get(key)
+            into[key] = counts if mine is None else [a + b for a, b in zip(mine, counts)]
+
+    def lines(self, values: dict) -> list:
+        out = []
+        bounds = self.buckets + (math.inf,)
+        for key, counts in sorted(values.items()):
+            labels = key.split("\x1f") if key else ()
+            cumulative = 0
+            for bound, n in zip(bounds, counts):
+                cumulative += n
+                le = f'le="{_number(bound)}"'
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(counts[-1])}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return out
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+def share(directory: str, interval: float = 5.0):
+    REGISTRY.share(directory, interval)
+
+
+# ── metrics shared by the triage API and the voice agent ───────────────
+STAGE_SECONDS = Histogram(
+    "gramhealth_stage_duration_seconds",
+    "Time spent per processing stage",
+    ("stage",),
+)
+TRIAGE_PATH = Counter(
+    "gramhealth_triage_path_total",
+    "Triage answers by endpoint and the path that produced them (rules or ai)",
+    ("endpoint", "path"),
+)
+FALLBACKS = Counter(
+    "gramhealth_fallbacks_total",
+    "AI-path requests answered by the rule engine instead, by reason",
+    ("reason",),
+)
+JSON_PARSE_FAILURES = Counter(
+    "gramhealth_json_parse_failures_total",
+    "Upstream model output that could not be parsed as JSON, by source",
+    ("source",),
+)
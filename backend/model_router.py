@@ -0,0 +1,123 @@
+"""
+Tiered model routing: which model (if any) answers a triage input.
+
+The rule scores are computed anyway, so the router uses them, the input length
+and the language to pick one of three tiers::
+
+    rules   no model – the rule engine is confident (a clear single match on
+            a short input) or the language is answered offline
+    small   a fast small model with a smaller token budget – short inputs the
+            rules partly recognise, in languages the small model handles
+    large   OPENROUTER_MODEL with the full budget – everything else (long or
+            multi-condition descriptions, unrecognised symptoms)
+
+Each tier counts its inputs, OpenRouter latency, tokens and estimated cost in
+/metrics (``gramhealth_model_tier_*``), so thresholds can be tuned against
+real traffic; bench/bench_routing.py shows the split on the labelled corpus.
+"""
+
+import metrics
+
+MODEL_TIER = metrics.Counter(
+    "gramhealth_model_tier_total",
+    "AI-path triage inputs by routed tier (rules, small, large)",
+    ("tier",),
+)
+MODEL_TIER_SECONDS = metrics.Histogram(
+    "gramhealth_model_tier_duration_seconds",
+    "OpenRouter round trips by model tier",
+    ("tier",),
+)
+MODEL_TOKENS = metrics.Counter(
+    "gramhealth_model_tokens_total",
+    "Tokens reported by OpenRouter, by model tier and kind (prompt, completion)",
+    ("tier", "kind"),
+)
+MODEL_COST = metrics.Counter(
+    "gramhealth_model_cost_usd_total",
+    "Estimated OpenRouter spend by model tier (configured USD per 1M tokens)",
+    ("tier",),
+)
+
+
+class Tier:
+    """One routing target: a model (None = rule engine), its token budget
+    and its price in USD per million prompt / completion tokens."""
+
+    __slots__ = ("name", "model", "max_tokens", "price_in", "price_out")
+
+    def __init__(self, name: str, model: str = None, max_tokens: int = 0,
+                 price_in: float = 0.0, price_out: float = 0.0):
+        self.name = name
+        self.model = model
+        self.max_tokens = max_tokens
+        self.price_in = price_in
+        self.price_out = price_out
+
+    def account(self, seconds: float, usage: dict = None):
+        """Record one OpenRouter call (``usage`` as in the API response)."""
+        MODEL_TIER_SECONDS.observe(seconds, self.name)
+        if not usage:
+            return
+        prompt = usage.get("prompt_tokens") or 0
+        completion = usage.get("completion_tokens") or 0
+        MODEL_TOKENS.inc(self.name, "prompt", amount=prompt)
+        MODEL_TOKENS.inc(self.name, "completion", amount=completion)
+        cost = (prompt * self.price_in + completion * self.price_out) / 1e6
+        if cost:
+            MODEL_COST.inc(self.name, amount=cost)
+
+    def describe(self) -> dict:
+        return {"model": self.model, "maxTokens": self.max_tokens}
+
+
+class ModelRouter:
+    """Pick a Tier from ranked ``(score, name, condition)`` matches.
+
+    rules  – *lang* in *rules_languages* and top score ≥ *rules_languages_min_score*;
+             or (when *rules_min_score* > 0) top score ≥ *rules_min_score*, at
+             most *rules_max_words* words, and the top condition leads the
+             runner-up by a factor of *rules_margin*
+    small  – a small model is configured, the rules matched 1–2 conditions,
+             at most *small_max_words* words, *lang* in *small_languages*
+    large  – otherwise
+    """
+
+    def __init__(self, large: Tier, small: Tier = None,
+                 rules_languages=(), rules_languages_min_score: int = 3,
+                 rules_min_score: int = 0, rules_margin: float = 2.0, rules_max_words: int = 8,
+                 small_max_words: int = 20, small_languages=("en",)):
+        self.rules = Tier("rules")
+        self.small = small if small is not None and small.model else None
+        self.large = large
+        self.rules_languages = frozenset(rules_languages)
+        self.rules_languages_min_score = rules_languages_min_score
+        self.rules_min_score = rules_min_score
+        self.rules_margin = rules_margin
+        self.rules_max_words = rules_max_words
+        self.small_max_words = small_max_words
+        self.small_languages = frozenset(small_languages)
+
+    def route(self, matches: list, symptoms: str, lang: str) -> Tier:
+        top = matches[0][0] if matches else 0
+        if lang in self.rules_languages and top >= self.rules_languages_min_score:
+            return self.rules
+
+        words = len(symptoms.split())
+        if (self.rules_min_score and top >= self.rules_min_score
+                and words <= self.rules_max_words
+                and (len(matches) == 1 or top >= self.rules_margin * matches[1][0])):
+            return self.rules
+
+        if (self.small is not None and 0 < len(matches) <= 2
+                and words <= self.small_max_words and lang in self.small_languages):
+            return self.small
+        return self.large
+
+    def describe(self) -> dict:
+        return {
+            "small": self.small.describe() if self.small else None,
+            "large": self.large.describe(),
+            "rulesLanguages": sorted(self.rules_languages),
+            "rulesMinScore": self.rules_min_score,
+        }
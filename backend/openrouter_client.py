@@ -0,0 +1,81 @@
+"""
+Managed HTTP client for OpenRouter.
+
+One ``requests.Session`` per worker process with a sized urllib3 connection
+pool, so triage requests reuse warm keep-alive TCP+TLS connections instead of
+paying a fresh handshake to openrouter.ai on every call. Connect and read
+timeouts are separate: a dead host fails fast while a slow generation still
+gets its full read budget.
+
+The session is created lazily and re-created after ``fork()`` (sockets must
+never be shared between gunicorn workers). ``warm()`` opens connections in
+the background when a worker starts, so its first triages skip the handshake.
+"""
+
+import logging
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class PooledClient:
+    """Per-process keep-alive client for a single upstream base URL."""
+
+    def __init__(self, url: str, pool_size: int = 16,
+                 connect_timeout: float = 5.0, read_timeout: float = 30.0):
+        self.url = url
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def timeout(self) -> tuple:
+        return (self.connect_timeout, self.read_timeout)
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    self._session = self._new_session()
+                    self._pid = os.getpid()
+        return self._session
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                              max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def post(self, **kwargs) -> requests.Response:
+        """POST to the upstream URL over a pooled connection."""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.post(self.url, **kwargs)
+
+    def warm(self, connections: int = 1):
+        """Open up to *connections* pooled connections on background threads.
+        Each sends a HEAD to the upstream URL; the status doesn't matter, only
+        that the TCP+TLS connection is left in the pool. Best effort."""
+        def connect():
+            try:
+                self.session.head(self.url, timeout=self.timeout).close()
+            except requests.RequestException as exc:
+                logger.warning(f"[OpenRouter] connection warm-up failed: {exc}")
+
+        for i in range(min(connections, self.pool_size)):
+            threading.Thread(target=connect, name=f"openrouter-warm-{i}", daemon=True).start()
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
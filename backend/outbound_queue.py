@@ -0,0 +1,167 @@
+"""
+Bounded outbound queue for one WebSocket direction of a voice session.
+
+The voice relay reads from two sockets and writes to two: browser → Gemini
+and Gemini → browser. Sending inline from the reader means a slow 3G client
+stalls the reads from Gemini, and a slow Gemini stalls the reads from the
+browser. Each direction therefore gets an ``OutboundQueue`` with its own
+writer task, and the readers only enqueue.
+
+Two kinds of messages, two policies:
+
+* audio is real-time: audio that can't be sent in time is worth nothing. It
+  is bounded by *max_audio_bytes*; when a new message would exceed it, the
+  oldest queued audio is dropped, so a client that falls behind hears the
+  current sentence rather than a growing backlog.
+* control (transcripts, turns, errors, stream-end markers) is never dropped.
+  At most *max_control* wait at a time; ``put_control`` blocks the producer
+  beyond that (backpressure), which only happens when the socket has stopped
+  draining altogether.
+
+Queued memory is therefore at most *max_audio_bytes* plus *max_control*
+messages, whatever the network does.
+
+If *send* fails, ``run`` closes the queue and re-raises: pending messages
+are discarded, further audio is ignored and ``put_control`` – including a
+producer already waiting for space – raises ``QueueClosedError``. The owner
+watches the writer task and tears the session down when it ends.
+
+    queue = OutboundQueue(websocket.send_text, max_audio_bytes=256 * 1024)
+    writer = asyncio.create_task(queue.run())
+    queue.put_audio(chunk)
+    await queue.put_control(message)
+"""
+
+import asyncio
+import time
+from collections import deque
+
+_AUDIO, _CONTROL = 0, 1
+
+
+class QueueClosedError(ConnectionError):
+    """The queue's writer has stopped; nothing more will be sent."""
+
+
+class OutboundQueue:
+    """Audio (droppable, oldest first) and control (never dropped) messages
+    for one socket, sent in order by ``run``. *send* is a coroutine function
+    taking one message (str or bytes; their ``len`` is what is counted);
+    *on_drop*, if given, is called with each dropped audio message."""
+
+    def __init__(self, send, max_audio_bytes: int = 256 * 1024, max_control: int = 32,
+                 on_drop=None):
+        self._send = send
+        self._on_drop = on_drop
+        self.max_audio_bytes = max_audio_bytes
+        self.max_control = max_control
+
+        self._items = deque()           # (kind, message, enqueued at)
+        self._ready = asyncio.Event()   # items waiting
+        self._control_space = asyncio.Event()
+        self._control_space.set()
+        self.audio_bytes = 0
+        self.control = 0
+        self.closed = False
+        self.error = None               # what made *send* fail, if it did
+
+        self.sent = 0
+        self.dropped = 0
+        self.dropped_bytes = 0
+        self.peak_audio_bytes = 0
+        self.max_wait = 0.0             # longest time a sent message spent queued, seconds
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put_audio(self, message):
+        """Queue an audio message, dropping the oldest queued audio to stay
+        within *max_audio_bytes*. Never blocks; ignored once closed."""
+        if self.closed:
+            return
+        size = len(message)
+        self._items.append((_AUDIO, message, time.monotonic()))
+        self.audio_bytes += size
+        if self.audio_bytes > self.max_audio_bytes:
+            self._drop_oldest_audio()
+        self.peak_audio_bytes = max(self.peak_audio_bytes, self.audio_bytes)
+        self._ready.set()
+
+    def _drop_oldest_audio(self):
+        kept = deque()
+        items = self._items
+        # the newest message always stays, even if it alone exceeds the budget
+        while self.audio_bytes > self.max_audio_bytes and len(items) > 1:
+            kind, message, queued = items.popleft()
+            if kind == _AUDIO:
+                self.audio_bytes -= len(message)
+                self.dropped += 1
+                self.dropped_bytes += len(message)
+                if self._on_drop is not None:
+                    self._on_drop(message)
+            else:
+                kept.append((kind, message, queued))
+        kept.extend(items)
+        self._items = kept
+
+    async def put_control(self, message):
+        """Queue a control message; waits while *max_control* are pending.
+        Raises QueueClosedError once the queue is closed."""
+        while not self.closed and self.control >= self.max_control:
+            self._control_space.clear()
+            await self._control_space.wait()
+        if self.closed:
+            raise QueueClosedError(f"outbound queue closed: {self.error or 'writer stopped'}")
+        self._items.append((_CONTROL, message, time.monotonic()))
+        self.control += 1
+        self._ready.set()
+
+    async def run(self):
+        """Send queued messages in order until closed, cancelled or *send*
+        fails; the last two close the queue, and a failure is re-raised."""
+        try:
+            while not self.closed:
+                if not self._items:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                kind, message, queued = self._items.popleft()
+                if kind == _AUDIO:
+                    self.audio_bytes -= len(message)
+                else:
+                    self.control -= 1
+                    self._control_space.set()
+                self.max_wait = max(self.max_wait, time.monotonic() - queued)
+                await self._send(message)
+                self.sent += 1
+        except asyncio.CancelledError:
+            self.close()
+            raise
+        except Exception as exc:
+            self.close(exc)
+            raise
+
+    def close(self, error: Exception = None):
+        """Stop sending: drop what is queued and wake every waiting producer
+        (their ``put_control`` raises) and the writer (``run`` returns)."""
+        if self.closed:
+            return
+        self.closed = True
+        self.error = error
+        self._items.clear()
+        self.audio_bytes = self.control = 0
+        self._control_space.set()
+        self._ready.set()
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._items),
+            "audioBytes": self.audio_bytes,
+            "control": self.control,
+            "sent": self.sent,
+            "droppedAudio": self.dropped,
+            "droppedAudioBytes": self.dropped_bytes,
+            "peakAudioBytes": self.peak_audio_bytes,
+            "maxWaitMs": round(self.max_wait * 1000, 1),
+            "closed": self.closed,
+        }
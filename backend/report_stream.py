@@ -0,0 +1,143 @@
+"""
+Incremental parsing of a streamed JSON triage report.
+
+The model streams its report token by token. ``ReportFieldParser`` is fed the
+text deltas as they arrive and returns each TOP-LEVEL ``"key": value`` pair
+the moment its value is complete, so the server can push ``urgency`` to the
+client long before ``timeline`` has been generated.
+
+Anything before the first ``{`` (markdown fences, chatter) is ignored.
+"""
+
+import json
+
+_WS = " \t\r\n"
+
+
+class ReportFieldParser:
+    """Feed partial JSON text; collect completed top-level fields."""
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"   # start → key ⇄ value → done
+        self._key = None
+        self.fields = {}
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    def feed(self, text: str) -> list:
+        """Append *text*; return ``[(key, value), ...]`` newly completed."""
+        self._buf += text
+        out = []
+        while self._state != "done":
+            step = getattr(self, f"_scan_{self._state}")()
+            if step is None:          # need more input
+                break
+            if step is not True:      # a completed (key, value)
+                self.fields[step[0]] = step[1]
+                out.append(step)
+        return out
+
+    # ── scanners: return None (incomplete), True (progress) or (key, value)
+    def _skip_ws(self):
+        buf, i = self._buf, self._pos
+        while i < len(buf) and buf[i] in _WS:
+            i += 1
+        self._pos = i
+        return i < len(buf)
+
+    def _scan_start(self):
+        i = self._buf.find("{", self._pos)
+        if i < 0:
+            self._pos = len(self._buf)
+            return None
+        self._pos = i + 1
+        self._state = "key"
+        return True
+
+    def _scan_key(self):
+        if not self._skip_ws():
+            return None
+        ch = self._buf[self._pos]
+        if ch == "}":
+            self._pos += 1
+            self._state = "done"
+            return True
+        if ch != '"':                 # separator / stray character
+            self._pos += 1
+            return True
+        end = self._string_end(self._pos)
+        if end is None:
+            return None
+        colon = self._buf.find(":", end)
+        if colon < 0:
+            return None
+        self._key = json.loads(self._buf[self._pos:end])
+        self._pos = colon + 1
+        self._state = "value"
+        return True
+
+    def _scan_value(self):
+        if not self._skip_ws():
+            return None
+        start = self._pos
+        ch = self._buf[start]
+        if ch == '"':
+            end = self._string_end(start)
+        elif ch in "{[":
+            end = self._container_end(start)
+        else:
+            end = self._scalar_end(start)
+        if end is None:
+            return None
+        raw = self._buf[start:end]
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = raw.strip()
+        self._pos = end
+        self._state = "key"
+        return self._key, value
+
+    # ── token boundaries (exclusive end index, or None if incomplete)
+    def _string_end(self, start):
+        buf, i = self._buf, start + 1
+        while i < len(buf):
+            ch = buf[i]
+            if ch == "\\":
+                i += 2
+                continue
+            if ch == '"':
+                return i + 1
+            i += 1
+        return None
+
+    def _container_end(self, start):
+        buf, i, depth = self._buf, start, 0
+        while i < len(buf):
+            ch = buf[i]
+            if ch == '"':
+                end = self._string_end(i)
+                if end is None:
+                    return None
+                i = end
+                continue
+            if ch in "{[":
+                depth += 1
+            elif ch in "}]":
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+            i += 1
+        return None
+
+    def _scalar_end(self, start):
+        buf, i = self._buf, start
+        while i < len(buf):
+            if buf[i] in ",}" or buf[i] in _WS:
+                return i
+            i += 1
+        return None
@@ -0,0 +1,566 @@
+"""
+Compiled lookup structures for the offline rule engine.
+
+The condition knowledge base is compiled ONCE (at import / load time) into:
+  * a multi-pattern Aho-Corasick automaton over every keyword phrase, so a
+    single left-to-right pass over the input reports every phrase hit
+  * frozen word tables (aliases, generic words)
+  * an inverted index: word → ids of the conditions it can score
+  * a symmetric-delete spelling index over the keyword vocabulary, so
+    "hedache" or "stomuch" still match (see SpellingIndex)
+  * a separate emergency automaton over the ``high``-urgency keywords and a
+    curated red-flag lexicon, checked before anything else (see
+    EmergencyClassifier)
+
+Scoring a request is one automaton pass plus one postings lookup per input
+word, so latency stays flat as the table grows to thousands of conditions.
+
+Hindi/Marathi keywords (Devanagari and romanised, from each condition's
+``i18n`` block) live in the same automaton, so "पेट में दर्द" or "sir dard"
+is matched offline without an LLM round trip. Input is folded first by
+``normalise_text`` (see below).
+"""
+
+import re
+import string
+import unicodedata
+from types import MappingProxyType
+
+# synonyms / stemming map: common variations → root keyword
+WORD_ALIASES = MappingProxyType({
+    "paining": "pain", "painful": "pain", "pains": "pain", "hurts": "pain",
+    "hurting": "pain", "aching": "pain", "ache": "pain", "aches": "pain",
+    "sore": "pain", "burning": "burn", "itchy": "itching", "itches": "itching",
+    "dizzy": "dizziness", "vomit": "vomiting", "puking": "vomiting",
+    "breathless": "breathing", "coughing": "cough", "sneezy": "sneezing",
+    "shaky": "shaking", "shakes": "shaking", "trembling": "tremor",
+    "feverish": "fever", "temperature": "fever",
+    "tummy": "stomach", "belly": "stomach", "abdomen": "stomach",
+    "peeing": "urine", "urinating": "urine",
+    "sleepless": "insomnia", "sleeplessness": "insomnia",
+    "anxious": "anxiety", "panicking": "panic", "stressed": "stress",
+    "blurred": "blurry", "swollen": "swelling",
+    "sneeze": "sneezing", "sneezes": "sneezing", "diarrhoea": "diarrhea",
+})
+
+# Generic symptom-descriptor words that appear across many conditions.
+# These should ONLY contribute to exact phrase matches, never word-level
+# matching, to prevent "jaw pain" matching just because user said "pain".
+GENERIC_WORDS = frozenset({
+    "pain", "ache", "severe", "mild", "moderate", "chronic", "acute",
+    "high", "low", "attack", "problem", "issue", "infection",
+    # Hindi / Marathi (romanised): pain words, particles, auxiliaries, and
+    # words that collide with English ("pet", "pot", "sir", "hat", "tap")
+    "dard", "dukh", "dukhi", "dukhte", "dukhto", "dukhtay", "me", "mein", "ho",
+    "hai", "lag", "lagi", "lagta", "lagna", "lagat", "gaya", "gayi", "yet",
+    "yeto", "yene", "aana", "aala", "aalay", "aati", "nahi", "nahin", "kharab",
+    "band", "lal", "jalan", "jaljal", "jalte", "beh", "ka", "ki", "ke", "dil",
+    "pet", "pot", "path", "sir", "sar", "hat", "tap", "dole", "kat", "mar",
+    # Hindi / Marathi (Devanagari)
+    "दर्द", "दुख", "में", "है", "लग", "गया", "गई", "येत", "लागत", "नहीं", "नाही",
+    "खराब", "बंद", "लाल", "जलन", "जळजळ", "बह", "जड", "का", "की", "के", "दिल",
+    "येणे", "आना", "सारखी", "बार",
+})
+
+# Everyday words the typo corrector must accept as spelt correctly. Only
+# words of 5+ letters matter (shorter ones are never corrected); the list
+# favours words one edit away from a keyword ("right"/"tight", "mental"/
+# "dental", "never"/"fever") – add to it when a false correction shows up.
+COMMON_WORDS = frozenset("""
+    about above after again against almost along already also always among
+    another anything around asked away bad because become been before began
+    being below better between blood body bottom bring brought called came
+    cannot child children clear close coming could daily doctor doing done
+    during early either every everything evening feeling feels few first
+    following found friend from getting given going great happened having
+    hello heard hearts help herself himself hours house however inside
+    instead keeps kind knees large later least leave little lives living
+    looks lying makes making medicine might minutes month months morning
+    mother mostly never night nothing noticed often other others outside
+    overnight people person place please pretty quite really right seems
+    seven several should since small something sometimes still suddenly
+    taken taking their there these thing things think those though three
+    through today together tomorrow twice under until using usually very
+    water weeks where which while whole worse worst would years yesterday
+    young
+    suffering helps weird energy weakness general wrong
+    light might sight fight eight tights bright
+    mental rental mentally power tower mower lowered supper
+    sports shots spits lotion notion potion bands lands chess
+    teethe sleepy steep threat lever fevers coughs rough tough dough couch
+    chill hills jumps pumps dumps simple fizzy slurry funny sunny bunny
+    manic breeding bleeping turning hunting hurling pitchy swallow
+    shady shake snakes shades shares spice shine swine cruise bruised
+    pimples kidneys molars
+    burp burps burped burping belching blacked blackout mouth mouths
+    sleep sleeps sleeping slept snoring thirsty hungry eating drinking
+    meals walking working lifting sitting standing
+    mujhe mujhko mera meri mere bahut bohot thoda raha rahi rahe kuch theek
+    tabiyat kamzori kamjori pehle abhi subah shaam hafte mahine beta beti
+    bete bachche bachcha mala mazya mazha mazhi mulala mulila khup pasun
+    divas athavda sakali sandhyakali aahe aahet hota hoti vatat vatte
+    ashaktpana kaahi kahitari
+    मुझे बहुत थोड़ा रहा रही कुछ ठीक पहले अभी सुबह हफ्ते बेटे बच्चे
+    मला माझ्या मुलाला खूप पासून दिवस आठवडा सकाळ आहे आहेत वाटत
+""".split())
+
+# Latin words, or Devanagari words (danda excluded)
+WORD_RE = re.compile(r"[a-z]+|[\u0900-\u0963\u0966-\u097f]+")
+
+# Devanagari spelling variants folded before matching: nukta dropped
+# (ज़ → ज, ड़ → ड), chandrabindu → anusvara (आँख → आंख), joiners removed,
+# danda → space. ASCII punctuation (except the apostrophe) becomes a space so
+# romanised keywords can be matched as whole words.
+_PUNCT = "".join(c for c in string.punctuation if c != "'")
+_ASCII_FOLD = bytes.maketrans(_PUNCT.encode(), b" " * len(_PUNCT))   # C-speed path
+_FOLD = str.maketrans({
+    **{c: " " for c in _PUNCT},
+    "\u2019": "'",
+    "\u093c": None, "\u0901": "\u0902", "\u200c": None, "\u200d": None,
+    "\u0964": " ", "\u0965": " ",
+})
+
+
+def normalise_text(text: str) -> str:
+    """Fold lower-cased input into the form the index matches against:
+    spelling variants unified, punctuation and whitespace runs collapsed to
+    single spaces, padded with one space on each side."""
+    if text.isascii():
+        text = text.encode().translate(_ASCII_FOLD).decode()
+    else:
+        # NFD splits precomposed nukta letters so the fold can drop the nukta
+        text = unicodedata.normalize("NFD", text).translate(_FOLD)
+    return " " + " ".join(text.split()) + " "
+
+
+def keyword_patterns(condition) -> list:
+    """``(pattern, keyword)`` pairs for one condition's automaton patterns.
+
+    English keywords match anywhere, as they always have ("tooth" in
+    "toothache"). Romanised Hindi/Marathi keywords match whole words only
+    ("ulti" must not fire on "ultimately"); Devanagari ones match at a word
+    start so inflected forms still hit ("दांत" → "दांतों").
+    """
+    pairs = [(kw, kw) for kw in condition["keywords"]]
+    for local in (condition.get("i18n") or {}).values():
+        for kw in local.get("keywords", ()):
+            folded = normalise_text(kw.lower())
+            kw = folded.strip()
+            pairs.append((folded if kw.isascii() else folded.rstrip(), kw))
+    return pairs
+
+
+class PhraseAutomaton:
+    """Aho-Corasick automaton: find every pattern occurring as a substring
+    of a text in one pass, independent of the number of patterns."""
+
+    __slots__ = ("_goto", "_fail", "_out", "_alphabet")
+
+    def __init__(self, patterns):
+        goto = [{}]
+        out = [()]
+        for pid, pat in enumerate(patterns):
+            state = 0
+            for ch in pat:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            out[state] = out[state] + (pid,)
+
+        # breadth-first pass to wire failure links and merge outputs
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._goto = tuple(goto)
+        self._fail = tuple(fail)
+        self._out = tuple(frozenset(o) for o in out)
+        self._alphabet = frozenset(ch for p in patterns for ch in p)
+
+    def to_tables(self) -> dict:
+        """Plain-JSON form of the compiled automaton (see from_tables)."""
+        return {
+            "goto": list(self._goto),
+            "fail": list(self._fail),
+            "out": {str(s): sorted(o) for s, o in enumerate(self._out) if o},
+        }
+
+    @classmethod
+    def from_tables(cls, tables: dict) -> "PhraseAutomaton":
+        """Rebuild an automaton from to_tables() output without recomputing
+        failure links – loading is a copy, not a compile."""
+        self = cls.__new__(cls)
+        self._goto = tuple(tables["goto"])
+        self._fail = tuple(tables["fail"])
+        out = [frozenset()] * len(self._goto)
+        for state, pids in tables["out"].items():
+            out[int(state)] = frozenset(pids)
+        self._out = tuple(out)
+        self._alphabet = frozenset(ch for edges in self._goto for ch in edges)
+        return self
+
+    def find(self, text: str) -> set:
+        """Return the ids of all patterns that occur in *text*."""
+        goto, fail, out, alphabet = self._goto, self._fail, self._out, self._alphabet
+        hits = set()
+        state = 0
+        for ch in text:
+            if ch not in alphabet:
+                state = 0
+                continue
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                hits |= out[state]
+        return hits
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal-string-alignment distance (a transposition counts as one
+    edit), or ``limit + 1`` as soon as it must exceed *limit*."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    # only the differing core needs the DP matrix: "stomuch"/"stomach" → "u"/"a"
+    n = min(len(a), len(b))
+    start = 0
+    while start < n and a[start] == b[start]:
+        start += 1
+    tail = 0
+    while tail < n - start and a[-1 - tail] == b[-1 - tail]:
+        tail += 1
+    a, b = a[start:len(a) - tail], b[start:len(b) - tail]
+    if not a or not b:
+        return min(max(len(a), len(b)), limit + 1)
+
+    prev2, prev = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return min(prev[-1], limit + 1)
+
+
+class SpellingIndex:
+    """Symmetric-delete (SymSpell) typo corrector over the keyword vocabulary.
+
+    Every vocabulary word is stored under each string obtainable from it by
+    deleting up to ``max_distance(len)`` characters. A misspelt token is
+    corrected by generating its own deletes and looking them up, so the cost
+    per token depends on the token's length, not on the vocabulary size:
+    "hedache" → "headache", "stomuch" → "stomach", "feaver" → "fever".
+
+    Tokens shorter than ``MIN_LENGTH`` are never corrected (too many short
+    words are one edit apart). A token is only rewritten into a *target* – a
+    keyword word or alias – and only when no other known word is as close:
+    "burping" is one edit from "burning" but also from the known "burps",
+    so it is left alone. The other known words (``COMMON_WORDS``, generic
+    and label words) are never produced; they keep everyday words like
+    "right" or "mental" from being "corrected" into keywords ("tight",
+    "dental").
+    """
+
+    MIN_LENGTH = 5
+
+    __slots__ = ("_words", "_targets", "_deletes")
+
+    @staticmethod
+    def max_distance(length: int) -> int:
+        return 1 if length < 9 else 2
+
+    def __init__(self, words, targets=None):
+        self._words = frozenset(words)
+        self._targets = self._words if targets is None else frozenset(targets) & self._words
+        deletes = {}
+        for word in self._words:
+            if len(word) >= self.MIN_LENGTH - 1:
+                for variant in self._variants(word, 2 if len(word) >= 7 else 1):
+                    deletes.setdefault(variant, []).append(word)
+        self._deletes = {v: tuple(ws) for v, ws in deletes.items()}
+
+    @staticmethod
+    def _variants(word: str, distance: int) -> set:
+        """*word* plus every string reachable by deleting up to *distance* chars."""
+        found = {word}
+        frontier = [word]
+        for _ in range(distance):
+            frontier = [w[:i] + w[i + 1:] for w in frontier for i in range(len(w))]
+            frontier = [w for w in frontier if w not in found]
+            found.update(frontier)
+        return found
+
+    def to_tables(self) -> dict:
+        return {"words": sorted(self._words), "targets": sorted(self._targets)}
+
+    @classmethod
+    def from_tables(cls, tables: dict) -> "SpellingIndex":
+        return cls(tables["words"], tables["targets"])
+
+    def suggest(self, token: str):
+        """The target word closest to an unknown *token*, or None if the
+        closest known word is not a target or is tied with another."""
+        limit = self.max_distance(len(token))
+        best, best_d = None, limit + 1
+        for variant in self._variants(token, limit):
+            for word in self._deletes.get(variant, ()):
+                if word == best:
+                    continue
+                d = edit_distance(token, word, limit)
+                if d < best_d:
+                    best, best_d = word, d
+                elif d == best_d:
+                    best = ""               # ambiguous at this distance
+        return best if best in self._targets else None
+
+    def correct(self, text: str):
+        """*text* (normalised, space-padded) with misspelt words replaced, or
+        None when nothing needed correcting – the common case costs one set
+        lookup per word."""
+        words = self._words
+        changed = False
+        out = text.split(" ")
+        for i, token in enumerate(out):
+            if len(token) < self.MIN_LENGTH or token in words or not WORD_RE.fullmatch(token):
+                continue
+            fix = self.suggest(token)
+            # "headaches" → "headache" adds nothing: the substring already matched
+            if fix is not None and fix not in token:
+                out[i] = fix
+                changed = True
+        return " ".join(out) if changed else None
+
+
+class RuleIndex:
+    """Precompiled view of a CONDITIONS table used by the rule scorer."""
+
+    def __init__(self, conditions: dict, tables: dict = None):
+        self.conditions = conditions
+        self.names = tuple(conditions)
+        if tables is not None:
+            self._load_tables(tables)
+            return
+
+        # one automaton pattern per distinct keyword phrase; a phrase that
+        # appears in several conditions credits all of them
+        phrase_ids = {}
+        phrase_hits = []
+        patterns = [keyword_patterns(conditions[name]) for name in self.names]
+        for ci, pairs in enumerate(patterns):
+            seen = set()
+            for pat, kw in pairs:
+                if kw in seen:        # listed for both hi and mr, or already English
+                    continue
+                seen.add(kw)
+                pid = phrase_ids.get(pat)
+                if pid is None:
+                    pid = phrase_ids[pat] = len(phrase_hits)
+                    phrase_hits.append([])
+                phrase_hits[pid].append((ci, len(kw.split()) * 3))  # "wisdom teeth" = 6 pts
+        self.automaton = PhraseAutomaton(list(phrase_ids))
+        self.phrase_hits = tuple(tuple(h) for h in phrase_hits)
+
+        # inverted index: word → condition ids whose keyword/label words
+        # contain it, minus generic ones so "pain" alone can't cross-match
+        postings = {}
+        for ci, name in enumerate(self.names):
+            c = conditions[name]
+            words = {w for _, kw in patterns[ci] for w in kw.split()}
+            words.update(c["label"].lower().split())
+            for w in words - GENERIC_WORDS:
+                postings.setdefault(w, []).append(ci)
+        self.word_postings = MappingProxyType({w: tuple(ids) for w, ids in postings.items()})
+
+        # typo correction targets: every keyword and alias word; label words,
+        # generic and common words are known, so never corrected, but are
+        # never produced by a correction either
+        targets = {w for pairs in patterns for _, kw in pairs for w in kw.split()}
+        targets.update(WORD_ALIASES, WORD_ALIASES.values())
+        targets -= COMMON_WORDS
+        vocabulary = targets | set(postings) | GENERIC_WORDS
+        vocabulary.update(normalise_text(w).strip() for w in COMMON_WORDS)
+        self.spelling = SpellingIndex((w for w in vocabulary if WORD_RE.fullmatch(w)), targets)
+
+    def to_tables(self) -> dict:
+        """Serialisable index tables, so an offline compiler can ship them and
+        workers skip the build (``RuleIndex(conditions, tables)``)."""
+        return {
+            "automaton": self.automaton.to_tables(),
+            "phrase_hits": [list(map(list, h)) for h in self.phrase_hits],
+            "word_postings": {w: list(ids) for w, ids in self.word_postings.items()},
+            "spelling": self.spelling.to_tables(),
+        }
+
+    def _load_tables(self, tables: dict):
+        self.automaton = PhraseAutomaton.from_tables(tables["automaton"])
+        self.phrase_hits = tuple(tuple(map(tuple, h)) for h in tables["phrase_hits"])
+        self.word_postings = MappingProxyType(
+            {w: tuple(ids) for w, ids in tables["word_postings"].items()})
+        self.spelling = SpellingIndex.from_tables(tables["spelling"])
+
+    @staticmethod
+    def expand_words(symptoms_lower: str) -> set:
+        """Tokenise the (normalised) input and add alias roots ("paining" → "pain")."""
+        words = set(WORD_RE.findall(symptoms_lower))
+        words.update(WORD_ALIASES[w] for w in words & WORD_ALIASES.keys())
+        return words
+
+    def score(self, symptoms_lower: str) -> list:
+        """Return ``[(score, name, condition), ...]`` for every condition with
+        a non-zero score, highest first (ties keep knowledge-base order).
+
+        Only conditions reached through a phrase hit or a word posting are
+        touched, so cost tracks the input, not the size of the table.
+
+        Misspelt words ("hedache") are corrected against the keyword
+        vocabulary and the corrected text is scored too; each condition keeps
+        the better of its two scores, so correction can only add matches.
+        """
+        text = normalise_text(symptoms_lower)
+        scores = self._score_text(text)
+        corrected = self.spelling.correct(text)
+        if corrected is not None:
+            for ci, s in self._score_text(corrected).items():
+                if s > scores.get(ci, 0):
+                    scores[ci] = s
+
+        names, conditions = self.names, self.conditions
+        return [(s, names[ci], conditions[names[ci]])
+                for ci, s in sorted(scores.items(), key=lambda x: (-x[1], x[0]))]
+
+    def _score_text(self, text: str) -> dict:
+        """condition id → score for already-normalised *text*."""
+        scores = {}
+        for pid in self.automaton.find(text):
+            for ci, weight in self.phrase_hits[pid]:
+                scores[ci] = scores.get(ci, 0) + weight
+
+        postings = self.word_postings
+        for w in self.expand_words(text):
+            for ci in postings.get(w, ()):
+                scores[ci] = scores.get(ci, 0) + 1   # each matched word = 1 pt
+        return scores
+
+    def score_many(self, texts: list) -> list:
+        """Score a batch of lower-cased inputs against one index snapshot.
+        Duplicate texts (common when a clinic syncs a queue) are scored once."""
+        memo = {}
+        return [memo[t] if t in memo else memo.setdefault(t, self.score(t)) for t in texts]
+
+
+# negation cues around a red-flag phrase: English and "bina"/"बिना"
+# ("without") come before it, with at most NEGATION_GAP filler words between
+# ("no signs of stroke"); Hindi/Marathi "नहीं"/"नाही" follows it directly
+# ("बेहोश नहीं"). Deliberately narrow – a missed negation only means the
+# emergency answer, a false one would hide a real emergency.
+NEGATION_BEFORE = frozenset("""
+    no not without never nor denies deny denied don't dont doesn't doesnt
+    didn't didnt haven't havent hasn't hasnt bina बिना
+""".split())
+NEGATION_AFTER = frozenset("नहीं नही नाही nahi nahin nai".split())
+NEGATION_FILLER = frozenset("any a an the have has had having feel feeling felt sign signs of".split())
+NEGATION_GAP = 2
+
+
+def negated(text: str, start: int, end: int) -> bool:
+    """True if the phrase at ``text[start:end]`` (normalise_text form) is
+    negated by a cue just before or just after it."""
+    before = text[:start].split()
+    if before and text[start - 1] != " ":
+        before.pop()                    # the match began mid-word
+    for word in reversed(before[-(NEGATION_GAP + 1):]):
+        if word in NEGATION_BEFORE:
+            return True
+        if word not in NEGATION_FILLER:
+            break
+    after = text[end:].split()
+    if after and text[end] != " ":
+        after.pop(0)                    # rest of the word the match ended in
+    return bool(after) and after[0] in NEGATION_AFTER
+
+
+class EmergencyClassifier:
+    """Red-flag check that runs before scoring and before any network call.
+
+    One automaton holds the keyword phrases of every ``high``-urgency
+    condition (matched exactly as the index matches them: "chest pain",
+    "दिल का दौरा") and the curated red-flag lexicon ("not breathing",
+    "बेहोश", "saap chavla"). Lexicon phrases match at a word start, so
+    "convulsions" and "poisoned" hit but "sunstroke" does not fire "stroke".
+    Only whole phrases count: a lone "chest" or "breathing" is left to the
+    scorer, and so does a negated one ("no chest pain", "बेहोश नहीं" – see
+    ``negated``). If nothing hits, the spelling-corrected text gets a second
+    pass.
+    """
+
+    __slots__ = ("automaton", "triggers", "patterns")
+
+    def __init__(self, conditions: dict = None, phrases=(), tables: dict = None):
+        if tables is not None:
+            self.automaton = PhraseAutomaton.from_tables(tables["automaton"])
+            self.triggers = tuple(tables["triggers"])
+            self.patterns = tuple(tables["patterns"])
+            return
+        # pattern → the high-urgency condition it belongs to, "" for the lexicon
+        patterns = {}
+        for name, c in (conditions or {}).items():
+            if c["urgency"] == "high":
+                for pat, _ in keyword_patterns(c):
+                    patterns.setdefault(pat, name)
+        for phrase in phrases:
+            patterns.setdefault(normalise_text(phrase.lower()).rstrip(), "")
+        self.automaton = PhraseAutomaton(list(patterns))
+        self.triggers = tuple(patterns.values())
+        self.patterns = tuple(patterns)
+
+    def to_tables(self) -> dict:
+        return {"automaton": self.automaton.to_tables(), "triggers": list(self.triggers),
+                "patterns": list(self.patterns)}
+
+    @property
+    def answers(self) -> tuple:
+        """Every value classify() can return except None."""
+        return ("",) + tuple(sorted(set(self.triggers) - {""}))
+
+    def classify(self, symptoms_lower: str, spelling: SpellingIndex = None):
+        """None for no red flag; otherwise the name of the high-urgency
+        condition that was hit, or "" when only the lexicon fired."""
+        text = normalise_text(symptoms_lower)
+        hits = self._affirmed(text)
+        if not hits and spelling is not None:
+            corrected = spelling.correct(text)
+            if corrected is not None:
+                hits = self._affirmed(corrected)
+        if not hits:
+            return None
+        return min((self.triggers[pid] for pid in hits), key=lambda t: (not t, t))
+
+    def _affirmed(self, text: str) -> list:
+        """Ids of the phrases in *text* with at least one un-negated occurrence."""
+        hits = []
+        for pid in self.automaton.find(text):
+            pat = self.patterns[pid]
+            # whole-word patterns carry their spaces; judge the words themselves
+            lead, size = len(pat) - len(pat.lstrip()), len(pat.strip())
+            start = text.find(pat)
+            while start >= 0:
+                if not negated(text, start + lead, start + lead + size):
+                    hits.append(pid)
+                    break
+                start = text.find(pat, start + 1)
+        return hits
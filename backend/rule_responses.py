@@ -0,0 +1,105 @@
+"""
+Precomposed rule-engine responses.
+
+A rule answer depends only on the response language and the (at most two)
+top-ranked conditions, so the set of distinct answers is small and fixed:
+``1 + n + n·(n-1)`` per language for ``n`` conditions. ``RuleResponses``
+composes each one once per knowledge-base version and keeps both the response
+dict and its ready-to-send JSON body, so serving a rule answer is a lookup
+plus a write – no string joining, no serialisation.
+
+Bases up to ``eager_limit`` answers are composed in full when a version is
+first used; larger ones fill a bounded LRU on demand.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+
+
+def dumps(result: dict) -> bytes:
+    """Compact UTF-8 JSON (Devanagari stays 3 bytes/char instead of \\uXXXX)."""
+    return json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class RuleResponses:
+    """``(dict, body)`` for every (language, top conditions) of one KB version.
+
+    *compose(names, locale)* must return the finished (normalised) response
+    dict for the condition *names* (a tuple of 0–2 names) in *locale*.
+    """
+
+    def __init__(self, compose, eager_limit: int = 5000, maxsize: int = 4096):
+        self.compose = compose
+        self.eager_limit = eager_limit
+        self.maxsize = maxsize
+        self._state = (None, {}, False)      # (kb, entries, eager) – swapped whole
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, kb, matches: list, lang: str) -> tuple:
+        """Response for ranked ``(score, name, condition)`` *matches*."""
+        locale = kb.locale(lang)
+        key = (locale.lang, tuple(m[1] for m in matches[:2]))
+        state = self._state
+        if state[0] is not kb:
+            if state[0] is not None and state[0].loaded > kb.loaded:
+                # request started on a version that has since been replaced
+                return self._compose(key[1], locale)
+            state = self._switch(kb)
+        _, entries, eager = state
+
+        entry = entries.get(key)
+        if entry is not None:
+            if not eager:
+                with self._lock:
+                    if key in entries:
+                        entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        entry = self._compose(key[1], locale)
+        if not eager:
+            with self._lock:
+                entries[key] = entry
+                if len(entries) > self.maxsize:
+                    entries.popitem(last=False)
+        return entry
+
+    def warm(self, kb):
+        """Compose the table for *kb* now (e.g. before gunicorn forks)."""
+        if self._state[0] is not kb:
+            self._switch(kb)
+
+    def stats(self) -> dict:
+        _, entries, eager = self._state
+        return {
+            "mode": "eager" if eager else "lru",
+            "entries": len(entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    # ── internals ─────────────────────────────────────────────────
+    def _compose(self, names: tuple, locale) -> tuple:
+        result = self.compose(names, locale)
+        return result, dumps(result)
+
+    def _switch(self, kb) -> tuple:
+        """Build (eager) or reset (LRU) the table for a new KB version and
+        swap it in; readers keep using the previous table until then."""
+        n = len(kb.conditions)
+        if len(kb.locales) * (1 + n + n * (n - 1)) <= self.eager_limit:
+            names = list(kb.conditions)
+            keys = [()] + [(a,) for a in names] + [(a, b) for a in names for b in names if a != b]
+            state = (kb, {(lang, k): self._compose(k, locale)
+                          for lang, locale in kb.locales.items() for k in keys}, True)
+        else:
+            state = (kb, OrderedDict(), False)
+        with self._lock:
+            current = self._state[0]
+            if current is not None and current.loaded >= kb.loaded:
+                return self._state          # another thread got here first
+            self._state = state
+        return state
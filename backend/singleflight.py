@@ -0,0 +1,171 @@
+"""
+Single-flight coalescing of identical in-flight calls.
+
+Concurrent callers asking for the same key share ONE execution: the first
+caller (leader) runs the function, the others wait and receive its result or
+its exception.
+
+Every leader re-checks the store the result ends up in (``recheck``, e.g.
+the AI cache) before calling upstream: a caller that missed the cache just
+before the previous leader finished becomes a leader after it, and must
+reuse that result rather than repeat the call.
+
+Across gunicorn workers, coalescing is optional and works through per-key
+lock files (``fcntl.flock``) in a shared directory: a leader first takes the
+file lock, then re-checks a shared store (e.g. the SQLite cache tier) – so a
+leader in another worker that just finished the same call is reused too.
+Not available where ``fcntl`` is missing (Windows); thread-level coalescing
+still works there.
+"""
+
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:          # Windows – no cross-process coalescing
+    fcntl = None
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent ``do(key, fn)`` calls that share a key."""
+
+    SWEEP_EVERY = 512        # leader runs between stale lock-file sweeps
+    STALE_AFTER = 600        # seconds before an idle lock file is removed
+
+    def __init__(self, lock_dir: str = None, lock_timeout: float = 35.0):
+        self.lock_dir = lock_dir if (lock_dir and fcntl) else None
+        self.lock_timeout = lock_timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = self.coalesced = self.recheck_hits = self.cross_worker_hits = 0
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def do(self, key: str, fn, recheck=None):
+        """Run *fn()* once for all concurrent callers of *key*.
+
+        *recheck()*, if given, is tried by the leader (after acquiring the
+        cross-worker lock, if any); a non-None value is returned instead of
+        calling *fn*.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._lead(key, fn, recheck)
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                sweep = self.lock_dir and self.leaders % self.SWEEP_EVERY == 0
+            call.event.set()
+            if sweep:
+                self._sweep()
+        return call.result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "inFlight": len(self._calls),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "recheckHits": self.recheck_hits,
+                "crossWorkerHits": self.cross_worker_hits,
+                "crossWorker": bool(self.lock_dir),
+            }
+
+    # ── cross-worker lock ─────────────────────────────────────────
+    def _lead(self, key, fn, recheck):
+        if not self.lock_dir:
+            return self._recheck_or_call(fn, recheck, cross_worker=False)
+        fd, locked = self._open_locked(os.path.join(self.lock_dir, f"{key}.lock"))
+        try:
+            return self._recheck_or_call(fn, recheck, cross_worker=locked)
+        finally:
+            os.close(fd)            # releases the lock
+
+    def _recheck_or_call(self, fn, recheck, cross_worker: bool):
+        if recheck is not None:
+            found = recheck()
+            if found is not None:
+                with self._lock:
+                    self.recheck_hits += 1
+                    self.cross_worker_hits += cross_worker
+                return found
+        return fn()
+
+    def _open_locked(self, path: str) -> tuple:
+        """``(fd, locked)`` for the lock file at *path*. A file swept away
+        between our open and our lock (see _sweep) is a lock nobody else will
+        see, so it is reopened until the locked file is the one at *path*."""
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            locked = self._flock(fd)
+            try:
+                current = locked and os.stat(path).st_ino == os.fstat(fd).st_ino
+            except FileNotFoundError:
+                current = False
+            if current or not locked:
+                return fd, locked
+            os.close(fd)
+
+    def _flock(self, fd) -> bool:
+        """Take the file lock, waiting at most lock_timeout (then proceed
+        uncoordinated rather than stall behind a stuck worker)."""
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.05)
+
+    def _sweep(self):
+        """Remove lock files idle for STALE_AFTER – only ones we can lock
+        without waiting, i.e. that no worker holds right now."""
+        cutoff = time.time() - self.STALE_AFTER
+        try:
+            entries = [e for e in os.scandir(self.lock_dir)
+                       if e.name.endswith(".lock") and e.stat().st_mtime < cutoff]
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                fd = os.open(entry.path, os.O_RDWR)
+            except OSError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                os.unlink(entry.path)
+            except OSError:         # held (BlockingIOError) or already gone
+                pass
+            finally:
+                os.close(fd)
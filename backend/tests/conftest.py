@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import knowledge_base  # noqa: E402
+
+
+class FakeClock:
+    """Stand-in for a module's ``time``: ``time()`` and ``monotonic()`` both
+    read *now*, which only moves when a test advances it."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(scope="session")
+def kb(tmp_path_factory):
+    """The knowledge base compiled from the source into a temporary file."""
+    out = tmp_path_factory.mktemp("kb") / "conditions.kb"
+    return knowledge_base.CompiledKB(knowledge_base.compile_kb(knowledge_base.DEFAULT_SOURCE, str(out)))
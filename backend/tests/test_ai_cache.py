@@ -0,0 +1,85 @@
+import pytest
+
+import ai_cache
+from ai_cache import ResponseCache, make_key, normalize_symptoms
+
+
+@pytest.fixture
+def timed(clock, monkeypatch):
+    monkeypatch.setattr(ai_cache, "time", clock)
+    return clock
+
+
+def test_normalize_folds_case_punctuation_and_ampersand():
+    assert normalize_symptoms("Fever & Cough!!  3 days") == "fever and cough 3 days"
+    assert make_key("Fever, cough", "en", "m") == make_key("fever cough", "en", "m")
+    assert make_key("fever cough", "en", "m") != make_key("fever cough", "hi", "m")
+
+
+@pytest.mark.parametrize("a, b", [
+    ("दिल में दर्द", "दाल में दर्द"),
+    ("कान में दर्द", "कोने में दर्द"),
+    ("सिर में दर्द", "सार में दर्द"),
+])
+def test_devanagari_vowel_signs_keep_keys_apart(a, b):
+    assert make_key(a, "hi", "m") != make_key(b, "hi", "m")
+
+
+def test_danda_is_punctuation():
+    assert normalize_symptoms("सिर में दर्द।") == normalize_symptoms("सिर में दर्द")
+
+
+def test_memory_hit_returns_a_copy():
+    cache = ResponseCache()
+    cache.set("k", {"urgency": "low"})
+    got = cache.get("k")
+    got["urgency"] = "high"
+    assert cache.get("k") == {"urgency": "low"}
+
+
+def test_entry_expires_after_ttl(timed):
+    cache = ResponseCache(ttl=60)
+    cache.set("k", {"a": "1"})
+    timed.advance(59)
+    assert cache.get("k") == {"a": "1"}
+    timed.advance(2)
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_lru_evicts_oldest():
+    cache = ResponseCache(maxsize=2)
+    cache.set("a", {"v": "a"})
+    cache.set("b", {"v": "b"})
+    cache.get("a")
+    cache.set("c", {"v": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_tier_is_shared_between_instances(tmp_path):
+    db = str(tmp_path / "cache.db")
+    ResponseCache(db_path=db).set("k", {"a": "1"})
+    other = ResponseCache(db_path=db)
+    assert other.get("k") == {"a": "1"}
+    assert other.stats()["diskHits"] == 1
+    assert other.get("k") == {"a": "1"}
+    assert other.stats()["hits"] == 1
+
+
+def test_disk_tier_respects_ttl(tmp_path, timed):
+    db = str(tmp_path / "cache.db")
+    ResponseCache(ttl=60, db_path=db).set("k", {"a": "1"})
+    timed.advance(61)
+    assert ResponseCache(ttl=60, db_path=db).get("k") is None
+
+
+def test_disk_hit_keeps_the_rows_expiry(tmp_path, timed):
+    db = str(tmp_path / "cache.db")
+    ResponseCache(ttl=60, db_path=db).set("k", {"a": "1"})
+    timed.advance(50)
+    other = ResponseCache(ttl=60, db_path=db)
+    assert other.get("k") == {"a": "1"}     # promoted into memory from disk
+    timed.advance(11)
+    assert other.get("k") is None           # still expires 60 s after the write
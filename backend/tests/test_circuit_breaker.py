@@ -0,0 +1,63 @@
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, AdaptiveTimeout, CircuitBreaker
+
+
+@pytest.fixture
+def breaker(clock, monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+    return CircuitBreaker(failure_rate=0.5, min_calls=4, window=10, open_seconds=30)
+
+
+def test_stays_closed_below_min_calls(breaker):
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_opens_at_failure_rate_and_rejects(breaker):
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats()["trips"] == 1
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_half_open_probe_success_closes(breaker, clock):
+    for _ in range(4):
+        breaker.record_failure()
+    clock.advance(30)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()          # one probe at a time
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.stats()["calls"] == 0
+
+
+def test_half_open_probe_failure_reopens(breaker, clock):
+    for _ in range(4):
+        breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock.advance(29)
+    assert not breaker.allow()
+
+
+def test_adaptive_timeout_follows_p99():
+    timeout = AdaptiveTimeout(floor=1.0, ceiling=30.0, multiplier=2.0, min_samples=5)
+    assert timeout.current() == 30.0
+    for seconds in (0.5, 0.6, 0.7, 0.8, 2.0):
+        timeout.observe(seconds)
+    assert timeout.current() == pytest.approx(4.0)
+    for _ in range(200):
+        timeout.observe(0.1)
+    assert timeout.current() == 1.0     # clamped to the floor
@@ -0,0 +1,56 @@
+import pytest
+
+
+def classify(kb, text):
+    return kb.emergency.classify(text.lower(), kb.index.spelling)
+
+
+@pytest.mark.parametrize("text", [
+    "chest pain sweating left arm",
+    "he is unconscious",
+    "my son is not breathing",
+    "had a seizure this morning",
+    "no fever, chest pain",             # the negation belongs to the fever
+    "no fever but chest pain",
+    "no chest pain but fainted",
+    "he drank pesticide",
+    "वह बेहोश हो गया",
+    "सांस नहीं आ रही",                  # the negation is part of the phrase
+    "मेरे पिता ने कीटनाशक पी लिया",
+    "saap chavla",
+    "suicidal thoughts",
+    "feeling suicidal since last week",
+    "i want to die",
+    "i want to end my life",
+    "मैं मरना चाहता हूं",
+    "khudkushi ke khayal aate hain",
+    "मला मरायचे आहे",
+    "jeev dyaycha vichar yeto",
+])
+def test_red_flags_are_emergencies(kb, text):
+    assert classify(kb, text) is not None
+
+
+@pytest.mark.parametrize("text", [
+    "no chest pain, just cough",
+    "not unconscious but dizzy",
+    "no signs of stroke",
+    "don't have chest pain",
+    "without any seizure",
+    "बेहोश नहीं हुआ",
+    "behosh nahi",
+    "skin rash from working with pesticide",
+    "mild headache since morning",
+    "sunstroke last summer",
+])
+def test_negated_or_benign_inputs_are_not(kb, text):
+    assert classify(kb, text) is None
+
+
+def test_high_urgency_condition_is_named(kb):
+    assert classify(kb, "chest pain sweating left arm") == "chest_pain"
+    assert classify(kb, "he is unconscious") == ""
+
+
+def test_misspelt_red_flag_is_caught(kb):
+    assert classify(kb, "cheast pain and sweating") == "chest_pain"
@@ -0,0 +1,59 @@
+"""The AI enrichment of an emergency answer: never lower urgency, and only
+a real AI report is cached under the emergency key (app.py and async_triage.py)."""
+
+import asyncio
+
+import pytest
+
+import app
+import async_triage
+from circuit_breaker import CircuitOpenError
+
+SYMPTOMS = "chest pain sweating left arm"
+LOW = {"urgency": "low", "urgencyText": "Muscle strain", "advice": "rest"}
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(app, "AI_CACHE", app.ai_cache.ResponseCache())
+
+
+def sync_report(monkeypatch, call):
+    monkeypatch.setattr(app, "_call_openrouter", call)
+    key = app._emergency_key(SYMPTOMS, "en")
+    return app._emergency_ai_report(SYMPTOMS, "en", key), key
+
+
+def async_report(monkeypatch, call):
+    async def acall(symptoms, lang, tier):
+        return call(symptoms, lang, tier)
+    monkeypatch.setattr(async_triage, "_call_openrouter", acall)
+    key = app._emergency_key(SYMPTOMS, "en")
+    return asyncio.run(async_triage._emergency_ai_report(SYMPTOMS, "en", key)), key
+
+
+@pytest.fixture(params=[sync_report, async_report], ids=["flask", "async"])
+def report(request, monkeypatch):
+    return lambda call: request.param(monkeypatch, call)
+
+
+def test_ai_report_is_raised_to_high_and_cached(report):
+    result, key = report(lambda s, l, tier=None: (dict(LOW), True))
+    assert result["urgency"] == "high" and result["emergency"] is True
+    cached = app.AI_CACHE.get(key)
+    assert cached["urgency"] == "high" and cached["urgencyText"] == "Muscle strain"
+
+
+@pytest.mark.parametrize("failure", [CircuitOpenError("open"), ConnectionError("reset")])
+def test_fallback_is_not_cached(report, failure):
+    def call(s, l, tier=None):
+        raise failure
+    result, key = report(call)
+    assert result["urgency"] == "high" and result["emergency"] is True
+    assert app.AI_CACHE.get(key) is None
+
+
+def test_unparsed_reply_is_not_cached(report):
+    result, key = report(lambda s, l, tier=None: ({"urgency": "medium", "advice": "raw text"}, False))
+    assert result["urgency"] == "high"
+    assert app.AI_CACHE.get(key) is None
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from outbound_queue import OutboundQueue, QueueClosedError
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 5))
+
+
+def test_audio_bounded_oldest_dropped_control_kept():
+    async def main():
+        dropped = []
+        queue = OutboundQueue(None, max_audio_bytes=10, on_drop=dropped.append)
+        queue.put_audio(b"aaaa")
+        await queue.put_control("ctl")
+        queue.put_audio(b"bbbb")
+        queue.put_audio(b"cccc")
+        return queue, dropped
+
+    queue, dropped = run(main())
+    assert dropped == [b"aaaa"]
+    assert [m for _, m, _ in queue._items] == ["ctl", b"bbbb", b"cccc"]
+    assert queue.audio_bytes == 8
+    assert queue.stats()["droppedAudioBytes"] == 4
+
+
+def test_run_sends_in_order():
+    async def main():
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        queue = OutboundQueue(send)
+        writer = asyncio.create_task(queue.run())
+        queue.put_audio(b"a")
+        await queue.put_control("c")
+        queue.put_audio(b"b")
+        while len(queue):
+            await asyncio.sleep(0)
+        writer.cancel()
+        await asyncio.gather(writer, return_exceptions=True)
+        return sent, queue
+
+    sent, queue = run(main())
+    assert sent == [b"a", "c", b"b"]
+    assert queue.closed
+
+
+def test_put_control_waits_for_space():
+    async def main():
+        gate = asyncio.Event()
+
+        async def send(message):
+            await gate.wait()
+
+        queue = OutboundQueue(send, max_control=1)
+        writer = asyncio.create_task(queue.run())
+        await queue.put_control("1")
+        await asyncio.sleep(0)              # the writer takes "1" and stalls in send
+        await queue.put_control("2")
+        third = asyncio.create_task(queue.put_control("3"))
+        await asyncio.sleep(0.01)
+        waited = not third.done()
+        gate.set()
+        await third
+        writer.cancel()
+        await asyncio.gather(writer, return_exceptions=True)
+        return waited
+
+    assert run(main())
+
+
+def test_send_failure_closes_and_wakes_producers():
+    async def main():
+        async def send(message):
+            raise ConnectionError("socket gone")
+
+        queue = OutboundQueue(send, max_control=1)
+        await queue.put_control("1")
+        blocked = asyncio.create_task(queue.put_control("2"))
+        await asyncio.sleep(0.01)
+        writer = asyncio.create_task(queue.run())
+        with pytest.raises(ConnectionError):
+            await writer
+        with pytest.raises(QueueClosedError):
+            await blocked
+        queue.put_audio(b"ignored")
+        return queue
+
+    queue = run(main())
+    assert queue.closed
+    assert isinstance(queue.error, ConnectionError)
+    assert len(queue) == 0
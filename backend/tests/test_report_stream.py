@@ -0,0 +1,27 @@
+from report_stream import ReportFieldParser
+
+
+def test_fields_complete_as_they_arrive():
+    parser = ReportFieldParser()
+    assert parser.feed('```json\n{"urgency": "hi') == []
+    assert parser.feed('gh", "advice": "1. Rest') == [("urgency", "high")]
+    assert parser.feed('\\n2. Fluids"}') == [("advice", "1. Rest\n2. Fluids")]
+    assert parser.done
+    assert parser.fields == {"urgency": "high", "advice": "1. Rest\n2. Fluids"}
+
+
+def test_one_character_at_a_time():
+    text = '{"urgency": "low", "redFlags": "a \\"quoted\\" word", "timeline": "2-3 days"}'
+    parser = ReportFieldParser()
+    for ch in text:
+        parser.feed(ch)
+    assert parser.done
+    assert parser.fields["redFlags"] == 'a "quoted" word'
+    assert parser.fields["timeline"] == "2-3 days"
+
+
+def test_cut_off_report_keeps_completed_fields():
+    parser = ReportFieldParser()
+    parser.feed('{"urgency": "medium", "advice": "1. Res')
+    assert not parser.done
+    assert parser.fields == {"urgency": "medium"}
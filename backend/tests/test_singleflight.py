@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight, fcntl
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "answer"
+
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", fetch)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", fetch)))
+                 for _ in range(5)]
+    for t in followers:
+        t.start()
+    while flight.stats()["coalesced"] < 5:
+        time.sleep(0.001)
+    release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+
+    assert calls == [1]
+    assert results == ["answer"] * 6
+    assert flight.stats()["inFlight"] == 0
+
+
+def test_followers_get_the_leaders_exception():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def fetch():
+        started.set()
+        release.wait(5)
+        raise ValueError("upstream down")
+
+    def call():
+        try:
+            flight.do("k", fetch)
+        except ValueError as exc:
+            errors.append(str(exc))
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    started.wait(5)
+    threads.append(threading.Thread(target=call))
+    threads[1].start()
+    while flight.stats()["coalesced"] < 1:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert errors == ["upstream down"] * 2
+
+
+def test_leader_reuses_result_found_by_recheck():
+    flight = SingleFlight()
+    store = {}
+
+    def fetch():
+        store["k"] = "first"
+        return "first"
+
+    assert flight.do("k", fetch, recheck=lambda: store.get("k")) == "first"
+    # a caller that missed the cache before the first call finished
+    assert flight.do("k", lambda: pytest.fail("called upstream again"),
+                     recheck=lambda: store.get("k")) == "first"
+    assert flight.stats()["recheckHits"] == 1
+
+
+@pytest.mark.skipif(fcntl is None, reason="no fcntl")
+def test_sweep_removes_only_unheld_stale_lock_files(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path))
+    flight.STALE_AFTER = -1
+    held = os.open(tmp_path / "held.lock", os.O_RDWR | os.O_CREAT)
+    fcntl.flock(held, fcntl.LOCK_EX)
+    (tmp_path / "idle.lock").touch()
+    try:
+        flight._sweep()
+    finally:
+        os.close(held)
+    assert sorted(os.listdir(tmp_path)) == ["held.lock"]
+
+
+@pytest.mark.skipif(fcntl is None, reason="no fcntl")
+def test_cross_worker_recheck_under_lock(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path))
+    assert flight.do("k", lambda: pytest.fail("called upstream"), recheck=lambda: "cached") == "cached"
+    assert flight.stats()["crossWorkerHits"] == 1
+    assert os.path.exists(tmp_path / "k.lock")
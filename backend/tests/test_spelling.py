@@ -0,0 +1,53 @@
+import pytest
+
+from rule_index import normalise_text
+from tfidf_index import TfidfIndex
+
+
+def correct(kb, text):
+    return kb.index.spelling.correct(normalise_text(text))
+
+
+@pytest.mark.parametrize("typo, fixed", [
+    ("hedache and feaver", "headache and fever"),
+    ("stomuch pain", "stomach pain"),
+    ("my throt is sore", "my throat is sore"),
+    ("vomitting twice", "vomiting twice"),
+])
+def test_typos_are_corrected(kb, typo, fixed):
+    assert correct(kb, typo) == normalise_text(fixed)
+
+
+@pytest.mark.parametrize("text", [
+    "burping a lot after meals",
+    "i blacked out yesterday",
+    "sore mouth ulcers",
+    "sleeping badly",
+    "sneeze all day",
+    "right side",
+    "mental stress",
+])
+def test_real_words_are_left_alone(kb, text):
+    assert correct(kb, text) is None
+
+
+def test_correction_only_adds_matches(kb):
+    names = [m[1] for m in kb.index.score("hedache and feaver")]
+    assert {"headache", "fever"} <= set(names)
+    assert kb.index.score("burping a lot after meals") == []
+
+
+@pytest.fixture(scope="module")
+def tfidf(kb):
+    locales = [locale.conditions for locale in kb.locales.values() if locale.lang != "en"]
+    return TfidfIndex(kb.conditions, locales, spelling=kb.index.spelling)
+
+
+def test_tfidf_scores_the_corrected_text(tfidf):
+    assert [m[1] for m in tfidf.score("i have hedache and feaver")][:1] == ["headache"]
+    assert tfidf.score("burping a lot after meals") == []
+
+
+def test_tfidf_batch_matches_single_scoring(tfidf):
+    texts = ["i have hedache and feaver", "stomuch pain", "stomach pain", "xyz qqq"]
+    assert tfidf.score_many(texts) == [tfidf.score(t) for t in texts]
@@ -0,0 +1,128 @@
+import asyncio
+import base64
+import json
+
+import numpy as np
+import pytest
+
+import voice_audio
+from voice_audio import PlayoutMonitor, UplinkCoalescer, VoiceActivityDetector
+
+RATE = voice_audio.MIC_RATE
+CHUNK_MS = 40
+
+
+def silence(rng, ms=CHUNK_MS, db=-60):
+    n = RATE * ms // 1000
+    return np.clip(rng.normal(0, 32768 * 10 ** (db / 20), n), -32768, 32767).astype("<i2").tobytes()
+
+
+def tone(ms=CHUNK_MS, db=-20, hz=180):
+    t = np.arange(RATE * ms // 1000) / RATE
+    return (32768 * 10 ** (db / 20) * np.sin(2 * np.pi * hz * t)).astype("<i2").tobytes()
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(3)
+
+
+def test_frame_round_trip():
+    pcm = bytes(range(8))
+    frame = voice_audio.HEADER.pack(voice_audio.MIC_PCM16, 0, 7) + pcm
+    kind, seq, view = voice_audio.parse_frame(frame)
+    assert (kind, seq, bytes(view)) == (voice_audio.MIC_PCM16, 7, pcm)
+    with pytest.raises(voice_audio.FrameError):
+        voice_audio.parse_frame(b"\x01\x00")
+    with pytest.raises(voice_audio.FrameError):
+        voice_audio.parse_frame(frame + b"\x00")    # odd PCM length
+
+
+def test_realtime_input_is_the_gemini_message():
+    pcm = bytes(range(10))
+    message = json.loads(voice_audio.realtime_input(memoryview(pcm)))
+    chunk = message["realtimeInput"]["mediaChunks"][0]
+    assert base64.b64decode(chunk["data"]) == pcm
+    assert chunk["mimeType"] == "audio/pcm;rate=16000"
+
+
+def test_agent_frame_and_sample_count():
+    pcm = bytes(4800)
+    b64 = base64.b64encode(pcm).decode()
+    frame = voice_audio.agent_frame(b64, 0x1_0005)
+    assert voice_audio.HEADER.unpack_from(frame) == (voice_audio.AGENT_PCM16, 0, 5)
+    assert frame[voice_audio.HEADER_SIZE:] == pcm
+    assert voice_audio.b64_samples(b64) == 2400
+    assert voice_audio.b64_samples(base64.b64encode(bytes(6)).decode()) == 3
+
+
+def test_vad_drops_silence_and_forwards_speech_with_preroll(rng):
+    vad = VoiceActivityDetector(hangover_ms=80, preroll_ms=80)
+    quiet = [silence(rng) for _ in range(10)]
+    assert all(vad.process(c) == ([], False) for c in quiet)
+
+    chunks, ended = vad.process(tone())
+    assert not ended
+    assert chunks[-1] == tone()
+    assert chunks[:-1] == quiet[-2:]              # 80 ms of pre-roll
+
+    assert vad.process(silence(rng))[0]           # hangover
+    assert vad.process(silence(rng))[0]
+    assert vad.process(silence(rng)) == ([], True)
+    assert vad.process(silence(rng)) == ([], False)
+    assert vad.bytes_forwarded + vad.bytes_saved == vad.bytes_in
+
+
+def test_vad_empty_chunk():
+    assert VoiceActivityDetector().process(b"") == ([], False)
+
+
+def test_playout_monitor_measures_gaps():
+    monitor = PlayoutMonitor(rate=1000)
+    assert monitor.observe(100, now=0.0) == 0.0       # plays until 0.1
+    assert monitor.observe(100, now=0.05) == 0.0      # queued, plays until 0.2
+    assert monitor.observe(100, now=0.5) == pytest.approx(0.3)
+    assert monitor.stats()["lateChunks"] == 1
+    monitor.reset()
+    assert monitor.observe(100, now=5.0) == 0.0
+
+
+def test_coalescer_sends_full_frames_in_order():
+    async def run():
+        sent = []
+
+        async def send(pcm):
+            sent.append(bytes(pcm))
+
+        uplink = UplinkCoalescer(send, frame_ms=100, min_ms=100, max_ms=100)
+        chunks = [bytes([i]) * (RATE * 2 * 20 // 1000) for i in range(10)]   # 20 ms each
+        for chunk in chunks:
+            await uplink.add(chunk)
+        await uplink.flush()
+        uplink.close()
+        return sent, chunks
+
+    sent, chunks = asyncio.run(run())
+    assert len(sent) == 2
+    assert b"".join(sent) == b"".join(chunks)
+
+
+def test_coalescer_frame_follows_rtt():
+    uplink = UplinkCoalescer(None, frame_ms=100, min_ms=40, max_ms=200, rtt_factor=0.5)
+    for _ in range(20):
+        uplink.observe_rtt(1.0)
+    assert uplink.frame_ms == 200
+    for _ in range(40):
+        uplink.observe_rtt(0.01)
+    assert uplink.frame_ms == 40
+
+
+@pytest.mark.parametrize("preroll_ms", [0, 1, 10])
+def test_vad_zero_or_short_preroll(rng, preroll_ms):
+    vad = VoiceActivityDetector(hangover_ms=0, preroll_ms=preroll_ms)
+    for _ in range(5):
+        assert vad.process(silence(rng)) == ([], False)
+    chunks, _ = vad.process(tone())
+    assert chunks[-1] == tone()
+    # a pre-roll shorter than a chunk still keeps the one chunk before the speech
+    assert len(chunks) == (1 if preroll_ms == 0 else 2)
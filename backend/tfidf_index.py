@@ -0,0 +1,225 @@
+"""
+Character n-gram TF-IDF scorer: an alternative to the keyword RuleIndex.
+
+The keyword scorer only sees each condition's keyword lists. This one also
+reads the descriptive text – ``causes``, ``mechanism`` and ``red_flags``, in
+every language of the knowledge base – so wording taken from a description
+("pus oozing from gums", "burning while passing urine") matches without a
+keyword for it, and inflections and typos ("stomuch", "दांतों") still share
+most of their n-grams with the text they mean.
+
+Built once per knowledge-base version:
+
+  * features are the character 3- to 5-grams of each content word, padded
+    with a space on both sides (" gum", "gums ", …)
+  * a dense ``(n-grams × conditions)`` matrix holds 1.0 where the n-gram
+    occurs in the condition's keywords or label and TEXT_WEIGHT where it
+    occurs only in the descriptive text
+  * idf = log((N + 1) / df) over the N conditions; n-grams the base has never
+    seen count at the highest idf
+
+An input is a TF-IDF vector over its n-grams, and a condition's score is the
+share of that vector's weight the condition covers (× 100, so 0–100)::
+
+    score = 100 · (q · M[:, c]) / Σ q
+
+Unlike a cosine against the whole document, the score doesn't shrink as the
+description grows, and an input made mostly of words the base doesn't know
+stays below *min_score*. ``score`` is one gather of the rows the input
+selects plus one product; ``score_many`` does the same for a whole batch as
+one sparse ``(inputs × n-grams)`` by ``(n-grams × conditions)`` product.
+Each distinct input word's rows are cached, so the per-request Python work
+is a dictionary lookup per word.
+
+Shared n-grams are not enough for a short word with a typo in the middle:
+"hedache" shares only " he" and "che " with "headache", and the input
+"hedache and feaver" scores nothing. Given the knowledge base's
+SpellingIndex (*spelling*), the input is also corrected against the keyword
+vocabulary ("headache and fever") and scored again, and each condition keeps
+the better of its two scores, as in RuleIndex.score.
+
+Scores are on this 0–100 scale, not keyword points, so RULES_FIRST_MIN_SCORE
+and ROUTE_RULES_MIN_SCORE need values on that scale when it is selected.
+The matrix is n-grams × conditions × 4 bytes (under 1 MB for the bundled 13
+conditions); tables of thousands of conditions are the keyword index's job.
+"""
+
+import math
+from collections import Counter
+
+import numpy as np
+
+from rule_index import COMMON_WORDS, WORD_RE, SpellingIndex, normalise_text
+
+NGRAM_SIZES = (3, 4, 5)
+
+# weight of n-grams found only in causes/mechanism/red_flags (keywords = 1)
+TEXT_WEIGHT = 0.1
+TEXT_FIELDS = ("causes", "mechanism", "red_flags")
+
+# distinct input words whose n-gram rows are kept (cleared when full)
+WORD_CACHE_SIZE = 50_000
+
+# function words and fillers ("not feeling well", "lag raha", "बरं वाटत
+# नाही") that would otherwise tie a vague complaint to some description
+STOP_WORDS = COMMON_WORDS | frozenset("""
+    a an and or the of to in on at by for with from as is are was were be
+    it its this that my me i you your he she his her we our they them has
+    have had do does not no can may also into if so than then when well
+    aur ani se hai ho me mein ka ki ke ko la aahe raha rahi gaya gayi
+    lag lagi lagta nahi nahin bara vatat sa
+    और से है में का की के को आहे आणि लग नहीं नाही बरं वाटत सा
+""".split())
+
+
+def ngrams(text: str) -> Counter:
+    """Character n-gram counts of the (lower-cased) *text*'s content words."""
+    counts = Counter()
+    for word in WORD_RE.findall(normalise_text(text)):
+        if word in STOP_WORDS:
+            continue
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                counts[padded[i:i + n]] += 1
+    return counts
+
+
+class TfidfIndex:
+    """Condition ranking by TF-IDF weighted n-gram coverage.
+
+    *conditions* is the name → condition table the results refer to;
+    *locales* are further name → condition tables with the same names (the
+    translated keywords and texts), added to each condition's document.
+    Matches scoring below *min_score* are dropped. *spelling* (the knowledge
+    base's SpellingIndex) corrects misspelt input words before a second scoring.
+    """
+
+    def __init__(self, conditions: dict, locales=(), min_score: int = 20,
+                 spelling: SpellingIndex = None):
+        self.conditions = conditions
+        self.names = tuple(conditions)
+        self.min_score = min_score
+        self.spelling = spelling
+
+        docs = []
+        for name in self.names:
+            weights = {}
+            for table in (conditions, *locales):
+                c = table[name]
+                for gram in ngrams(" ".join([*c.get("keywords", ()), c["label"]]).lower()):
+                    weights[gram] = 1.0
+                for field in TEXT_FIELDS:
+                    for gram in ngrams((c.get(field) or "").lower()):
+                        weights.setdefault(gram, TEXT_WEIGHT)
+            docs.append(weights)
+
+        df = Counter(gram for weights in docs for gram in weights)
+        n = len(docs)
+        self.vocab = {gram: row for row, gram in enumerate(df)}
+        self.idf = np.array([math.log((n + 1) / k) for k in df.values()], dtype=np.float32)
+        self.unseen_idf = math.log(n + 1)
+
+        self._words = {}        # word → (rows, unseen), see _word_rows
+
+        self.matrix = np.zeros((len(self.vocab), n), dtype=np.float32)
+        for ci, weights in enumerate(docs):
+            rows = [self.vocab[gram] for gram in weights]
+            self.matrix[rows, ci] = list(weights.values())
+
+    def _word_rows(self, word: str) -> tuple:
+        """``(rows, unseen)``: matrix rows of *word*'s n-grams (repeats kept –
+        they are the term frequency) and how many of its n-grams are unknown.
+        Cached, since most inputs reuse a small vocabulary."""
+        entry = self._words.get(word)
+        if entry is None:
+            vocab = self.vocab
+            rows, unseen = [], 0
+            padded = f" {word} "
+            for n in NGRAM_SIZES:
+                for i in range(len(padded) - n + 1):
+                    row = vocab.get(padded[i:i + n])
+                    if row is None:
+                        unseen += 1
+                    else:
+                        rows.append(row)
+            if len(self._words) >= WORD_CACHE_SIZE:
+                self._words.clear()
+            entry = self._words[word] = (rows, unseen)
+        return entry
+
+    def _query(self, text: str) -> tuple:
+        """``(rows, total)``: matrix rows of the input's known n-grams (once per
+        occurrence) and the TF-IDF weight of the whole input, unseen n-grams included."""
+        rows, unseen = [], 0
+        for word in WORD_RE.findall(normalise_text(text)):
+            if word not in STOP_WORDS:
+                word_rows, word_unseen = self._word_rows(word)
+                rows += word_rows
+                unseen += word_unseen
+        rows = np.array(rows, dtype=np.intp)
+        return rows, float(self.idf[rows].sum()) + unseen * self.unseen_idf
+
+    def _ranked(self, scores) -> list:
+        """``(score, name, condition)`` for scores ≥ min_score, best first."""
+        floor = max(1, self.min_score)
+        hits = sorted((-s, ci) for ci, s in enumerate(np.rint(scores).astype(int).tolist())
+                      if s >= floor)                             # ties: table order
+        names, conditions = self.names, self.conditions
+        return [(-s, names[ci], conditions[names[ci]]) for s, ci in hits]
+
+    def _corrected(self, text: str):
+        """The spelling-corrected normalised *text*, or None if nothing changed."""
+        return None if self.spelling is None else self.spelling.correct(text)
+
+    def _scores(self, text: str):
+        """Per-condition scores of normalised *text*, None if no n-gram is known."""
+        rows, total = self._query(text)
+        if not len(rows):
+            return None
+        return self.idf[rows] @ self.matrix[rows] * (100.0 / total)
+
+    def score(self, symptoms_lower: str) -> list:
+        """Return ``[(score, name, condition), ...]`` for every condition
+        scoring at least *min_score*, highest first (ties keep table order).
+        A misspelt input is scored again after correction; each condition
+        keeps the better score."""
+        text = normalise_text(symptoms_lower)
+        scores = self._scores(text)
+        corrected = self._corrected(text)
+        if corrected is not None:
+            fixed = self._scores(corrected)
+            if fixed is not None:
+                scores = fixed if scores is None else np.maximum(scores, fixed)
+        return [] if scores is None else self._ranked(scores)
+
+    def score_many(self, texts: list) -> list:
+        """Score a batch as one sparse ``(inputs × n-grams)`` by dense
+        ``(n-grams × conditions)`` product: the rows every input selects are
+        gathered and weighted in one go, then summed per input (CSR-style, so
+        the cost follows the batch's n-grams, not inputs × vocabulary).
+        Duplicate texts are scored once; spelling corrections join the batch
+        as extra inputs and are merged back by maximum."""
+        unique = list(dict.fromkeys(texts))
+        if len(unique) <= 1:
+            return [self.score(t) for t in texts] if unique else []
+        normalised = [normalise_text(t) for t in unique]
+        fixes = [self._corrected(t) for t in normalised]
+        batch = normalised + [f for f in fixes if f is not None]
+        queries = [self._query(t) for t in batch]
+        rows = np.concatenate([q[0] for q in queries])
+        lengths = np.array([len(q[0]) for q in queries])
+        products = np.vstack([self.idf[rows, None] * self.matrix[rows],
+                              np.zeros((1, len(self.names)), dtype=np.float32)])
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        scores = np.add.reduceat(products, starts, axis=0)
+        scores[lengths == 0] = 0.0              # reduceat yields the next row for empty spans
+        totals = np.array([q[1] or 1.0 for q in queries])
+        scores *= (100.0 / totals)[:, None]
+        extra = len(unique)
+        for i, fix in enumerate(fixes):
+            if fix is not None:
+                np.maximum(scores[i], scores[extra], out=scores[i])
+                extra += 1
+        ranked = dict(zip(unique, map(self._ranked, scores[:len(unique)])))
+        return [ranked[t] for t in texts]
@@ -8,6 +8,8 @@ doctor guidance, and emergency instructions via real-time voice.
 
 import os
 import asyncio
+import base64
+import time
 import logging
 import json
 from contextlib import asynccontextmanager
@@ -28,6 +30,7 @@ from pydantic import BaseModel, Field
 # FastAPI imports
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 
 # WebSocket client
 import websockets
@@ -38,10 +41,90 @@ from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
 from langgraph.checkpoint.memory import MemorySaver
 from langchain_community.utilities import GoogleSerperAPIWrapper
 
+import async_triage
+import metrics
+import voice_audio
+from outbound_queue import OutboundQueue, QueueClosedError
+from metrics import FALLBACKS, JSON_PARSE_FAILURES, STAGE_SECONDS
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Prometheus metrics specific to the voice agent (shared ones live in metrics.py)
+VOICE_SESSIONS = metrics.Gauge("gramhealth_voice_sessions_active", "Open voice WebSocket sessions")
+VOICE_ROUTES = metrics.Counter(
+    "gramhealth_voice_route_total",
+    "LangGraph routing decisions (tool = web search, direct = answered without search)",
+    ("route",),
+)
+VOICE_TURNS = metrics.Counter(
+    "gramhealth_voice_turns_total",
+    "LangGraph turns run in the background (cancelled = a newer utterance barged in)",
+    ("outcome",),
+)
+VOICE_AUDIO_JITTER = metrics.Histogram(
+    "gramhealth_voice_audio_jitter_seconds",
+    "How late each agent audio chunk left the server against the browser's playout "
+    "schedule (0 = on time; above 0 = an audible gap)",
+    buckets=(0.0, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+VOICE_UPLINK_AUDIO = metrics.Counter(
+    "gramhealth_voice_uplink_messages_total",
+    "Microphone audio messages (received = browser chunks, sent = coalesced Gemini messages)",
+    ("stage",),
+)
+
+# Uplink coalescing (voice_audio.UplinkCoalescer): browser chunks are gathered
+# into frames of VOICE_FRAME_MS before they go to Gemini. With an RTT probe
+# every VOICE_RTT_PROBE_INTERVAL seconds (0 = off) the frame becomes
+# RTT × VOICE_FRAME_RTT_FACTOR, kept within [VOICE_FRAME_MIN_MS,
+# VOICE_FRAME_MAX_MS]. VOICE_FRAME_MAX_MS=0 forwards every chunk as it arrives.
+VOICE_FRAME_MS = int(os.getenv("VOICE_FRAME_MS", "100"))
+VOICE_FRAME_MIN_MS = int(os.getenv("VOICE_FRAME_MIN_MS", "40"))
+VOICE_FRAME_MAX_MS = int(os.getenv("VOICE_FRAME_MAX_MS", "200"))
+VOICE_FRAME_RTT_FACTOR = float(os.getenv("VOICE_FRAME_RTT_FACTOR", "0.5"))
+VOICE_RTT_PROBE_INTERVAL = float(os.getenv("VOICE_RTT_PROBE_INTERVAL", "2"))
+
+# Silence suppression (voice_audio.VoiceActivityDetector): after
+# VOICE_VAD_HANGOVER_MS without speech the microphone audio is held back (the
+# last VOICE_VAD_PREROLL_MS go out when speech resumes). A frame is speech
+# VOICE_VAD_MARGIN_DB above the noise floor. VOICE_VAD=0 streams everything.
+VOICE_VAD = os.getenv("VOICE_VAD", "1") == "1"
+VOICE_VAD_MARGIN_DB = float(os.getenv("VOICE_VAD_MARGIN_DB", "12"))
+VOICE_VAD_HANGOVER_MS = int(os.getenv("VOICE_VAD_HANGOVER_MS", "600"))
+VOICE_VAD_PREROLL_MS = int(os.getenv("VOICE_VAD_PREROLL_MS", "200"))
+
+VOICE_VAD_BYTES = metrics.Counter(
+    "gramhealth_voice_vad_bytes_total",
+    "Microphone PCM bytes seen by the VAD (received) and sent on to Gemini (forwarded)",
+    ("stage",),
+)
+# Outbound queues (outbound_queue.py), one per direction and session: audio
+# beyond VOICE_CLIENT_QUEUE_KB (to the browser) / VOICE_GEMINI_QUEUE_KB (to
+# Gemini) drops the oldest queued audio; control messages are never dropped,
+# and more than VOICE_QUEUE_MAX_CONTROL of them make the sender wait.
+VOICE_CLIENT_QUEUE_KB = int(os.getenv("VOICE_CLIENT_QUEUE_KB", "256"))
+VOICE_GEMINI_QUEUE_KB = int(os.getenv("VOICE_GEMINI_QUEUE_KB", "256"))
+VOICE_QUEUE_MAX_CONTROL = int(os.getenv("VOICE_QUEUE_MAX_CONTROL", "32"))
+
+VOICE_QUEUE_DROPPED = metrics.Counter(
+    "gramhealth_voice_queue_dropped_total",
+    "Audio messages dropped because the receiving socket fell behind",
+    ("direction",),
+)
+VOICE_QUEUE_PEAK = metrics.Histogram(
+    "gramhealth_voice_queue_peak_bytes",
+    "Most audio bytes a session had queued for one direction",
+    ("direction",),
+    buckets=(4096, 16384, 65536, 131072, 262144, 524288, 1048576),
+)
+VOICE_VAD_SAVED = metrics.Histogram(
+    "gramhealth_voice_vad_saved_ratio",
+    "Share of a session's microphone audio dropped as silence",
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9),
+)
+
 # Lifespan context manager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -56,6 +139,7 @@ async def lifespan(app: FastAPI):
     await get_workflow()
     yield
     # Shutdown
+    await async_triage.aclose()
     logger.info("GramHealth Voice Agent Shutting Down")
 
 # FastAPI app
@@ -68,6 +152,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# symptom triage on the event loop (same contract as the Flask API on :5000)
+app.include_router(async_triage.router)
+
 # ==========================================
 # STATE
 # ==========================================
@@ -94,7 +181,8 @@ def medical_search(query: str) -> str:
         search = GoogleSerperAPIWrapper(serper_api_key=SERPER_API_KEY, k=5)
         # Enhance query with medical context
         medical_query = f"{query} medical health India"
-        result = search.run(medical_query)
+        with STAGE_SECONDS.time("serper"):
+            result = search.run(medical_query)
         return f"Medical search results: {result}" if result else f"No results for: {query}"
     except Exception as e:
         return f"Search failed: {str(e)}"
@@ -197,9 +285,11 @@ def route_voice_to_tool_or_end(state: VoiceState) -> str:
 
     if needs_search:
         logger.info("[ROUTING] Voice Agent -> Tool (search needed)")
+        VOICE_ROUTES.inc("tool")
         return "tool"
 
     logger.info("[ROUTING] Voice Agent -> END (direct response)")
+    VOICE_ROUTES.inc("direct")
     return END
 
 # ==========================================
@@ -274,6 +364,66 @@ class VoiceSession:
         self.gemini_ws = None
         self.conversation_turn = 0
         self.is_active = False
+        # audio as binary WebSocket frames (voice_audio.py) instead of base64 JSON
+        self.binary_audio = False
+        self.audio_out_seq = 0
+        # outbound_queue.OutboundQueue per direction, while connected
+        self.to_client: Optional[OutboundQueue] = None
+        self.to_gemini: Optional[OutboundQueue] = None
+        # the LangGraph turn in flight (at most one), see start_turn
+        self.turn: Optional[asyncio.Task] = None
+        # inputTranscription fragments of the utterance in progress, see hear
+        self.heard: List[str] = []
+        self.playout = voice_audio.PlayoutMonitor()
+
+    def stats(self) -> dict:
+        return {
+            "id": self.session_id,
+            "turns": self.conversation_turn,
+            "binaryAudio": self.binary_audio,
+            "turnInFlight": self.turn is not None and not self.turn.done(),
+            "playout": self.playout.stats(),
+            "queues": {
+                "client": self.to_client.stats() if self.to_client is not None else None,
+                "gemini": self.to_gemini.stats() if self.to_gemini is not None else None,
+            },
+        }
+
+    def hear(self, fragment: str):
+        """Add one inputTranscription fragment. Gemini transcribes speech in
+        increments ("I have", " a headache"), so nothing runs until the user's
+        turn ends (``end_utterance``)."""
+        self.heard.append(fragment)
+
+    def end_utterance(self) -> str:
+        """The transcript heard since the last call ("" if none), joined."""
+        text = " ".join("".join(self.heard).split())
+        self.heard.clear()
+        return text
+
+    def start_turn(self, user_text: str, deliver) -> asyncio.Task:
+        """Run *user_text* through the workflow as a background task, so the
+        caller's receive loop (and the audio it forwards) keeps going. A turn
+        still in flight is cancelled first – the user spoke again (barge-in).
+        *deliver(user_text, response)* is awaited with the result."""
+        if self.turn is not None and not self.turn.done():
+            self.turn.cancel()
+        self.turn = asyncio.create_task(self._run_turn(user_text, deliver))
+        return self.turn
+
+    async def _run_turn(self, user_text: str, deliver):
+        try:
+            response = await self.process_user_input(user_text)
+            await deliver(user_text, response)
+        except asyncio.CancelledError:
+            VOICE_TURNS.inc("cancelled")
+            logger.info(f"[Voice] {self.session_id} turn cancelled by a newer utterance")
+            raise
+        except QueueClosedError:
+            VOICE_TURNS.inc("cancelled")
+            logger.info(f"[Voice] {self.session_id} turn dropped: the session is closing")
+            return
+        VOICE_TURNS.inc("completed")
 
     async def process_user_input(self, user_text: str) -> str:
         """Process user text through LangGraph workflow"""
@@ -287,7 +437,8 @@ class VoiceSession:
                 session_id=self.session_id,
             )
             config = {"configurable": {"thread_id": self.session_id}}
-            final_state = await workflow.ainvoke(initial_state, config)
+            with STAGE_SECONDS.time("langgraph"):
+                final_state = await workflow.ainvoke(initial_state, config)
 
             if final_state.final_response:
                 response = final_state.final_response
@@ -299,6 +450,7 @@ class VoiceSession:
 
         except Exception as e:
             logger.error(f"Workflow error: {e}")
+            FALLBACKS.inc("workflow_error")
             return "Sorry, I had trouble processing that. Could you repeat your question?"
 
 
@@ -316,9 +468,7 @@ async def websocket_endpoint(websocket: WebSocket):
     session_id = f"gramhealth_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
     session = VoiceSession(session_id)
     session.websocket = websocket
-    active_sessions[session_id] = session
-
-    logger.info(f"New voice session: {session_id}")
+    session.binary_audio = websocket.query_params.get("audio") == "binary"
 
     if not API_KEY:
         await websocket.send_json({
@@ -327,6 +477,10 @@ async def websocket_endpoint(websocket: WebSocket):
         })
         return
 
+    active_sessions[session_id] = session
+    VOICE_SESSIONS.inc()
+    logger.info(f"New voice session: {session_id}")
+
     gemini_url = (
         f"wss://generativelanguage.googleapis.com/ws/"
         f"google.ai.generativelanguage.v1beta.GenerativeService.BidiGenerateContent"
@@ -334,7 +488,9 @@ async def websocket_endpoint(websocket: WebSocket):
     )
 
     try:
-        async with websockets.connect(gemini_url) as gemini_ws:
+        # no permessage-deflate: base64 PCM barely compresses (~25%), and deflating
+        # it costs more CPU than the rest of the relay (bench/bench_voice.py --deflate)
+        async with websockets.connect(gemini_url, compression=None) as gemini_ws:
             session.gemini_ws = gemini_ws
             logger.info("Connected to Gemini Native Audio")
 
@@ -357,34 +513,109 @@ async def websocket_endpoint(websocket: WebSocket):
             }
 
             await gemini_ws.send(json.dumps(setup))
-            await websocket.send_json({"type": "ready"})
+            await websocket.send_json({"type": "ready", "audio": "binary" if session.binary_audio else "json"})
             logger.info("Voice agent ready for input")
 
             session.is_active = True
 
+            # readers only enqueue; one writer task per socket sends
+            async def send_client(message):
+                if isinstance(message, bytes):
+                    await websocket.send_bytes(message)
+                else:
+                    await websocket.send_text(message)
+
+            to_client = session.to_client = OutboundQueue(
+                send_client, max_audio_bytes=VOICE_CLIENT_QUEUE_KB * 1024,
+                max_control=VOICE_QUEUE_MAX_CONTROL,
+                on_drop=lambda _message: VOICE_QUEUE_DROPPED.inc("client"),
+            )
+            to_gemini = session.to_gemini = OutboundQueue(
+                gemini_ws.send, max_audio_bytes=VOICE_GEMINI_QUEUE_KB * 1024,
+                max_control=VOICE_QUEUE_MAX_CONTROL,
+                on_drop=lambda _message: VOICE_QUEUE_DROPPED.inc("gemini"),
+            )
+            writers = [asyncio.create_task(to_client.run()), asyncio.create_task(to_gemini.run())]
+
+            async def client_control(message: dict):
+                await to_client.put_control(json.dumps(message, separators=(",", ":"), ensure_ascii=False))
+
+            async def deliver_turn(user_text, response_text):
+                # Feed context back to Gemini for voice response
+                await to_gemini.put_control(json.dumps({
+                    "clientContent": {
+                        "turns": [
+                            {"role": "user", "parts": [{"text": user_text}]},
+                            {"role": "model", "parts": [{"text": response_text}]},
+                        ],
+                        "turnComplete": True,
+                    }
+                }))
+                await client_control({"type": "agent", "text": response_text})
+
+            async def send_upstream(pcm):
+                to_gemini.put_audio(voice_audio.realtime_input(pcm))
+                VOICE_UPLINK_AUDIO.inc("sent")
+
+            uplink = voice_audio.UplinkCoalescer(
+                send_upstream, frame_ms=VOICE_FRAME_MS, min_ms=VOICE_FRAME_MIN_MS,
+                max_ms=VOICE_FRAME_MAX_MS, rtt_factor=VOICE_FRAME_RTT_FACTOR,
+            )
+            vad = voice_audio.VoiceActivityDetector(
+                margin_db=VOICE_VAD_MARGIN_DB, hangover_ms=VOICE_VAD_HANGOVER_MS,
+                preroll_ms=VOICE_VAD_PREROLL_MS,
+            ) if VOICE_VAD else None
+
+            async def send_microphone(pcm):
+                VOICE_UPLINK_AUDIO.inc("received")
+                if vad is None:
+                    await uplink.add(pcm)
+                    return
+                chunks, ended = vad.process(pcm)
+                VOICE_VAD_BYTES.inc("received", amount=len(pcm))
+                for chunk in chunks:
+                    await uplink.add(chunk)
+                    VOICE_VAD_BYTES.inc("forwarded", amount=len(chunk))
+                if ended:
+                    await uplink.flush()
+                    await to_gemini.put_control(voice_audio.AUDIO_STREAM_END)
+
+            probe = None
+            if VOICE_RTT_PROBE_INTERVAL > 0 and VOICE_FRAME_MAX_MS > 0:
+                probe = asyncio.create_task(
+                    voice_audio.probe_rtt(gemini_ws, uplink, VOICE_RTT_PROBE_INTERVAL))
+
             # --- Forward audio from browser to Gemini ---
             async def forward_audio():
                 try:
                     while session.is_active:
-                        data = await websocket.receive_json()
+                        message = await websocket.receive()
+                        if message["type"] == "websocket.disconnect":
+                            raise WebSocketDisconnect(message.get("code", 1000))
+
+                        # binary audio frame: raw PCM, base64-encoded once for Gemini
+                        frame = message.get("bytes")
+                        if frame is not None:
+                            try:
+                                kind, _seq, pcm = voice_audio.parse_frame(frame)
+                            except voice_audio.FrameError as e:
+                                logger.warning(f"[Voice] {e}")
+                                continue
+                            if kind == voice_audio.MIC_PCM16:
+                                await send_microphone(pcm)
+                            continue
+
+                        data = json.loads(message["text"])
                         msg_type = data.get("type")
 
                         if msg_type == "audio":
-                            await gemini_ws.send(json.dumps({
-                                "realtimeInput": {
-                                    "mediaChunks": [{
-                                        "data": data["audio"],
-                                        "mimeType": "audio/pcm;rate=16000",
-                                    }]
-                                }
-                            }))
+                            await send_microphone(base64.b64decode(data["audio"]))
                         elif msg_type == "text":
                             # Allow text input too (for accessibility)
                             text = data.get("text", "").strip()
                             if text:
-                                response = await session.process_user_input(text)
-                                await websocket.send_json({"type": "user", "text": text})
-                                await websocket.send_json({"type": "agent", "text": response})
+                                await client_control({"type": "user", "text": text})
+                                session.start_turn(text, deliver_turn)
 
                 except WebSocketDisconnect:
                     logger.info(f"Client disconnected: {session_id}")
@@ -408,44 +639,48 @@ async def websocket_endpoint(websocket: WebSocket):
 
                             content = resp["serverContent"]
 
-                            # Handle transcribed user speech
+                            # transcribed user speech arrives in fragments: collect them
+                            # until the turn is over, so one utterance is one workflow turn
                             if "inputTranscription" in content:
-                                user_text = content["inputTranscription"].get("text", "").strip()
-                                if user_text:
-                                    session.conversation_turn += 1
-                                    logger.info(f"Turn {session.conversation_turn}: {user_text}")
-
-                                    # Run through LangGraph workflow
-                                    response_text = await session.process_user_input(user_text)
-
-                                    # Feed context back to Gemini for voice response
-                                    await gemini_ws.send(json.dumps({
-                                        "clientContent": {
-                                            "turns": [
-                                                {"role": "user", "parts": [{"text": user_text}]},
-                                                {"role": "model", "parts": [{"text": response_text}]},
-                                            ],
-                                            "turnComplete": True,
-                                        }
-                                    }))
-
-                                    # Send transcripts to frontend
-                                    await websocket.send_json({"type": "user", "text": user_text})
-                                    await websocket.send_json({"type": "agent", "text": response_text})
+                                session.hear(content["inputTranscription"].get("text", ""))
 
                             # Handle audio output from Gemini
                             if "modelTurn" in content:
                                 for part in content["modelTurn"].get("parts", []):
                                     if "inlineData" in part:
                                         audio = part["inlineData"]
-                                        if "audio/pcm" in audio.get("mimeType", ""):
-                                            await websocket.send_json({
+                                        if "audio/pcm" not in audio.get("mimeType", ""):
+                                            continue
+                                        VOICE_AUDIO_JITTER.observe(session.playout.observe(
+                                            voice_audio.b64_samples(audio["data"]), time.monotonic()))
+                                        if session.binary_audio:
+                                            to_client.put_audio(
+                                                voice_audio.agent_frame(audio["data"], session.audio_out_seq))
+                                            session.audio_out_seq += 1
+                                        else:
+                                            to_client.put_audio(json.dumps({
                                                 "type": "audio",
                                                 "audio": audio["data"],
-                                            })
+                                            }))
+
+                            # the reply is over (or cut off): silence until the next isn't a gap
+                            if content.get("turnComplete") or content.get("interrupted"):
+                                session.playout.reset()
+
+                            if content.get("turnComplete"):
+                                user_text = session.end_utterance()
+                                if user_text:
+                                    session.conversation_turn += 1
+                                    logger.info(f"Turn {session.conversation_turn}: {user_text}")
+
+                                    # Run through LangGraph workflow in the background, so
+                                    # Gemini audio keeps flowing during a search
+                                    await client_control({"type": "user", "text": user_text})
+                                    session.start_turn(user_text, deliver_turn)
 
                         except json.JSONDecodeError:
                             logger.warning("Non-JSON message from Gemini")
+                            JSON_PARSE_FAILURES.inc("gemini")
                         except Exception as e:
                             logger.error(f"Response processing error: {e}")
 
@@ -456,11 +691,40 @@ async def websocket_endpoint(websocket: WebSocket):
                 finally:
                     session.is_active = False
 
-            await asyncio.gather(
-                forward_audio(),
-                process_responses(),
-                return_exceptions=True,
-            )
+            # the session ends when either side goes away or a writer fails –
+            # a dead writer would otherwise leave put_control blocked forever
+            readers = [asyncio.create_task(forward_audio()), asyncio.create_task(process_responses())]
+            try:
+                done, _ = await asyncio.wait(readers + writers, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task in writers and not task.cancelled() and task.exception() is not None:
+                        logger.warning(f"[Voice] {session_id} writer failed: {task.exception()!r}")
+            finally:
+                session.is_active = False
+                to_client.close()
+                to_gemini.close()
+                if session.turn is not None:
+                    session.turn.cancel()
+                uplink.close()
+                if probe:
+                    probe.cancel()
+                for task in readers + writers:
+                    task.cancel()
+                await asyncio.gather(*readers, *writers, return_exceptions=True)
+                for direction, queue in (("client", to_client), ("gemini", to_gemini)):
+                    VOICE_QUEUE_PEAK.observe(queue.peak_audio_bytes, direction)
+                    if queue.dropped:
+                        logger.info(f"[Voice] {session_id} {direction} queue: dropped {queue.dropped} "
+                                    f"audio messages ({queue.dropped_bytes} bytes), peak "
+                                    f"{queue.peak_audio_bytes} bytes queued")
+                rtt = f"{uplink.rtt * 1000:.0f} ms" if uplink.rtt is not None else "n/a"
+                logger.info(f"[Voice] {session_id} uplink: {uplink.chunks_in} chunks in "
+                            f"{uplink.messages_out} messages, frame {uplink.frame_ms} ms, rtt {rtt}")
+                if vad is not None and vad.bytes_in:
+                    VOICE_VAD_SAVED.observe(vad.bytes_saved / vad.bytes_in)
+                    logger.info(f"[Voice] {session_id} VAD: {vad.bytes_saved} of {vad.bytes_in} bytes "
+                                f"dropped as silence ({vad.bytes_saved / vad.bytes_in:.0%}), "
+                                f"{vad.speech_frames} of {vad.frames} frames speech")
 
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
@@ -474,6 +738,7 @@ async def websocket_endpoint(websocket: WebSocket):
     finally:
         session.is_active = False
         active_sessions.pop(session_id, None)
+        VOICE_SESSIONS.dec()
         logger.info(f"Session {session_id} ended")
 
 # ==========================================
@@ -492,6 +757,18 @@ async def health_check():
     }
 
 
+@app.get("/api/voice/sessions")
+async def voice_sessions():
+    """Open sessions with their outbound queue depths and drops."""
+    return {"sessions": [session.stats() for session in active_sessions.values()]}
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text format: stage latencies, sessions, routing, parse failures."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/")
 async def root():
     return {
@@ -501,6 +778,9 @@ async def root():
         "endpoints": {
             "websocket": "/api/ws/voice",
             "health": "/api/health",
+            "sessions": "/api/voice/sessions",
+            "analyze": "/api/analyze-symptoms",
+            "metrics": "/metrics",
         },
     }
 
@@ -0,0 +1,370 @@
+"""
+Audio framing for the voice WebSocket (/api/ws/voice).
+
+Clients that connect with ``?audio=binary`` (the server confirms with
+``{"type": "ready", "audio": "binary"}``) send and receive audio as binary
+WebSocket messages: a 4-byte header followed by raw 16-bit little-endian
+mono PCM::
+
+    byte 0     kind   MIC_PCM16 (browser → server, 16 kHz)
+                      AGENT_PCM16 (server → browser, 24 kHz)
+    byte 1     flags  0 (reserved)
+    bytes 2-3  seq    uint16 LE, per direction, wraps at 65536
+
+JSON stays for everything else (ready, user/agent transcripts, errors, text
+input), and clients that don't ask for binary keep the base64-in-JSON audio
+messages. Binary frames skip a third of the bytes on the wire and the JSON
+parse per chunk on both ends.
+
+Gemini Live only takes base64 in JSON, so each direction still does one
+base64 pass on the server. The payload isn't copied before it: the uplink
+encodes a memoryview of the received frame straight into a prebuilt message
+(no ``json.dumps`` over the base64 text), the downlink decodes Gemini's
+base64 once and prepends the header.
+
+Upstream, ``VoiceActivityDetector`` drops silence and ``UplinkCoalescer``
+gathers the remaining chunks (of either kind) into larger Gemini messages;
+downstream, ``PlayoutMonitor`` measures how continuously the agent's audio
+leaves the server – see their docstrings.
+"""
+
+import asyncio
+import binascii
+import logging
+import math
+import struct
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct("<BBH")
+HEADER_SIZE = HEADER.size
+
+MIC_PCM16 = 0x01
+AGENT_PCM16 = 0x02
+
+MIC_RATE = 16000
+AGENT_RATE = 24000
+
+# the Gemini realtimeInput message around one base64 chunk
+_REALTIME_PREFIX = '{"realtimeInput":{"mediaChunks":[{"data":"'
+_REALTIME_SUFFIX = f'","mimeType":"audio/pcm;rate={MIC_RATE}"}}]}}}}'
+
+# tells Gemini the microphone paused, so it closes the turn without waiting for more audio
+AUDIO_STREAM_END = '{"realtimeInput":{"audioStreamEnd":true}}'
+
+
+class FrameError(ValueError):
+    """A binary message that isn't a valid audio frame."""
+
+
+def parse_frame(frame: bytes) -> tuple:
+    """``(kind, seq, pcm)`` of a binary message; *pcm* is a memoryview into
+    *frame*, not a copy."""
+    if len(frame) < HEADER_SIZE or (len(frame) - HEADER_SIZE) % 2:
+        raise FrameError(f"bad audio frame length {len(frame)}")
+    kind, _flags, seq = HEADER.unpack_from(frame)
+    return kind, seq, memoryview(frame)[HEADER_SIZE:]
+
+
+def realtime_input(pcm) -> str:
+    """Gemini ``realtimeInput`` message (JSON text) for raw 16 kHz PCM."""
+    return _REALTIME_PREFIX + binascii.b2a_base64(pcm, newline=False).decode("ascii") + _REALTIME_SUFFIX
+
+
+def agent_frame(b64: str, seq: int) -> bytes:
+    """Binary frame for one base64 PCM chunk from Gemini."""
+    return HEADER.pack(AGENT_PCM16, 0, seq & 0xFFFF) + binascii.a2b_base64(b64)
+
+
+def b64_samples(b64: str) -> int:
+    """16-bit samples in a base64 PCM chunk, without decoding it."""
+    return (len(b64) * 3 // 4 - b64[-2:].count("=")) // 2
+
+
+class PlayoutMonitor:
+    """Continuity of the agent's audio as it is forwarded to the browser.
+
+    Replays the frontend's playout schedule (utils/audioUtils.js AudioQueue):
+    a chunk starts when the previous one ends, or on arrival if the queue
+    ran dry. Each chunk's *lateness* is how long after the scheduled end of
+    the audio before it it arrived – 0 while audio arrives ahead of
+    playback, and the length of the audible gap when it doesn't. ``reset``
+    at the end of each model turn, so the silence between replies doesn't
+    count. The per-session counts skip gaps under GAP_THRESHOLD, which a
+    stream arriving exactly in real time shows from timer noise alone.
+    """
+
+    GAP_THRESHOLD = 0.01            # seconds
+
+    def __init__(self, rate: int = AGENT_RATE):
+        self.rate = rate
+        self._playing_until = None      # monotonic time the scheduled audio ends
+
+        self.chunks = 0
+        self.late_chunks = 0
+        self.gap_seconds = 0.0
+        self.max_gap = 0.0
+
+    def reset(self):
+        self._playing_until = None
+
+    def observe(self, samples: int, now: float) -> float:
+        """Record a chunk of *samples* arriving at *now*; returns its lateness."""
+        until = self._playing_until
+        late = 0.0 if until is None or now <= until else now - until
+        self._playing_until = max(now, until or now) + samples / self.rate
+        self.chunks += 1
+        if late >= self.GAP_THRESHOLD:
+            self.late_chunks += 1
+            self.gap_seconds += late
+            self.max_gap = max(self.max_gap, late)
+        return late
+
+    def stats(self) -> dict:
+        return {
+            "chunks": self.chunks,
+            "lateChunks": self.late_chunks,
+            "gapSeconds": round(self.gap_seconds, 3),
+            "maxGapMs": round(self.max_gap * 1000, 1),
+        }
+
+
+class VoiceActivityDetector:
+    """Energy and zero-crossing voice activity detection for 16-bit PCM, so
+    the silence while a patient thinks isn't streamed to Gemini.
+
+    Each chunk is cut into *frame_ms* frames and one NumPy product gives
+    every frame's energy (dBFS). A frame is speech when its energy is
+    *margin_db* above the noise floor, or half that with a zero-crossing rate
+    above *zcr_threshold* (the quiet, noisy "s", "sh", "f" sounds), and in
+    both cases above *min_db*. The zero-crossing rate is only computed for
+    frames in that middle band, so a typical chunk costs a handful of NumPy
+    calls – 10 to 15 µs. The floor follows the
+    quietest frames at once and rises slowly (FLOOR_RISE_DB_PER_S), so a fan
+    or traffic that starts mid-session becomes background after a few seconds.
+
+    ``process`` returns the chunks to forward:
+
+      * a chunk with speech, preceded on onset by up to *preroll_ms* of the
+        silence before it (the start of the first word is quiet);
+      * silent chunks for *hangover_ms* after speech, so pauses inside a
+        sentence and Gemini's own end-of-turn detection still get audio;
+      * nothing after that – with ``ended`` set on the first dropped chunk,
+        for the caller to tell Gemini the stream paused.
+
+    Statistics (bytes in / forwarded, frames seen / speech) are per instance,
+    i.e. per session.
+    """
+
+    FLOOR_RISE_DB_PER_S = 2.0
+
+    def __init__(self, rate: int = MIC_RATE, frame_ms: int = 20, margin_db: float = 12.0,
+                 min_db: float = -55.0, zcr_threshold: float = 0.3, hangover_ms: int = 600,
+                 preroll_ms: int = 200):
+        self.frame_samples = rate * frame_ms // 1000
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.zcr_threshold = zcr_threshold
+        self.hangover_samples = rate * hangover_ms // 1000
+        self.preroll_samples = rate * preroll_ms // 1000
+        self._floor_rise = self.FLOOR_RISE_DB_PER_S * frame_ms / 1000
+
+        self.floor = None           # noise floor, dBFS
+        self.active = False         # forwarding: speech or hangover
+        self._hangover_left = 0
+        self._preroll = deque()
+        self._preroll_len = 0
+
+        self.bytes_in = 0
+        self.bytes_forwarded = 0
+        self.frames = 0
+        self.speech_frames = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_in - self.bytes_forwarded
+
+    def frames_of(self, samples):
+        """*samples* (int16) as a ``(frames × frame_samples)`` view; a chunk
+        shorter than a frame is one frame, a partial last frame is left out."""
+        n = len(samples) // self.frame_samples
+        if not n:
+            return samples.reshape(1, -1)
+        return samples[:n * self.frame_samples].reshape(n, self.frame_samples)
+
+    @staticmethod
+    def energy_db(frames) -> list:
+        """Mean power of each frame in dBFS."""
+        x = frames.astype(np.float32)
+        scale = 1.0 / (x.shape[1] * 32768.0 ** 2)
+        return [10 * math.log10(p * scale + 1e-10) for p in np.einsum("ij,ij->i", x, x).tolist()]
+
+    @staticmethod
+    def zcr(frame) -> float:
+        """Share of adjacent samples in *frame* whose signs differ."""
+        return np.count_nonzero((frame[1:] ^ frame[:-1]) < 0) / max(1, len(frame) - 1)
+
+    def is_speech(self, samples) -> bool:
+        """Classify a chunk (any frame with speech), updating the noise floor."""
+        frames = self.frames_of(samples)
+        speech = False
+        floor, margin, low = self.floor, self.margin_db, self.min_db
+        for i, e in enumerate(self.energy_db(frames)):
+            if floor is None:
+                floor = e
+            if e > low and (e > floor + margin
+                            or (e > floor + margin / 2 and self.zcr(frames[i]) > self.zcr_threshold)):
+                speech = True
+                self.speech_frames += 1
+            floor = e if e < floor else min(e, floor + self._floor_rise)
+        self.floor = floor
+        self.frames += len(frames)
+        return speech
+
+    def process(self, pcm) -> tuple:
+        """``(chunks, ended)`` for one chunk of PCM (bytes-like): the chunks to
+        forward, in order, and whether forwarding just stopped."""
+        samples = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+        self.bytes_in += len(pcm)
+        if not len(samples):
+            return [], False
+
+        if self.is_speech(samples):
+            self._hangover_left = self.hangover_samples
+            chunks = [pcm]
+            if not self.active:
+                chunks[:0] = self._preroll
+                self._preroll.clear()
+                self._preroll_len = 0
+                self.active = True
+        elif self.active and self._hangover_left > 0:
+            self._hangover_left -= len(samples)
+            chunks = [pcm]
+        else:
+            ended, self.active = self.active, False
+            if self.preroll_samples > 0:
+                self._preroll.append(pcm)
+                self._preroll_len += len(samples)
+                # keep the fewest newest chunks that still cover preroll_samples
+                while (len(self._preroll) > 1
+                       and self._preroll_len - len(self._preroll[0]) // 2 >= self.preroll_samples):
+                    self._preroll_len -= len(self._preroll.popleft()) // 2
+            return [], ended
+
+        self.bytes_forwarded += sum(len(c) for c in chunks)
+        return chunks, False
+
+
+class UplinkCoalescer:
+    """Gathers microphone PCM into frames of *frame_ms* before it goes to
+    Gemini, so each ``realtimeInput`` message (a base64 pass, a JSON text and
+    a WebSocket frame) carries more audio.
+
+    A frame is sent once it holds *frame_ms* of audio, or *frame_ms* after
+    its first chunk arrived, whichever is first – so buffering adds at most
+    *frame_ms* of delay. A chunk that fills a frame on its own is passed
+    through without being copied.
+
+    The frame length follows the upstream round trip: ``observe_rtt`` keeps a
+    smoothed RTT and sets *frame_ms* to ``rtt × rtt_factor`` within
+    [*min_ms*, *max_ms*]. On a fast link frames stay short; on a slow one,
+    where the network already costs far more than the buffering, they grow
+    and the session sends fewer messages. *max_ms* = 0 sends every chunk as
+    it arrives.
+
+    *send* is a coroutine function taking the PCM of one frame; calls to it
+    never overlap and keep the audio's order.
+    """
+
+    RTT_SMOOTHING = 0.25        # weight of a new RTT sample in the average
+
+    def __init__(self, send, frame_ms: int = 100, min_ms: int = 40, max_ms: int = 200,
+                 rtt_factor: float = 0.5, rate: int = MIC_RATE):
+        self._send = send
+        self.min_ms = min(min_ms, max_ms)
+        self.max_ms = max_ms
+        self.rtt_factor = rtt_factor
+        self.bytes_per_ms = rate * 2 / 1000
+        self.frame_ms = self._clamp(frame_ms)
+        self.rtt = None             # smoothed, seconds
+
+        self._buffer = bytearray()
+        self._timer = None          # flushes a frame that isn't full in time
+        self._timer_task = None
+        self._lock = asyncio.Lock()
+
+        self.chunks_in = 0
+        self.messages_out = 0
+
+    def _clamp(self, ms: float) -> int:
+        return int(min(self.max_ms, max(self.min_ms, ms)))
+
+    def observe_rtt(self, seconds: float):
+        """Fold one round-trip sample into the average and resize frames."""
+        self.rtt = seconds if self.rtt is None else self.rtt + self.RTT_SMOOTHING * (seconds - self.rtt)
+        self.frame_ms = self._clamp(self.rtt * 1000 * self.rtt_factor)
+
+    async def add(self, pcm):
+        """Queue one chunk (bytes-like), sending a frame if it is now full."""
+        if not len(pcm):
+            return
+        self.chunks_in += 1
+        frame_bytes = self.frame_ms * self.bytes_per_ms
+        if not self._buffer:
+            if len(pcm) >= frame_bytes:
+                await self._send_frame(pcm)
+                return
+            self._timer = asyncio.get_running_loop().call_later(self.frame_ms / 1000, self._on_timer)
+        self._buffer += pcm
+        if len(self._buffer) >= frame_bytes:
+            await self.flush()
+
+    async def flush(self):
+        """Send whatever is buffered now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._buffer:
+            pcm, self._buffer = self._buffer, bytearray()
+            await self._send_frame(pcm)
+
+    async def _send_frame(self, pcm):
+        async with self._lock:
+            await self._send(pcm)
+        self.messages_out += 1
+
+    def _on_timer(self):
+        self._timer = None
+        self._timer_task = asyncio.ensure_future(self._flush_on_timer())
+
+    async def _flush_on_timer(self):
+        try:
+            await self.flush()
+        except Exception as e:              # the receive loop sees the closed socket too
+            logger.debug(f"[Voice] timed uplink flush failed: {e}")
+
+    def close(self):
+        """Drop the pending timer (the buffered audio isn't sent)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+async def probe_rtt(ws, coalescer: UplinkCoalescer, interval: float, timeout: float = 5.0):
+    """Ping *ws* (a websockets connection) every *interval* seconds and feed
+    each round trip to *coalescer*; a ping unanswered for *timeout* counts as
+    *timeout*. Runs until cancelled or the connection closes."""
+    try:
+        while True:
+            pong = await ws.ping()
+            try:
+                rtt = await asyncio.wait_for(pong, timeout)
+            except asyncio.TimeoutError:
+                rtt = timeout
+            coalescer.observe_rtt(rtt)
+            await asyncio.sleep(interval)
+    except Exception as e:                  # closed connection: the session is ending
+        logger.debug(f"[Voice] RTT probe stopped: {e}")
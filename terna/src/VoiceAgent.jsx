@@ -3,13 +3,15 @@ import { useLanguage } from "./LanguageContext";
 import {
   downsampleBuffer,
   floatTo16BitPCM,
+  floatToPCMFrame,
   base64ToAudioBuffer,
+  pcmFrameToAudioBuffer,
   AudioQueue,
   VoiceWebSocketManager,
 } from "./utils/audioUtils";
 import "./VoiceAgent.css";
 
-const VOICE_WS_URL = "ws://localhost:8002/api/ws/voice";
+const VOICE_WS_URL = "ws://localhost:8002/api/ws/voice?audio=binary";
 
 const VoiceAgent = ({ onClose }) => {
   const { t } = useLanguage();
@@ -26,6 +28,8 @@ const VoiceAgent = ({ onClose }) => {
   const processorRef = useRef(null);
   const audioQueueRef = useRef(null);
   const isRecordingRef = useRef(false);
+  const binaryAudioRef = useRef(false); // server confirmed binary audio frames
+  const audioSeqRef = useRef(0);
 
   // Clean up on unmount
   useEffect(() => {
@@ -68,6 +72,8 @@ const VoiceAgent = ({ onClose }) => {
       ws.onMessage = (data) => {
         switch (data.type) {
           case "ready":
+            // older servers don't answer ?audio=binary: keep base64 JSON audio
+            binaryAudioRef.current = data.audio === "binary";
             setStatus("ready");
             startRecording();
             break;
@@ -110,6 +116,18 @@ const VoiceAgent = ({ onClose }) => {
         }
       };
 
+      ws.onAudio = (frame) => {
+        // Play binary audio frame from Gemini
+        if (audioContextRef.current && audioQueueRef.current) {
+          try {
+            const audioBuffer = pcmFrameToAudioBuffer(frame, audioContextRef.current);
+            if (audioBuffer) audioQueueRef.current.addToQueue(audioBuffer);
+          } catch (e) {
+            console.error("Audio playback error:", e);
+          }
+        }
+      };
+
       ws.onClose = () => {
         if (isRecordingRef.current) {
           setStatus("idle");
@@ -154,8 +172,13 @@ const VoiceAgent = ({ onClose }) => {
       const inputData = e.inputBuffer.getChannelData(0);
       // Downsample from browser rate to 16kHz for Gemini
       const downsampled = downsampleBuffer(inputData, audioCtx.sampleRate, 16000);
-      const pcmBase64 = floatTo16BitPCM(downsampled);
 
+      if (binaryAudioRef.current) {
+        wsRef.current.sendBinary(floatToPCMFrame(downsampled, audioSeqRef.current++));
+        return;
+      }
+
+      const pcmBase64 = floatTo16BitPCM(downsampled);
       wsRef.current.send({
         type: "audio",
         audio: pcmBase64,
@@ -57,6 +57,54 @@ export function floatTo16BitPCM(float32Array) {
   return btoa(binary);
 }
 
+/**
+ * Binary audio frames (backend/voice_audio.py): a 4-byte header – kind (uint8),
+ * flags (uint8, 0), sequence number (uint16 LE) – then 16-bit LE mono PCM.
+ * Used when the socket is opened with ?audio=binary.
+ */
+export const FRAME_HEADER_BYTES = 4;
+export const FRAME_MIC_PCM16 = 0x01; // browser -> server, 16kHz
+export const FRAME_AGENT_PCM16 = 0x02; // server -> browser, 24kHz
+
+/**
+ * Converts Float32 audio samples to a binary frame: header + 16-bit PCM.
+ * Skips the base64 step of floatTo16BitPCM.
+ */
+export function floatToPCMFrame(float32Array, seq) {
+  const buffer = new ArrayBuffer(FRAME_HEADER_BYTES + float32Array.length * 2);
+  const view = new DataView(buffer);
+  view.setUint8(0, FRAME_MIC_PCM16);
+  view.setUint8(1, 0);
+  view.setUint16(2, seq & 0xffff, true);
+
+  for (let i = 0; i < float32Array.length; i++) {
+    const s = Math.max(-1, Math.min(1, float32Array[i]));
+    view.setInt16(FRAME_HEADER_BYTES + i * 2, s < 0 ? s * 0x8000 : s * 0x7fff, true);
+  }
+  return buffer;
+}
+
+/**
+ * Converts a binary frame from the server (24kHz PCM) to a playable AudioBuffer,
+ * reading the samples in place. Returns null for frames that aren't agent audio.
+ */
+export function pcmFrameToAudioBuffer(arrayBuffer, audioContext) {
+  const view = new DataView(arrayBuffer);
+  if (arrayBuffer.byteLength <= FRAME_HEADER_BYTES || view.getUint8(0) !== FRAME_AGENT_PCM16) {
+    return null;
+  }
+
+  const frameCount = (arrayBuffer.byteLength - FRAME_HEADER_BYTES) >> 1;
+  const buffer = audioContext.createBuffer(1, frameCount, 24000);
+  const channelData = buffer.getChannelData(0);
+
+  for (let i = 0; i < frameCount; i++) {
+    channelData[i] = view.getInt16(FRAME_HEADER_BYTES + i * 2, true) / 32768.0;
+  }
+
+  return buffer;
+}
+
 /**
  * Converts Base64 PCM audio from Gemini back to a playable AudioBuffer.
  * Gemini returns 24kHz mono PCM audio.
@@ -133,6 +181,7 @@ export class VoiceWebSocketManager {
     this.ws = null;
     this.isConnected = false;
     this.onMessage = null;
+    this.onAudio = null; // binary frames (ArrayBuffer)
     this.onClose = null;
     this.onError = null;
   }
@@ -141,6 +190,7 @@ export class VoiceWebSocketManager {
     return new Promise((resolve, reject) => {
       try {
         this.ws = new WebSocket(this.url);
+        this.ws.binaryType = "arraybuffer";
 
         const timeout = setTimeout(() => {
           if (!this.isConnected) {
@@ -156,6 +206,10 @@ export class VoiceWebSocketManager {
         };
 
         this.ws.onmessage = (event) => {
+          if (event.data instanceof ArrayBuffer) {
+            if (this.onAudio) this.onAudio(event.data);
+            return;
+          }
           try {
             const data = JSON.parse(event.data);
             if (this.onMessage) this.onMessage(data);
@@ -188,6 +242,14 @@ export class VoiceWebSocketManager {
     return false;
   }
 
+  sendBinary(buffer) {
+    if (this.isConnected && this.ws?.readyState === WebSocket.OPEN) {
+      this.ws.send(buffer);
+      return true;
+    }
+    return false;
+  }
+
   close() {
     if (this.ws) {
       this.ws.close();